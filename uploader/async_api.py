@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Async API
+Motor asyncio para chamadas em massa à API de metadados do YouTube
+(videos.list, videos.update...)
+
+Em vez de uma chamada por vez com time.sleep entre elas, cada item (vídeo,
+lote de IDs...) é processado por um handler assíncrono, com até
+--concurrency itens em andamento ao mesmo tempo:
+    - As chamadas respeitam um limite de taxa (--rate chamadas/segundo,
+      token bucket) em vez de uma pausa fixa por vídeo
+    - Cada chamada roda em uma thread do pool, com o cliente da API da
+      própria thread (httplib2 não é thread-safe)
+    - Erros transitórios (5xx, rate limit, rede) são repetidos com backoff
+      (retry_policy.py) sem ocupar o limite de taxa durante a espera
+    - stop() (ex: quota esgotada) faz os itens ainda não iniciados serem pulados
+
+Usado por update_youtube_language.py e fetch_durations.py.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+from quota_ledger import QuotaLedger
+from retry_policy import RetryPolicy
+from telemetry import Telemetry
+from youtube_client import YouTubeClients
+
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 10.0
+
+
+class RateLimiter:
+    """Token bucket: no máximo rate chamadas por segundo, com rajadas de até burst"""
+    
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Espera até haver um token disponível (rate 0 = sem limite)"""
+        if not self.rate:
+            return
+        
+        # Com o lock, quem espera é atendido em ordem de chegada
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+                self._tokens = 0.0
+                self._last = time.monotonic()
+            else:
+                self._tokens -= 1
+
+
+class AsyncApiEngine:
+    """Executa handlers assíncronos sobre uma lista de itens, com concorrência e taxa limitadas"""
+    
+    def __init__(self, clients: YouTubeClients, concurrency: int = DEFAULT_CONCURRENCY,
+                 rate: float = DEFAULT_RATE, telemetry: Optional[Telemetry] = None,
+                 quota: Optional[QuotaLedger] = None, retry_policy: Optional[RetryPolicy] = None):
+        self.clients = clients
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.telemetry = telemetry or Telemetry('async_api')
+        # Se informada, cada chamada (inclusive as repetidas) é cobrada na quota
+        self.quota = quota
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.stopped = False
+        self._limiter: Optional[RateLimiter] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def stop(self):
+        """Não inicia mais nenhum item (os que estão em andamento terminam)"""
+        self.stopped = True
+    
+    async def call(self, method: str, build: Callable[[Any], Any]) -> Any:
+        """
+        Executa build(cliente).execute() em uma thread do pool
+        method é o nome da chamada (ex: 'videos.list') para a quota e a telemetria
+        """
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            await self._limiter.acquire()
+            if self.quota:
+                self.quota.charge(method)
+            try:
+                return await loop.run_in_executor(self._executor, self._execute, method, build)
+            except Exception as e:
+                reason = self.retry_policy.should_retry(e, attempt)
+                if not reason:
+                    raise
+                attempt += 1
+                wait = self.retry_policy.delay(attempt)
+                self.telemetry.retry(reason, attempt, wait, method=method)
+                await asyncio.sleep(wait)
+    
+    def _execute(self, method: str, build: Callable[[Any], Any]) -> Any:
+        return self.telemetry.execute(method, build(self.clients.client()))
+    
+    def run(self, items: Iterable, handler: Callable[['AsyncApiEngine', Any], Awaitable[Any]],
+            report: Optional[Callable[[int, int, Any, Any], None]] = None) -> List:
+        """
+        Executa handler(engine, item) para cada item e retorna os resultados na ordem dos itens
+        
+        report(n, total, item, resultado) é chamado assim que cada item termina
+        (n = quantos já terminaram). Exceções do handler viram o resultado do
+        item; itens pulados por stop() ficam com resultado None e não são reportados.
+        """
+        self.stopped = False
+        return asyncio.run(self._run(list(items), handler, report))
+    
+    async def _run(self, items: List, handler, report) -> List:
+        self._limiter = RateLimiter(self.rate)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='async_api')
+        results: List = [None] * len(items)
+        # Iterador compartilhado: cada worker pega o próximo item livre
+        queue = iter(enumerate(items))
+        done = 0
+        
+        async def worker():
+            nonlocal done
+            for index, item in queue:
+                if self.stopped:
+                    continue
+                try:
+                    results[index] = await handler(self, item)
+                except Exception as e:
+                    results[index] = e
+                done += 1
+                if report:
+                    report(done, len(items), item, results[index])
+        
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(items)))))
+        finally:
+            self._executor.shutdown(wait=True)
+        return results
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Atomic File
+Gravação atômica dos arquivos de estado compartilhados pelos scripts
+
+O conteúdo vai para um arquivo temporário exclusivo (mkstemp) no diretório
+do destino e só então é renomeado sobre ele. Um nome fixo como <arquivo>.tmp
+seria o mesmo para dois processos gravando o mesmo arquivo (ex: uploader e
+fetch_durations.py no video_cache.json): um poderia publicar o arquivo pela
+metade do outro, ou falhar no os.replace porque o temporário já foi movido.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional, Tuple
+
+
+def temp_file_for(path: str) -> Tuple[int, str]:
+    """
+    Arquivo temporário exclusivo no diretório do destino (o rename fica no mesmo disco)
+    Recebe as permissões do destino, já que o mkstemp cria com 0600
+    """
+    fd, tmp_file = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp',
+                                    dir=os.path.dirname(path) or '.')
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    os.chmod(tmp_file, mode)
+    return fd, tmp_file
+
+
+@contextmanager
+def atomic_write(path: str, encoding: Optional[str] = 'utf-8', newline: Optional[str] = None,
+                 fsync: bool = False) -> Iterator[IO]:
+    """
+    Abre um temporário exclusivo para escrita e o renomeia sobre path ao sair do bloco
+    Se o bloco falhar, o temporário é apagado e o destino fica como estava
+    """
+    fd, tmp_file = temp_file_for(path)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline=newline) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
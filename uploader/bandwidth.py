@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Bandwidth Shaper
+Limita a banda de upload por janela de horário (token bucket)
+
+Exemplo: 5 Mbit/s das 07:00 às 19:00 (horário de trabalho no escritório) e
+sem limite à noite. Uma janela com limite 0 pausa os uploads até o fim dela,
+em vez de encerrar a execução. A vazão efetiva de cada janela é registrada
+para dimensionar as janelas com dados reais.
+
+Formato das janelas: HH:MM-HH:MM=Mbit/s (ex: 07:00-19:00=5, 19:00-07:00=0)
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+# Com limite ativo, cada chunk carrega no máximo ~2s de banda: rajadas curtas
+# na velocidade do link, média dentro do limite
+SHAPED_CHUNK_SECONDS = 2.0
+UNLIMITED_LABEL = 'sem limite'
+
+
+def _parse_clock(value: str) -> int:
+    """Converte HH:MM em minutos desde a meia-noite"""
+    hours, minutes = value.strip().split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+class BandwidthWindow:
+    """Janela de horário com um limite de banda (None = sem limite)"""
+    
+    def __init__(self, start: int, end: int, mbps: Optional[float]):
+        self.start = start
+        self.end = end
+        self.mbps = mbps
+    
+    @classmethod
+    def parse(cls, spec: str) -> 'BandwidthWindow':
+        """Interpreta 'HH:MM-HH:MM=Mbit/s' (ou '=unlimited')"""
+        try:
+            hours, rate = spec.split('=')
+            start, end = hours.split('-')
+            mbps = None if rate.strip().lower() in ('unlimited', 'inf', '') else float(rate)
+            return cls(_parse_clock(start), _parse_clock(end), mbps)
+        except ValueError:
+            raise ValueError(f"Janela de banda inválida: '{spec}' (use HH:MM-HH:MM=Mbit/s)")
+    
+    @property
+    def label(self) -> str:
+        rate = UNLIMITED_LABEL if self.mbps is None else f"{self.mbps:g} Mbit/s"
+        return f"{self.start // 60:02d}:{self.start % 60:02d}-{self.end // 60:02d}:{self.end % 60:02d} ({rate})"
+    
+    @property
+    def bytes_per_second(self) -> Optional[float]:
+        return None if self.mbps is None else self.mbps * 1_000_000 / 8
+    
+    def contains(self, minute: int) -> bool:
+        """Indica se o minuto do dia está na janela (suporta janelas que passam da meia-noite)"""
+        if self.start <= self.end:
+            return self.start <= minute < self.end
+        return minute >= self.start or minute < self.end
+    
+    def seconds_until_end(self, now: datetime) -> float:
+        """Segundos até o fim da janela a partir de now"""
+        end = now.replace(hour=self.end // 60, minute=self.end % 60, second=0, microsecond=0)
+        if end <= now:
+            end += timedelta(days=1)
+        return (end - now).total_seconds()
+
+
+class BandwidthShaper:
+    """Token bucket compartilhado entre os workers, com limite por janela de horário"""
+    
+    def __init__(self, windows: List[BandwidthWindow]):
+        self.windows = windows
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._last_refill = time.monotonic()
+        self._current: Optional[BandwidthWindow] = None
+        # label da janela → [bytes enviados, intervalos (início, fim) de envio]
+        self.stats: Dict[str, list] = {}
+    
+    @classmethod
+    def from_specs(cls, specs: Optional[List[str]]) -> 'BandwidthShaper':
+        return cls([BandwidthWindow.parse(spec) for spec in specs or []])
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.windows)
+    
+    def current_window(self, now: Optional[datetime] = None) -> Optional[BandwidthWindow]:
+        """Janela em vigor agora (None = fora de qualquer janela, sem limite)"""
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        for window in self.windows:
+            if window.contains(minute):
+                return window
+        return None
+    
+    def current_label(self) -> str:
+        window = self.current_window()
+        return window.label if window else UNLIMITED_LABEL
+    
+    def max_chunk_size(self) -> Optional[int]:
+        """Tamanho máximo de chunk na janela atual (None = sem restrição)"""
+        window = self.current_window()
+        if not window or not window.bytes_per_second:
+            return None
+        return int(window.bytes_per_second * SHAPED_CHUNK_SECONDS)
+    
+    def acquire(self, nbytes: int, cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Bloqueia até que nbytes possam ser enviados dentro do limite atual
+        Em uma janela com limite 0, espera até o fim da janela
+        Retorna False se cancel_event for sinalizado durante a espera
+        """
+        while True:
+            now = datetime.now()
+            window = self.current_window(now)
+            
+            if window is None or window.mbps is None:
+                return True
+            
+            if window.mbps <= 0:
+                wait = window.seconds_until_end(now)
+                print(f"⏸️  Uploads pausados na janela {window.label}; retomando em {int(wait)}s")
+                if self._wait(wait, cancel_event):
+                    return False
+                continue
+            
+            rate = window.bytes_per_second
+            with self._lock:
+                clock = time.monotonic()
+                if window is not self._current:
+                    # Mudou de janela: recomeça o bucket vazio com a nova taxa
+                    self._current = window
+                    self._tokens = 0.0
+                else:
+                    self._tokens = min(rate, self._tokens + (clock - self._last_refill) * rate)
+                self._last_refill = clock
+                
+                # Reserva os bytes; saldo negativo é pago esperando
+                self._tokens -= nbytes
+                wait = -self._tokens / rate if self._tokens < 0 else 0.0
+            
+            # Não atravessa o fim da janela com a taxa antiga
+            wait = min(wait, window.seconds_until_end(now))
+            return not self._wait(wait, cancel_event)
+    
+    def _wait(self, seconds: float, cancel_event: Optional[threading.Event]) -> bool:
+        """Espera seconds; retorna True se foi cancelado"""
+        if seconds <= 0:
+            return False
+        if cancel_event is not None:
+            return cancel_event.wait(seconds)
+        time.sleep(seconds)
+        return False
+    
+    def record(self, label: str, nbytes: int, start: float, end: float):
+        """
+        Registra bytes enviados no intervalo [start, end] (time.monotonic(),
+        incluindo esperas do bucket) dentro da janela
+        """
+        with self._lock:
+            entry = self.stats.setdefault(label, [0, []])
+            entry[0] += nbytes
+            entry[1].append((start, end))
+    
+    def report(self) -> List[Tuple[str, int, float, float]]:
+        """
+        Lista (janela, bytes, segundos, Mbit/s efetivos) de cada janela usada
+        Os segundos são de relógio: intervalos simultâneos de vários workers contam uma vez
+        """
+        rows = []
+        for label, (nbytes, intervals) in sorted(self.stats.items()):
+            seconds = 0.0
+            current_start, current_end = None, None
+            for start, end in sorted(intervals):
+                if current_end is None or start > current_end:
+                    if current_end is not None:
+                        seconds += current_end - current_start
+                    current_start, current_end = start, end
+                else:
+                    current_end = max(current_end, end)
+            if current_end is not None:
+                seconds += current_end - current_start
+            
+            mbps = nbytes * 8 / 1_000_000 / seconds if seconds > 0 else 0.0
+            rows.append((label, int(nbytes), seconds, mbps))
+        return rows
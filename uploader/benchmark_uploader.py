@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Uploader Benchmark
+Mede o desempenho do youtube_uploader.py (e opcionalmente do
+fetch_durations.py e do update_youtube_language.py) contra o
+fake_youtube_server.py, sem canal real e sem gastar quota
+
+Para cada conjunto sintético de vídeos (MP4 válidos gerados em um diretório
+temporário) reporta uploads/hora, percentis de latência dos chunks, chamadas
+à API por aula e o custo das gravações de metadados.
+
+Uso:
+    python benchmark_uploader.py
+    python benchmark_uploader.py --set small=40x2 --set large=6x64 --workers 4 --bandwidth 50 --latency 0.03
+    python benchmark_uploader.py --error-rate 0.05 --all-scripts --output resultado.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from catalog import Catalog
+from fake_youtube_server import FakeYouTubeServer, build_fake_client
+from chunk_sizer import MB, DEFAULT_CHUNK_SIZE
+
+
+DEFAULT_SETS = ['small=20x2', 'large=4x24']
+LESSONS_PER_MODULE = 10
+# Quota e limite de canal do benchmark: nunca limitam a execução
+UNLIMITED = 10 ** 9
+
+
+def parse_set(spec: str) -> Tuple[str, int, float]:
+    """Interpreta 'nome=QUANTIDADExMB' (ex: small=20x2)"""
+    try:
+        name, size = spec.split('=')
+        count, megabytes = size.lower().split('x')
+        return name, int(count), float(megabytes)
+    except ValueError:
+        raise ValueError(f"Conjunto inválido: '{spec}' (use nome=QUANTIDADExMB)")
+
+
+def _atom(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def write_synthetic_mp4(path: Path, size: int, seconds: int, seed: int):
+    """
+    Grava um MP4 mínimo e válido para o media_probe (ftyp + mdat + moov)
+    O mdat é esparso, com alguns bytes únicos para não colidir fingerprints
+    """
+    mvhd = _atom(b'mvhd', b'\0' * 4 + struct.pack('>IIII', 0, 0, 1000, seconds * 1000) + b'\0' * 80)
+    # tkhd versão 0: largura/altura (16.16) no offset 76 do conteúdo
+    tkhd = _atom(b'tkhd', b'\0' * 76 + struct.pack('>II', 1280 << 16, 720 << 16))
+    hdlr = _atom(b'hdlr', b'\0' * 8 + b'vide' + b'\0' * 12)
+    stsd = _atom(b'stsd', b'\0' * 8 + struct.pack('>I4s', 16, b'avc1') + b'\0' * 8)
+    trak = _atom(b'trak', tkhd + _atom(b'mdia', hdlr + _atom(b'minf', _atom(b'stbl', stsd))))
+    moov = _atom(b'moov', mvhd + trak)
+    ftyp = _atom(b'ftyp', b'isom' + b'\0' * 4)
+    
+    # Cabeçalho (8) + seed no início (8) + região esparsa + seed no fim (8)
+    mdat_size = max(24, size - len(ftyp) - len(moov))
+    with open(path, 'wb') as f:
+        f.write(ftyp)
+        f.write(struct.pack('>I4s', mdat_size, b'mdat'))
+        f.write(struct.pack('>Q', seed))
+        f.seek(mdat_size - 24, os.SEEK_CUR)
+        f.write(struct.pack('>Q', seed))
+        f.write(moov)
+
+
+def build_course(root: Path, name: str, count: int, megabytes: float) -> Tuple[Path, Path]:
+    """Cria os vídeos sintéticos e o JSON de metadados do conjunto"""
+    videos_dir = root / 'videos'
+    modules: List[Dict] = []
+    
+    for index in range(count):
+        module_number = index // LESSONS_PER_MODULE + 1
+        if module_number > len(modules):
+            folder = f"{module_number:02d}_modulo"
+            (videos_dir / folder).mkdir(parents=True, exist_ok=True)
+            modules.append({
+                'id': f"module-{module_number:02d}",
+                'order': module_number,
+                'title': f"Módulo {module_number}",
+                'folderName': folder,
+                'sections': [{'id': f"section-{module_number:02d}-01", 'order': 1,
+                              'title': 'Seção 1', 'lessons': []}]
+            })
+        
+        module = modules[-1]
+        lesson_number = len(module['sections'][0]['lessons']) + 1
+        file_name = f"Videoaula {index + 1:03d}.mp4"
+        write_synthetic_mp4(videos_dir / module['folderName'] / file_name,
+                            int(megabytes * MB), 60 + index, index + 1)
+        module['sections'][0]['lessons'].append({
+            'id': f"lesson-{module_number:02d}-01-{lesson_number:02d}",
+            'order': lesson_number,
+            'title': f"Aula {index + 1}",
+            'fileName': file_name,
+            'type': 'video'
+        })
+    
+    metadata_file = root / 'course-metadata.json'
+    metadata = {
+        'course': {
+            'id': f"benchmark-{name}",
+            'acronym': 'BENCH',
+            'title': f"Benchmark {name}",
+            'description': 'Conjunto sintético do benchmark',
+            'language': 'pt-BR',
+            'totalVideos': count,
+            'modules': modules
+        }
+    }
+    with open(metadata_file, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    
+    return videos_dir, metadata_file
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil por interpolação linear (0 se não houver valores)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _strip_durations(metadata_file: Path):
+    """Remove as durações para que o fetch_durations.py tenha trabalho"""
+    with open(metadata_file, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    for lesson in Catalog(metadata):
+        lesson.data.pop('duration', None)
+    with open(metadata_file, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+
+def _calls_since(server: FakeYouTubeServer, before: Dict) -> Dict:
+    return {method: count - before.get(method, 0)
+            for method, count in server.stats()['calls'].items() if count - before.get(method, 0)}
+
+
+def run_set(spec: str, args) -> Dict:
+    """Executa o benchmark de um conjunto em um diretório temporário isolado"""
+    from youtube_uploader import YouTubeUploader
+    
+    name, count, megabytes = parse_set(spec)
+    root = Path(tempfile.mkdtemp(prefix=f"yt-bench-{name}-"))
+    cwd = os.getcwd()
+    server = FakeYouTubeServer(latency=args.latency, bandwidth_mbps=args.bandwidth,
+                               error_rate=args.error_rate, upload_limit=args.upload_limit,
+                               seed=args.seed).start()
+    output = sys.stdout if args.verbose else io.StringIO()
+    
+    try:
+        videos_dir, metadata_file = build_course(root, name, count, megabytes)
+        # Arquivos de estado (progresso, sessões, ledger...) ficam no diretório temporário
+        os.chdir(root)
+        
+        uploader = YouTubeUploader(
+            str(videos_dir), metadata_file=str(metadata_file),
+            chunk_size=int(args.chunk_size * MB),
+            adaptive_chunks=args.adaptive_chunks,
+            channel_limit=UNLIMITED,
+            daily_quota=UNLIMITED,
+            probe=not args.no_probe,
+            client_factory=lambda: build_fake_client(server.url)
+        )
+        
+        # Mede o tempo gasto gravando metadados (journal + compactações)
+        metadata_writes: List[float] = []
+        update_metadata_file = uploader.update_metadata_file
+        
+        def timed_update(*update_args, **update_kwargs):
+            started = time.perf_counter()
+            update_metadata_file(*update_args, **update_kwargs)
+            metadata_writes.append(time.perf_counter() - started)
+        
+        uploader.update_metadata_file = timed_update
+        
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            uploader.run(max_uploads=None, delay=0, workers=args.workers)
+        elapsed = time.perf_counter() - started
+        
+        stats = server.stats()
+        uploaded = uploader.state.uploaded_count()
+        latencies = stats['chunkLatencies']
+        result = {
+            'set': name,
+            'lessons': count,
+            'sizeMB': megabytes,
+            'uploaded': uploaded,
+            'failed': uploader.state.failed_count(),
+            'seconds': round(elapsed, 3),
+            'uploadsPerHour': round(uploaded / elapsed * 3600, 1) if elapsed else 0.0,
+            'throughputMBps': round(stats['bytesReceived'] / MB / elapsed, 2) if elapsed else 0.0,
+            'chunks': len(latencies),
+            'chunkLatencyMs': {
+                'p50': round(percentile(latencies, 0.50) * 1000, 1),
+                'p90': round(percentile(latencies, 0.90) * 1000, 1),
+                'p99': round(percentile(latencies, 0.99) * 1000, 1),
+                'max': round(max(latencies, default=0.0) * 1000, 1)
+            },
+            'errorsInjected': stats['errorsInjected'],
+            'retries': sum(uploader.telemetry.retry_totals()[0].values()),
+            'apiCalls': stats['calls'],
+            'apiCallsPerLesson': round(sum(stats['calls'].values()) / count, 2),
+            'metadataWrites': len(metadata_writes),
+            'metadataWriteMs': {
+                'total': round(sum(metadata_writes) * 1000, 1),
+                'perUpload': round(sum(metadata_writes) / len(metadata_writes) * 1000, 2) if metadata_writes else 0.0,
+                'max': round(max(metadata_writes, default=0.0) * 1000, 2)
+            }
+        }
+        
+        if args.all_scripts:
+            result['scripts'] = run_other_scripts(server, metadata_file, count, output)
+        
+        return result
+    finally:
+        os.chdir(cwd)
+        server.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def run_other_scripts(server: FakeYouTubeServer, metadata_file: Path, count: int, output) -> Dict:
+    """Executa fetch_durations.py e update_youtube_language.py contra o mesmo servidor"""
+    from fetch_durations import DurationFetcher
+    from update_youtube_language import YouTubeLanguageUpdater
+    
+    results = {}
+    _strip_durations(metadata_file)
+    
+    for label, script in (
+        ('fetch_durations', DurationFetcher(str(metadata_file), daily_quota=UNLIMITED,
+                                            client_factory=lambda: build_fake_client(server.url))),
+        ('update_youtube_language', YouTubeLanguageUpdater(str(metadata_file), daily_quota=UNLIMITED,
+                                                           client_factory=lambda: build_fake_client(server.url)))
+    ):
+        before = server.stats()['calls']
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            script.authenticate()
+            script.load_metadata()
+            if label == 'fetch_durations':
+                script.fetch_missing_durations()
+            else:
+                script.update_all_videos()
+        elapsed = time.perf_counter() - started
+        
+        calls = _calls_since(server, before)
+        results[label] = {
+            'seconds': round(elapsed, 3),
+            'apiCalls': calls,
+            'apiCallsPerLesson': round(sum(calls.values()) / count, 2)
+        }
+    
+    return results
+
+
+def print_result(result: Dict):
+    latency = result['chunkLatencyMs']
+    writes = result['metadataWriteMs']
+    print(f"📦 {result['set']}: {result['lessons']} × {result['sizeMB']:g} MB")
+    print(f"   ✅ Enviados: {result['uploaded']}   ❌ Falhas: {result['failed']}   ⏱️  {result['seconds']:.2f}s")
+    print(f"   🚀 {result['uploadsPerHour']:.0f} uploads/hora, {result['throughputMBps']:.2f} MB/s")
+    print(f"   📶 Chunks: {result['chunks']} (p50 {latency['p50']} ms, p90 {latency['p90']} ms, "
+          f"p99 {latency['p99']} ms, máx {latency['max']} ms)")
+    if result['errorsInjected']:
+        print(f"   💥 Erros 5xx injetados: {result['errorsInjected']} ({result['retries']} novas tentativas)")
+    calls = ', '.join(f"{method}={n}" for method, n in sorted(result['apiCalls'].items()))
+    print(f"   📞 Chamadas à API: {result['apiCallsPerLesson']:.2f} por aula ({calls})")
+    print(f"   💾 Metadados: {result['metadataWrites']} gravações, {writes['perUpload']} ms por upload "
+          f"(máx {writes['max']} ms, total {writes['total']} ms)")
+    for label, script in result.get('scripts', {}).items():
+        calls = ', '.join(f"{method}={n}" for method, n in sorted(script['apiCalls'].items()))
+        print(f"   🔧 {label}: {script['seconds']:.2f}s, {script['apiCallsPerLesson']:.2f} chamadas por aula ({calls})")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark do uploader contra a API falsa local (fake_youtube_server.py)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos:
+  # Conjuntos padrão (20 × 2 MB e 4 × 24 MB), 1 worker, sem limite de banda
+  python benchmark_uploader.py
+  
+  # Link de 50 Mbit/s, 30 ms de latência e 4 workers
+  python benchmark_uploader.py --bandwidth 50 --latency 0.03 --workers 4
+  
+  # Chunks adaptativos com 5% de erros 5xx, incluindo os outros scripts
+  python benchmark_uploader.py --adaptive-chunks --error-rate 0.05 --all-scripts
+        """
+    )
+    
+    parser.add_argument('--set', action='append', metavar='NOME=QTDxMB',
+                        help=f"Conjunto sintético de vídeos; pode ser repetido (padrão: {' '.join(DEFAULT_SETS)})")
+    parser.add_argument('--workers', type=int, default=1, help='Uploads simultâneos (padrão: 1)')
+    parser.add_argument('--chunk-size', type=float, default=DEFAULT_CHUNK_SIZE / MB,
+                        help=f'Tamanho dos chunks em MB (padrão: {DEFAULT_CHUNK_SIZE // MB})')
+    parser.add_argument('--adaptive-chunks', action='store_true', help='Usa chunks adaptativos')
+    parser.add_argument('--no-probe', action='store_true', help='Desativa o probe local dos MP4')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latência por requisição em segundos')
+    parser.add_argument('--bandwidth', type=float, default=None, help='Banda do servidor em Mbit/s (padrão: sem limite)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de chunks respondidos com 503')
+    parser.add_argument('--upload-limit', type=int, default=None,
+                        help='Uploads aceitos antes de uploadLimitExceeded')
+    parser.add_argument('--seed', type=int, default=1, help='Semente dos erros injetados (padrão: 1)')
+    parser.add_argument('--all-scripts', action='store_true',
+                        help='Também mede fetch_durations.py e update_youtube_language.py')
+    parser.add_argument('--output', default=None, help='Salva os resultados em JSON')
+    parser.add_argument('--verbose', action='store_true', help='Mostra a saída dos scripts')
+    
+    args = parser.parse_args()
+    
+    print("=" * 70)
+    print("🧪 Benchmark do YouTube Uploader (API falsa local)")
+    print("=" * 70 + "\n")
+    
+    results = []
+    for spec in args.set or DEFAULT_SETS:
+        result = run_set(spec, args)
+        results.append(result)
+        print_result(result)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'options': vars(args), 'results': results}, f, indent=2)
+        print(f"💾 Resultados salvos em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
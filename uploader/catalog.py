@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Course Catalog
+Modelo em memória do course-metadata.json compartilhado pelos scripts
+
+Módulos, seções e aulas são objetos com __slots__ que guardam o dict original
+do JSON e uma referência ao pai, em vez de cópias com os campos do módulo e
+da seção achatados. Uma aula responde como um dict somente leitura: além dos
+seus campos, resolve pelo pai as chaves de contexto usadas pelos builders
+(module_title, module_folder, section_title, module_order, section_order).
+
+Índices montados uma única vez na carga:
+    - ID da aula, video ID (da youtubeUrl) e nome do arquivo
+    - aulas sem youtubeUrl (uploads pendentes) e sem duration
+
+Como os objetos apontam para os dicts do documento, o JSON volta ao disco
+exatamente como foi lido, com as alterações feitas por update().
+
+Uso:
+    python catalog.py
+    python catalog.py --metadata-file outro-curso.json
+"""
+
+import argparse
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_METADATA_FILE = 'course-metadata.json'
+
+# Formatos de URL do YouTube: youtube.com/watch?v=ID, youtu.be/ID, youtube.com/embed/ID
+VIDEO_ID_PATTERNS = [
+    re.compile(r'(?:v=|\/)([0-9A-Za-z_-]{11}).*'),
+    re.compile(r'(?:embed\/)([0-9A-Za-z_-]{11})'),
+]
+
+
+def extract_video_id(youtube_url: Optional[str]) -> Optional[str]:
+    """Extrai video ID de uma URL do YouTube"""
+    if not youtube_url:
+        return None
+    
+    for pattern in VIDEO_ID_PATTERNS:
+        match = pattern.search(youtube_url)
+        if match:
+            return match.group(1)
+    
+    return None
+
+
+class Module:
+    """Módulo do curso (dict original + seções)"""
+    
+    __slots__ = ('data', 'catalog', 'sections')
+    
+    def __init__(self, data: Dict, catalog: Optional['Catalog']):
+        self.data = data
+        # None nas aulas lidas em fluxo (metadata_stream.py)
+        self.catalog = catalog
+        self.sections: List['Section'] = []
+    
+    def lessons(self) -> Iterator['Lesson']:
+        for section in self.sections:
+            yield from section.lessons
+
+
+class Section:
+    """Seção de um módulo (dict original + aulas)"""
+    
+    __slots__ = ('data', 'module', 'lessons')
+    
+    def __init__(self, data: Dict, module: Module):
+        self.data = data
+        self.module = module
+        self.lessons: List['Lesson'] = []
+
+
+class Lesson:
+    """Aula: campos do JSON e, pelo pai, o contexto do módulo e da seção"""
+    
+    __slots__ = ('data', 'section')
+    
+    # Chave de contexto → (nível, campo do pai)
+    CONTEXT_KEYS = {
+        'module_title': ('module', 'title'),
+        'module_folder': ('module', 'folderName'),
+        'module_order': ('module', 'order'),
+        'section_title': ('section', 'title'),
+        'section_order': ('section', 'order'),
+    }
+    
+    def __init__(self, data: Dict, section: Section):
+        self.data = data
+        self.section = section
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self.data:
+            return self.data[key]
+        context = self.CONTEXT_KEYS.get(key)
+        if context is None:
+            raise KeyError(key)
+        parent = self.section if context[0] == 'section' else self.section.module
+        return parent.data[context[1]]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.data or key in self.CONTEXT_KEYS
+    
+    def __repr__(self) -> str:
+        return f"Lesson({self.data.get('id')!r})"
+    
+    @property
+    def id(self) -> str:
+        return self.data['id']
+    
+    @property
+    def module(self) -> Module:
+        return self.section.module
+    
+    @property
+    def video_id(self) -> Optional[str]:
+        return extract_video_id(self.data.get('youtubeUrl'))
+    
+    def context(self) -> Dict:
+        """Cópia da aula com os campos de contexto (para quem precisa de um dict de verdade)"""
+        return {**self.data, **{key: self[key] for key in self.CONTEXT_KEYS}}
+
+
+class Catalog:
+    """Curso em objetos com índices; document é o JSON original (lido e gravado sem perdas)"""
+    
+    def __init__(self, document: Dict):
+        self.document = document
+        self.course: Dict = document['course']
+        self.modules: List[Module] = []
+        # Dicts mantêm a ordem do curso
+        self.lessons: Dict[str, Lesson] = {}
+        # Posição de cada aula no curso (mantém os índices em ordem depois de update())
+        self._position: Dict[str, int] = {}
+        self._by_video_id: Dict[str, List[Lesson]] = {}
+        self._by_file_name: Dict[str, List[Lesson]] = {}
+        self._missing_url: Dict[str, Lesson] = {}
+        self._missing_duration: Dict[str, Lesson] = {}
+        
+        for module_data in self.course['modules']:
+            module = Module(module_data, self)
+            self.modules.append(module)
+            for section_data in module_data['sections']:
+                section = Section(section_data, module)
+                module.sections.append(section)
+                for lesson_data in section_data['lessons']:
+                    lesson = Lesson(lesson_data, section)
+                    section.lessons.append(lesson)
+                    self._position[lesson.id] = len(self.lessons)
+                    self.lessons[lesson.id] = lesson
+                    self._index(lesson)
+    
+    @classmethod
+    def load(cls, metadata_file: str) -> 'Catalog':
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+    
+    @staticmethod
+    def _keys(data: Dict) -> Tuple[Optional[str], Optional[str], bool, bool]:
+        """Chaves da aula nos índices: (video ID, arquivo, sem youtubeUrl, sem duration)"""
+        return (extract_video_id(data.get('youtubeUrl')), data.get('fileName') or None,
+                not data.get('youtubeUrl'), not data.get('duration'))
+    
+    def _index(self, lesson: Lesson):
+        """Inclui a aula nos índices (na carga, em que as aulas chegam na ordem do curso)"""
+        video_id, file_name, missing_url, missing_duration = self._keys(lesson.data)
+        if video_id:
+            self._by_video_id.setdefault(video_id, []).append(lesson)
+        if file_name:
+            self._by_file_name.setdefault(file_name, []).append(lesson)
+        if missing_url:
+            self._missing_url[lesson.id] = lesson
+        if missing_duration:
+            self._missing_duration[lesson.id] = lesson
+    
+    def _insert_ordered(self, lessons: List[Lesson], lesson: Lesson):
+        position = self._position[lesson.id]
+        index = len(lessons)
+        while index and self._position[lessons[index - 1].id] > position:
+            index -= 1
+        lessons.insert(index, lesson)
+    
+    def _add_pending(self, pending: Dict[str, Lesson], lesson: Lesson):
+        """Inclui a aula em _missing_url/_missing_duration sem tirar o dict da ordem do curso"""
+        last = next(reversed(pending.values()), None) if pending else None
+        if last is None or self._position[last.id] < self._position[lesson.id]:
+            pending[lesson.id] = lesson
+            return
+        ordered = sorted([*pending.values(), lesson], key=lambda item: self._position[item.id])
+        pending.clear()
+        pending.update((item.id, item) for item in ordered)
+    
+    def update(self, lesson_id: str, **fields) -> Optional[Lesson]:
+        """
+        Altera campos de uma aula no documento e atualiza os índices (None se não existir)
+        Só os índices cuja chave mudou são tocados, e continuam na ordem do curso
+        """
+        lesson = self.lessons.get(lesson_id)
+        if lesson is None:
+            return None
+        old = self._keys(lesson.data)
+        lesson.data.update(fields)
+        new = self._keys(lesson.data)
+        
+        for groups, old_key, new_key in ((self._by_video_id, old[0], new[0]),
+                                         (self._by_file_name, old[1], new[1])):
+            if old_key == new_key:
+                continue
+            if old_key:
+                groups[old_key].remove(lesson)
+                if not groups[old_key]:
+                    del groups[old_key]
+            if new_key:
+                self._insert_ordered(groups.setdefault(new_key, []), lesson)
+        
+        for pending, was, now in ((self._missing_url, old[2], new[2]),
+                                  (self._missing_duration, old[3], new[3])):
+            if was and not now:
+                del pending[lesson_id]
+            elif now and not was:
+                self._add_pending(pending, lesson)
+        return lesson
+    
+    def lesson(self, lesson_id: str) -> Optional[Lesson]:
+        return self.lessons.get(lesson_id)
+    
+    def by_video_id(self, video_id: str) -> List[Lesson]:
+        """Aulas com o vídeo (o mesmo vídeo pode estar em mais de uma aula)"""
+        return list(self._by_video_id.get(video_id, ()))
+    
+    def by_file_name(self, file_name: str) -> List[Lesson]:
+        return list(self._by_file_name.get(file_name, ()))
+    
+    def __iter__(self) -> Iterator[Lesson]:
+        """Todas as aulas, na ordem do curso"""
+        return iter(tuple(self.lessons.values()))
+    
+    def __len__(self) -> int:
+        return len(self.lessons)
+    
+    def published(self) -> Iterator[Lesson]:
+        """Aulas com youtubeUrl (video_id é None se a URL for inválida), na ordem do curso"""
+        for lesson in self:
+            if lesson.id not in self._missing_url:
+                yield lesson
+    
+    def pending_uploads(self) -> Iterator[Lesson]:
+        """Aulas sem youtubeUrl, na ordem do curso (sob demanda: pode parar no meio)"""
+        # Cópia das referências: update() durante a iteração não invalida o iterador
+        for lesson in tuple(self._missing_url.values()):
+            if lesson.id in self._missing_url:
+                yield lesson
+    
+    def missing_durations(self, published_only: bool = True) -> Iterator[Lesson]:
+        """Aulas sem duration (por padrão só as que já têm vídeo), na ordem do curso"""
+        for lesson in tuple(self._missing_duration.values()):
+            if lesson.id in self._missing_duration and not (published_only and lesson.id in self._missing_url):
+                yield lesson
+    
+    def pending_upload_count(self) -> int:
+        return len(self._missing_url)
+    
+    def missing_duration_count(self, published_only: bool = True) -> int:
+        if not published_only:
+            return len(self._missing_duration)
+        return sum(1 for lesson_id in self._missing_duration if lesson_id not in self._missing_url)
+    
+    def shared_video_ids(self) -> List[str]:
+        """Vídeos usados em mais de uma aula"""
+        return [video_id for video_id, lessons in self._by_video_id.items() if len(lessons) > 1]
+    
+    def to_json(self) -> str:
+        """Documento serializado como o write_json_atomic grava"""
+        return json.dumps(self.document, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resumo do catálogo do curso (aulas, vídeos e pendências)')
+    
+    parser.add_argument(
+        '--metadata-file',
+        default=DEFAULT_METADATA_FILE,
+        help=f'Arquivo JSON com metadados do curso (padrão: {DEFAULT_METADATA_FILE})'
+    )
+    
+    args = parser.parse_args()
+    
+    catalog = Catalog.load(args.metadata_file)
+    print(f"📚 {catalog.course['title']}: {len(catalog.modules)} módulos, {len(catalog)} aulas")
+    print(f"📤 Sem youtubeUrl: {catalog.pending_upload_count()}")
+    print(f"⏱️  Com vídeo e sem duração: {catalog.missing_duration_count()}")
+    shared = catalog.shared_video_ids()
+    if shared:
+        print(f"♻️  Vídeos usados em mais de uma aula: {len(shared)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Channel Mirror
+Espelho local (SQLite) de todos os vídeos enviados ao canal
+
+Uma única visão do que existe no canal: ID, título, idioma do snippet,
+duração, situação do processamento (uploadStatus), privacidade e ETag de
+cada vídeo. Os scripts consultam o espelho antes de ir à API:
+    - fetch_durations.py e youtube_uploader.py usam a duração de vídeos já processados
+    - update_youtube_language.py pula vídeos que já estão com o idioma certo
+    - youtube_uploader.py registra cada vídeo novo (atualizado no próximo sync)
+
+O sync percorre a playlist de uploads do canal em páginas de 50
+(playlistItems.list) e busca os vídeos novos ou alterados de cada página em
+uma chamada videos.list. Os uploads vêm do mais recente para o mais antigo,
+então o sync incremental para na primeira página sem nenhuma alteração; os
+vídeos que ainda estavam em processamento são sempre consultados de novo.
+Com --full percorre o canal inteiro e remove do espelho os vídeos que não
+existem mais.
+
+Uso:
+    python channel_mirror.py --sync          # sync incremental
+    python channel_mirror.py --sync --full   # canal inteiro
+    python channel_mirror.py                 # resumo do espelho
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from quota_ledger import QuotaLedger, UNIT_COSTS, DEFAULT_DAILY_QUOTA
+from telemetry import Telemetry
+
+
+DEFAULT_MIRROR_FILE = 'channel_mirror.db'
+BUSY_TIMEOUT_MS = 30000
+PAGE_SIZE = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id               TEXT PRIMARY KEY,
+    title                  TEXT,
+    default_language       TEXT,
+    default_audio_language TEXT,
+    duration               INTEGER,
+    upload_status          TEXT,
+    privacy_status         TEXT,
+    published_at           TEXT,
+    etag                   TEXT,
+    item_etag              TEXT,
+    synced_at              REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS videos_by_status ON videos (upload_status);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+COLUMNS = ('video_id', 'title', 'default_language', 'default_audio_language', 'duration',
+           'upload_status', 'privacy_status', 'published_at', 'etag', 'item_etag', 'synced_at')
+
+
+def _parse_duration(iso_duration: str) -> int:
+    """Converte duração ISO 8601 (ex: PT15M33S) para segundos"""
+    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', iso_duration or '')
+    if not match:
+        return 0
+    return int(match.group(1) or 0) * 3600 + int(match.group(2) or 0) * 60 + int(match.group(3) or 0)
+
+
+def open_mirror(db_file: str = DEFAULT_MIRROR_FILE) -> Optional['ChannelMirror']:
+    """Espelho existente, ou None se o sync nunca foi executado (os scripts vão direto à API)"""
+    return ChannelMirror(db_file) if os.path.exists(db_file) else None
+
+
+class ChannelMirror:
+    """Vídeos do canal em SQLite"""
+    
+    def __init__(self, db_file: str = DEFAULT_MIRROR_FILE):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Conexão compartilhada entre as threads (acesso serializado por self._lock)"""
+        if self._db is None:
+            db = sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT_MS / 1000,
+                                 isolation_level=None, check_same_thread=False)
+            db.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = NORMAL')
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+    
+    @contextmanager
+    def _transaction(self):
+        """Transação de escrita (BEGIN IMMEDIATE: pega o lock de escrita já no início)"""
+        with self._lock:
+            db = self._conn()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn().execute(sql, params).fetchall()
+    
+    def close(self):
+        """Fecha a conexão (a próxima operação reabre)"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+    
+    def get_state(self, key: str) -> Optional[str]:
+        rows = self._query("SELECT value FROM sync_state WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+    
+    def set_state(self, key: str, value: str):
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+    
+    def videos(self, video_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Vídeos do espelho por ID (os que não estão no espelho ficam de fora)"""
+        video_ids = list(video_ids)
+        found = {}
+        # Limite de parâmetros do SQLite por consulta
+        for start in range(0, len(video_ids), 500):
+            chunk = video_ids[start:start + 500]
+            rows = self._query(
+                f"SELECT {', '.join(COLUMNS)} FROM videos WHERE video_id IN ({', '.join('?' * len(chunk))})",
+                tuple(chunk)
+            )
+            for row in rows:
+                found[row[0]] = dict(zip(COLUMNS, row))
+        return found
+    
+    def video(self, video_id: str) -> Optional[Dict]:
+        return self.videos([video_id]).get(video_id)
+    
+    def processed_duration(self, video_id: str) -> Optional[int]:
+        """Duração de um vídeo já processado (None se não está no espelho ou ainda processa)"""
+        video = self.video(video_id)
+        if video and video['upload_status'] == 'processed' and video['duration']:
+            return video['duration']
+        return None
+    
+    def upsert(self, items: List[Dict], item_etags: Optional[Dict[str, str]] = None):
+        """Grava os itens de um videos.list (com o ETag do item da playlist, se veio do sync)"""
+        item_etags = item_etags or {}
+        now = time.time()
+        with self._transaction() as db:
+            for item in items:
+                snippet = item.get('snippet', {})
+                status = item.get('status', {})
+                db.execute(
+                    "INSERT INTO videos (video_id, title, default_language, default_audio_language, duration, "
+                    "upload_status, privacy_status, published_at, etag, item_etag, synced_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (video_id) DO UPDATE SET "
+                    "title = excluded.title, default_language = excluded.default_language, "
+                    "default_audio_language = excluded.default_audio_language, duration = excluded.duration, "
+                    "upload_status = excluded.upload_status, privacy_status = excluded.privacy_status, "
+                    "published_at = excluded.published_at, etag = excluded.etag, "
+                    "item_etag = COALESCE(excluded.item_etag, videos.item_etag), synced_at = excluded.synced_at",
+                    (item['id'], snippet.get('title'), snippet.get('defaultLanguage'),
+                     snippet.get('defaultAudioLanguage'),
+                     _parse_duration(item.get('contentDetails', {}).get('duration')) or None,
+                     status.get('uploadStatus'), status.get('privacyStatus'), snippet.get('publishedAt'),
+                     item.get('etag'), item_etags.get(item['id']), now)
+                )
+    
+    def record_upload(self, video_id: str, title: str):
+        """Vídeo recém-enviado: entra como 'uploaded' (em processamento) até o próximo sync"""
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO videos (video_id, title, upload_status, synced_at) VALUES (?, ?, 'uploaded', ?) "
+                "ON CONFLICT (video_id) DO NOTHING",
+                (video_id, title, time.time())
+            )
+    
+    def set_language(self, video_id: str, language: str):
+        """Registra um videos.update de idioma feito por nós"""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE videos SET default_language = ?, default_audio_language = ?, etag = NULL, synced_at = ? "
+                "WHERE video_id = ?",
+                (language, language, time.time(), video_id)
+            )
+    
+    def record_snippet(self, video_id: str, snippet: Dict):
+        """Registra um videos.update de snippet feito por nós (título e idioma)"""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE videos SET title = ?, default_language = ?, default_audio_language = ?, etag = NULL, "
+                "synced_at = ? WHERE video_id = ?",
+                (snippet.get('title'), snippet.get('defaultLanguage'), snippet.get('defaultAudioLanguage'),
+                 time.time(), video_id)
+            )
+    
+    def remove_except(self, video_ids: Iterable[str]) -> int:
+        """Remove os vídeos que não estão em video_ids (sync completo); retorna quantos"""
+        keep = set(video_ids)
+        stale = [row[0] for row in self._query("SELECT video_id FROM videos") if row[0] not in keep]
+        with self._transaction() as db:
+            db.executemany("DELETE FROM videos WHERE video_id = ?", [(video_id,) for video_id in stale])
+        return len(stale)
+    
+    def unprocessed_ids(self) -> List[str]:
+        """Vídeos ainda em processamento (ou só registrados pelo uploader)"""
+        rows = self._query(
+            "SELECT video_id FROM videos WHERE upload_status IS NULL OR upload_status = 'uploaded'"
+        )
+        return [row[0] for row in rows]
+    
+    def summary(self) -> Dict:
+        """Totais do espelho"""
+        by_status = dict(self._query(
+            "SELECT COALESCE(upload_status, '?'), COUNT(*) FROM videos GROUP BY upload_status"
+        ))
+        totals = self._query("SELECT COUNT(*), COALESCE(SUM(duration), 0) FROM videos")[0]
+        by_language = dict(self._query(
+            "SELECT COALESCE(default_language, '-'), COUNT(*) FROM videos GROUP BY default_language"
+        ))
+        return {
+            'videos': totals[0],
+            'durationSeconds': totals[1],
+            'byStatus': by_status,
+            'byLanguage': by_language,
+            'lastSync': self.get_state('last_sync')
+        }
+
+
+class ChannelSync:
+    """Atualiza o espelho a partir da playlist de uploads do canal"""
+    
+    def __init__(self, mirror: ChannelMirror, youtube, quota: QuotaLedger, telemetry: Telemetry):
+        self.mirror = mirror
+        self.youtube = youtube
+        self.quota = quota
+        self.telemetry = telemetry
+        self.calls = 0
+    
+    def _execute(self, method: str, request) -> Dict:
+        self.quota.charge(method)
+        self.calls += 1
+        return self.telemetry.execute(method, request)
+    
+    def _uploads_playlist(self) -> str:
+        """ID da playlist de uploads do canal (guardado no espelho)"""
+        playlist_id = self.mirror.get_state('uploads_playlist')
+        if playlist_id:
+            return playlist_id
+        
+        response = self._execute('channels.list', self.youtube.channels().list(
+            part='contentDetails', mine=True, fields=CHANNEL_FIELDS
+        ))
+        if not response.get('items'):
+            raise RuntimeError("Nenhum canal encontrado para esta conta")
+        playlist_id = response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+        self.mirror.set_state('uploads_playlist', playlist_id)
+        return playlist_id
+    
+    def _fetch_videos(self, video_ids: List[str], item_etags: Optional[Dict[str, str]] = None) -> int:
+        """Busca até 50 vídeos em um videos.list e grava no espelho; retorna quantos vieram"""
+        if not video_ids:
+            return 0
+        response = self._execute('videos.list', self.youtube.videos().list(
+            part='snippet,contentDetails,status', id=','.join(video_ids), maxResults=PAGE_SIZE,
+            fields=MIRROR_FIELDS
+        ))
+        items = response.get('items', [])
+        self.mirror.upsert(items, item_etags)
+        return len(items)
+    
+    def _can_afford(self) -> bool:
+        cost = UNIT_COSTS['playlistItems.list'] + UNIT_COSTS['videos.list']
+        if self.quota.affordable(cost) <= 0:
+            print(f"🛑 Quota insuficiente para continuar o sync (restam {self.quota.remaining()} unidades)")
+            return False
+        return True
+    
+    def sync(self, full: bool = False) -> Dict:
+        """
+        Percorre a playlist de uploads; sem full, para na primeira página sem alterações
+        Retorna {'pages', 'fetched', 'removed', 'complete'}
+        """
+        playlist_id = self._uploads_playlist()
+        pages = fetched = removed = 0
+        seen: List[str] = []
+        page_token = None
+        complete = False
+        
+        while self._can_afford():
+            response = self._execute('playlistItems.list', self.youtube.playlistItems().list(
+                part='snippet', playlistId=playlist_id, maxResults=PAGE_SIZE,
+                pageToken=page_token, fields=PLAYLIST_FIELDS
+            ))
+            pages += 1
+            item_etags = {
+                item['snippet']['resourceId']['videoId']: item['etag']
+                for item in response.get('items', [])
+            }
+            seen += item_etags
+            
+            # Novos, com o item da playlist alterado ou ainda em processamento
+            known = self.mirror.videos(item_etags)
+            changed = [
+                video_id for video_id, etag in item_etags.items()
+                if video_id not in known or known[video_id]['item_etag'] != etag
+                or known[video_id]['upload_status'] in (None, 'uploaded')
+            ]
+            fetched += self._fetch_videos(changed, item_etags)
+            print(f"📄 Página {pages}: {len(item_etags)} vídeos, {len(changed)} novos ou alterados")
+            
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                complete = True
+                break
+            if not changed and not full:
+                break
+        
+        # Vídeos em processamento em páginas que o sync incremental não percorreu
+        pending = [video_id for video_id in self.mirror.unprocessed_ids() if video_id not in set(seen)]
+        for start in range(0, len(pending), PAGE_SIZE):
+            if not self._can_afford():
+                break
+            fetched += self._fetch_videos(pending[start:start + PAGE_SIZE])
+        
+        # Só um percurso completo sabe quais vídeos deixaram de existir
+        if full and complete:
+            removed = self.mirror.remove_except(seen)
+        
+        self.mirror.set_state('last_sync', time.strftime('%Y-%m-%d %H:%M:%S'))
+        return {'pages': pages, 'fetched': fetched, 'removed': removed, 'complete': complete}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Espelho local (SQLite) dos vídeos do canal',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  # Sync incremental (para na primeira página sem alterações)
+  python channel_mirror.py --sync
+  
+  # Canal inteiro, removendo vídeos que não existem mais
+  python channel_mirror.py --sync --full
+  
+  # Resumo do espelho (sem chamar a API)
+  python channel_mirror.py
+        """
+    )
+    
+    parser.add_argument(
+        '--mirror-file',
+        default=DEFAULT_MIRROR_FILE,
+        help=f'Banco SQLite do espelho (padrão: {DEFAULT_MIRROR_FILE})'
+    )
+    
+    parser.add_argument(
+        '--sync',
+        action='store_true',
+        help='Atualiza o espelho a partir da playlist de uploads do canal'
+    )
+    
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Com --sync: percorre o canal inteiro em vez de parar na primeira página sem alterações'
+    )
+    
+    parser.add_argument(
+        '--credentials',
+        default=CREDENTIALS_FILE,
+        help=f'Arquivo de credenciais OAuth 2.0 (padrão: {CREDENTIALS_FILE})'
+    )
+    
+    parser.add_argument(
+        '--daily-quota',
+        type=int,
+        default=DEFAULT_DAILY_QUOTA,
+        help=f'Quota diária da API do projeto, compartilhada entre os scripts (padrão: {DEFAULT_DAILY_QUOTA})'
+    )
+    
+    parser.add_argument(
+        '--events-file',
+        default=None,
+        help='Grava eventos estruturados (JSONL): chamadas à API e erros de quota'
+    )
+    
+    args = parser.parse_args()
+    
+    mirror = ChannelMirror(args.mirror_file)
+    try:
+        if args.sync:
+            telemetry = Telemetry('channel_mirror', args.events_file)
+            try:
+                youtube = connect(args.credentials, [READONLY_SCOPE]).client()
+                syncer = ChannelSync(mirror, youtube, QuotaLedger('channel_mirror', args.daily_quota), telemetry)
+                result = syncer.sync(full=args.full)
+            finally:
+                telemetry.close()
+            
+            print(f"\n🔄 Sync {'completo' if args.full else 'incremental'}: {result['pages']} páginas, "
+                  f"{result['fetched']} vídeos atualizados, {result['removed']} removidos "
+                  f"({syncer.calls} chamadas à API)\n")
+        
+        data = mirror.summary()
+        print(f"📺 {args.mirror_file}: {data['videos']} vídeos, "
+              f"{data['durationSeconds'] // 3600}h{data['durationSeconds'] % 3600 // 60:02d}m")
+        print(f"🕒 Último sync: {data['lastSync'] or 'nunca'}")
+        for status, count in sorted(data['byStatus'].items()):
+            print(f"   • {status}: {count}")
+        for language, count in sorted(data['byLanguage'].items()):
+            print(f"   • idioma {language}: {count}")
+    finally:
+        mirror.close()
+
+
+try:
+    from youtube_client import (
+        connect, CREDENTIALS_FILE, READONLY_SCOPE, CHANNEL_FIELDS, PLAYLIST_FIELDS, MIRROR_FIELDS
+    )
+except ImportError:
+    print("❌ Erro: Bibliotecas do Google API não encontradas.")
+    print("   Instale com: pip install google-api-python-client google-auth-oauthlib")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Adaptive Chunk Sizer
+Ajusta o tamanho dos chunks do upload resumable conforme a vazão medida
+
+Em links rápidos, chunks pequenos desperdiçam tempo com a ida e volta de
+cada requisição; em links lentos/instáveis, chunks grandes custam caro
+quando precisam ser reenviados. O sizer mede o tempo de cada next_chunk()
+e escolhe o tamanho que mantém cada chunk próximo da duração alvo.
+"""
+
+from typing import List, Optional, Tuple
+
+
+# O YouTube exige chunks múltiplos de 256 KB (exceto o último)
+CHUNK_GRANULARITY = 256 * 1024
+MB = 1024 * 1024
+
+DEFAULT_CHUNK_SIZE = 10 * MB
+DEFAULT_MIN_CHUNK_SIZE = 1 * MB
+DEFAULT_MAX_CHUNK_SIZE = 128 * MB
+DEFAULT_TARGET_CHUNK_SECONDS = 8.0
+
+# Variação máxima por ajuste (evita oscilações com uma medição ruim)
+MAX_GROWTH_FACTOR = 2.0
+MAX_SHRINK_FACTOR = 0.5
+
+
+def round_chunk_size(size: float) -> int:
+    """Arredonda para um múltiplo de 256 KB (mínimo de um bloco)"""
+    return max(CHUNK_GRANULARITY, int(size // CHUNK_GRANULARITY) * CHUNK_GRANULARITY)
+
+
+def set_chunk_size(media, size: int) -> bool:
+    """
+    Troca o tamanho de chunk de um MediaFileUpload no meio do upload
+    O googleapiclient não tem setter: isto depende de HttpRequest.next_chunk()
+    ler media.chunksize() (que retorna o atributo privado _chunksize) a cada
+    chamada. Se o atributo sumir em outra versão, retorna False e o upload
+    segue com o tamanho inicial
+    """
+    if not hasattr(media, '_chunksize'):
+        return False
+    media._chunksize = size
+    return True
+
+
+class AdaptiveChunkSizer:
+    """Calcula o próximo tamanho de chunk a partir da vazão do chunk anterior"""
+    
+    def __init__(self, initial_size: int = DEFAULT_CHUNK_SIZE,
+                 min_size: int = DEFAULT_MIN_CHUNK_SIZE,
+                 max_size: int = DEFAULT_MAX_CHUNK_SIZE,
+                 target_seconds: float = DEFAULT_TARGET_CHUNK_SECONDS):
+        self.min_size = round_chunk_size(min_size)
+        self.max_size = max(self.min_size, round_chunk_size(max_size))
+        self.target_seconds = target_seconds
+        self.size = self._clamp(initial_size)
+        # Histórico (tamanho do chunk, MB/s) de cada chunk medido
+        self.history: List[Tuple[int, float]] = []
+        self.total_bytes = 0
+        self.total_seconds = 0.0
+    
+    def _clamp(self, size: float) -> int:
+        return round_chunk_size(min(self.max_size, max(self.min_size, size)))
+    
+    def observe(self, bytes_sent: int, seconds: float) -> Optional[int]:
+        """
+        Registra um chunk enviado e recalcula o tamanho
+        Retorna o novo tamanho se ele mudou, ou None
+        """
+        if bytes_sent <= 0 or seconds <= 0:
+            return None
+        
+        throughput = bytes_sent / seconds
+        self.history.append((bytes_sent, throughput / MB))
+        self.total_bytes += bytes_sent
+        self.total_seconds += seconds
+        
+        # Tamanho que levaria target_seconds com a vazão medida,
+        # limitado a dobrar/reduzir pela metade a cada passo
+        wanted = throughput * self.target_seconds
+        wanted = min(wanted, self.size * MAX_GROWTH_FACTOR)
+        wanted = max(wanted, self.size * MAX_SHRINK_FACTOR)
+        
+        new_size = self._clamp(wanted)
+        if new_size == self.size:
+            return None
+        
+        self.size = new_size
+        return new_size
+    
+    @property
+    def average_throughput(self) -> float:
+        """Vazão média em MB/s de todos os chunks medidos"""
+        if self.total_seconds <= 0:
+            return 0.0
+        return self.total_bytes / self.total_seconds / MB
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Course Batch
+Modo multi-curso do youtube_uploader.py (--courses)
+
+Recebe vários course-metadata.json (diretório ou glob), junta as aulas
+pendentes de todos em uma fila única e envia tudo com um só processo:
+um login, um cliente da API, uma quota, as mesmas vagas do canal e um só
+banco de estado (upload_state.db, separado por curso). Cada resultado é
+gravado no JSON do próprio curso.
+
+A fila intercala os cursos pelo peso (--course-weight ID=PESO, padrão 1):
+um curso de peso 2 recebe duas aulas para cada uma de um curso de peso 1,
+sempre mantendo a ordem das aulas dentro de cada curso.
+
+Os vídeos de cada curso ficam em <videos-dir>/<id-do-curso> se esse
+diretório existir; senão, no próprio --videos-dir.
+"""
+
+import glob
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from youtube_uploader import YouTubeUploader, INDEX_FILE, PROGRESS_FILE, SESSIONS_FILE
+
+
+def resolve_metadata_files(specs: List[str]) -> List[str]:
+    """Arquivos de metadados de curso a partir de diretórios, globs ou caminhos"""
+    candidates = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            candidates += sorted(glob.glob(os.path.join(spec, '*.json')))
+        else:
+            candidates += sorted(glob.glob(spec)) or [spec]
+    
+    files = []
+    seen = set()
+    for path in candidates:
+        key = os.path.realpath(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        # Em diretórios, ignora JSON que não são de curso (índices, ledger...)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignorando {path}: {e}")
+            continue
+        if isinstance(data, dict) and isinstance(data.get('course'), dict):
+            files.append(path)
+    return files
+
+
+def parse_weights(specs: Optional[List[str]]) -> Dict[str, float]:
+    """Interpreta 'ID=PESO' (ex: python-basico=2)"""
+    weights = {}
+    for spec in specs or []:
+        try:
+            course_id, weight = spec.rsplit('=', 1)
+            weights[course_id.strip()] = float(weight)
+        except ValueError:
+            raise ValueError(f"Peso inválido: '{spec}' (use ID=PESO)")
+        if weights[course_id.strip()] <= 0:
+            raise ValueError(f"Peso inválido: '{spec}' (o peso deve ser maior que zero)")
+    return weights
+
+
+def interleave(queues: List[Tuple[float, List]]) -> List:
+    """
+    Intercala as filas proporcionalmente aos pesos: o k-ésimo item de uma
+    fila de peso w entra na posição k/w (empates seguem a ordem das filas)
+    """
+    keyed = []
+    for index, (weight, items) in enumerate(queues):
+        for position, item in enumerate(items, 1):
+            keyed.append((position / weight, index, position, item))
+    keyed.sort(key=lambda entry: entry[:3])
+    return [entry[3] for entry in keyed]
+
+
+class CourseBatchUploader(YouTubeUploader):
+    """Envia as aulas de vários cursos em uma fila única"""
+    
+    def __init__(self, videos_dir: str, metadata_files: List[str], weights: Optional[Dict[str, float]] = None,
+                 **kwargs):
+        super().__init__(videos_dir, metadata_file=metadata_files[0], **kwargs)
+        self.metadata_files = metadata_files
+        self.weights = weights or {}
+        self.courses: List[YouTubeUploader] = []
+    
+    def load_metadata(self):
+        """Carrega os metadados de todos os cursos"""
+        legacy = [f for f in (PROGRESS_FILE, SESSIONS_FILE) if os.path.exists(f)]
+        if legacy:
+            print(f"⚠️  {', '.join(legacy)} não importado(s): com --courses não há como saber de qual curso são.")
+            print("   Rode uma vez com --metadata-file do curso para importá-los\n")
+        
+        self.courses = []
+        for metadata_file in self.metadata_files:
+            course = self.for_course(metadata_file)
+            course.load_metadata()
+            
+            course_id = course.state.course_id
+            course_dir = self.videos_dir / course_id
+            if course_dir.is_dir():
+                course.videos_dir = course_dir
+                course.index_file = f"{Path(INDEX_FILE).stem}.{course_id}.json"
+            self.courses.append(course)
+        
+        unknown = set(self.weights) - {course.state.course_id for course in self.courses}
+        if unknown:
+            print(f"⚠️  Pesos de cursos não encontrados: {', '.join(sorted(unknown))}\n")
+    
+    def _upload_batch(self, max_uploads: Optional[int], delay: int, workers: int) -> int:
+        """Junta as aulas pendentes de todos os cursos em uma fila e envia"""
+        self._stop_event.clear()
+        self._abort_event.clear()
+        retries_before = self.telemetry.retry_totals()
+        
+        queues = []
+        fail_count = 0
+        cost = 0
+        for course in self.courses:
+            print(f"📚 {course.state.course_id}")
+            pending, failures = course._prepare_pending(max_uploads)
+            fail_count += failures
+            if pending:
+                cost = max(cost, course._upload_cost(pending))
+                weight = self.weights.get(course.state.course_id, 1.0)
+                queues.append((weight, [(course, lesson) for lesson in pending]))
+        
+        jobs = interleave(queues)
+        if max_uploads:
+            jobs = jobs[:max_uploads]
+        if not jobs:
+            return 0
+        
+        print(f"🗂️  Fila única: {len(jobs)} aulas de {len(queues)} cursos")
+        for course in self.courses:
+            queued = sum(1 for uploader, _ in jobs if uploader is course)
+            if queued:
+                print(f"   • {course.state.course_id} (peso {self.weights.get(course.state.course_id, 1.0):g}): {queued}")
+        print()
+        
+        allowed = self.quota.plan(len(jobs), cost)
+        if allowed <= 0:
+            return 0
+        jobs = jobs[:allowed]
+        
+        success_count, failures = self._run_jobs(jobs, delay, workers)
+        self._print_summary(success_count, fail_count + failures, retries_before)
+        
+        return success_count
+    
+    def _close_metadata(self):
+        for course in self.courses:
+            course.metadata_store.close()
+    
+    def _uploaded_total(self) -> int:
+        return sum(course.state.uploaded_count() for course in self.courses)
+    
+    def _pending_total(self) -> int:
+        return sum(len(course.get_pending_lessons()) for course in self.courses)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Duration Rollups
+Totais de duração por seção, módulo e curso, gravados no próprio course-metadata.json
+
+Cada seção, módulo e o curso recebem um campo durationStats:
+    totalSeconds   - soma das durações
+    lessons        - aulas
+    withDuration   - aulas com duração
+    averageSeconds - média das aulas com duração (0 se nenhuma)
+    medianSeconds  - mediana das aulas com duração (0 se nenhuma)
+
+Assim o app web e o sync-from-json.mjs leem os agregados prontos em vez de
+percorrer todas as aulas. A atualização é incremental: só são recalculadas
+as seções com aulas alteradas (ou cujos totais não batem mais com as aulas,
+ex: duração gravada pelo youtube_uploader.py) e os módulos e o curso acima delas.
+
+Uso:
+    python duration_rollups.py
+    python duration_rollups.py --metadata-file outro-curso.json
+"""
+
+import argparse
+import statistics
+from typing import Dict, Iterable, List, Optional, Set
+
+
+ROLLUP_KEY = 'durationStats'
+DEFAULT_METADATA_FILE = 'course-metadata.json'
+
+
+def rollup(durations: List[int], lessons: int) -> Dict:
+    """Agregados de uma lista de durações (apenas as aulas com duração)"""
+    total = sum(durations)
+    return {
+        'totalSeconds': total,
+        'lessons': lessons,
+        'withDuration': len(durations),
+        'averageSeconds': round(total / len(durations)) if durations else 0,
+        'medianSeconds': round(statistics.median(durations)) if durations else 0
+    }
+
+
+def _durations(lessons: Iterable[Dict]) -> List[int]:
+    return [lesson['duration'] for lesson in lessons if lesson.get('duration')]
+
+
+def _stale(node: Dict, lessons: List[Dict]) -> bool:
+    """Os totais gravados não batem com as aulas (ou ainda não existem)"""
+    stats = node.get(ROLLUP_KEY)
+    if not stats:
+        return True
+    durations = _durations(lessons)
+    return (stats.get('lessons') != len(lessons) or stats.get('withDuration') != len(durations)
+            or stats.get('totalSeconds') != sum(durations))
+
+
+def update_rollups(course: Dict, changed_ids: Optional[Set[str]] = None) -> int:
+    """
+    Recalcula os agregados das seções com aulas em changed_ids (ou desatualizadas)
+    e dos módulos e do curso acima delas
+    Retorna quantos nós (seções, módulos, curso) foram atualizados
+    """
+    changed_ids = changed_ids or set()
+    updated = 0
+    course_dirty = ROLLUP_KEY not in course
+    
+    for module in course['modules']:
+        module_dirty = ROLLUP_KEY not in module
+        for section in module['sections']:
+            lessons = section['lessons']
+            if any(lesson['id'] in changed_ids for lesson in lessons) or _stale(section, lessons):
+                stats = rollup(_durations(lessons), len(lessons))
+                if stats != section.get(ROLLUP_KEY):
+                    section[ROLLUP_KEY] = stats
+                    updated += 1
+                    module_dirty = True
+        
+        if module_dirty:
+            lessons = [lesson for section in module['sections'] for lesson in section['lessons']]
+            stats = rollup(_durations(lessons), len(lessons))
+            if stats != module.get(ROLLUP_KEY):
+                module[ROLLUP_KEY] = stats
+                updated += 1
+                course_dirty = True
+    
+    if course_dirty:
+        lessons = [lesson for module in course['modules'] for section in module['sections']
+                   for lesson in section['lessons']]
+        stats = rollup(_durations(lessons), len(lessons))
+        if stats != course.get(ROLLUP_KEY):
+            course[ROLLUP_KEY] = stats
+            updated += 1
+    
+    return updated
+
+
+def main():
+    # metadata_stream importa este módulo (totais recalculados durante o patch)
+    from metadata_stream import patch_metadata
+    
+    parser = argparse.ArgumentParser(description='Recalcula os totais de duração gravados no course-metadata.json')
+    
+    parser.add_argument(
+        '--metadata-file',
+        default=DEFAULT_METADATA_FILE,
+        help=f'Arquivo JSON com metadados do curso (padrão: {DEFAULT_METADATA_FILE})'
+    )
+    
+    args = parser.parse_args()
+    
+    # Uma passada pelo arquivo, sem carregá-lo inteiro: só os totais que mudaram são regravados
+    result = patch_metadata(args.metadata_file)
+    updated = result['rollups']
+    
+    stats = result['course']
+    print(f"⏱️  {stats['withDuration']}/{stats['lessons']} aulas com duração, "
+          f"total {stats['totalSeconds'] // 3600}h{stats['totalSeconds'] % 3600 // 60:02d}m")
+    print(f"💾 {updated} totais atualizados" if updated else "✅ Totais já estavam atualizados")
+
+
+if __name__ == '__main__':
+    main()
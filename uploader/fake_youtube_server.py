@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Fake YouTube Server
+Servidor local que imita a YouTube Data API v3 para testes e benchmarks
+
+Implementa o protocolo de upload resumable (POST inicia a sessão, PUT envia
+chunks com Content-Range e recebe 308 + Range, PUT com "bytes */total"
+consulta o estado) e os métodos videos.list (com ETag e 304 para
+If-None-Match), videos.update, channels.list e playlistItems.list (playlist
+de uploads, do vídeo mais recente para o mais antigo). Latência, banda, taxa de erros 5xx e
+uploadLimitExceeded são configuráveis, e o servidor registra estatísticas
+das chamadas recebidas.
+
+Os clientes usam o documento de discovery estático do googleapiclient com
+o rootUrl apontando para o servidor (build_fake_client).
+
+Uso:
+    python fake_youtube_server.py --port 8765 --latency 0.05 --bandwidth 20 --error-rate 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+UPLOAD_PATH = '/upload/youtube/v3/videos'
+VIDEOS_PATH = '/youtube/v3/videos'
+CHANNELS_PATH = '/youtube/v3/channels'
+PLAYLIST_ITEMS_PATH = '/youtube/v3/playlistItems'
+UPLOADS_PLAYLIST_ID = 'UUfakeUploads'
+READ_BLOCK = 64 * 1024
+# Duração fictícia dos vídeos: 1 segundo para cada 100 KB enviados
+BYTES_PER_SECOND_OF_VIDEO = 100 * 1024
+
+
+def build_fake_client(root_url: str):
+    """Cliente da API (discovery estático) apontando para o servidor falso"""
+    from google.auth.credentials import AnonymousCredentials
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+    
+    document = json.loads(get_static_doc('youtube', 'v3'))
+    document['rootUrl'] = root_url.rstrip('/') + '/'
+    document['baseUrl'] = document['rootUrl'] + document['servicePath']
+    return build_from_document(document, credentials=AnonymousCredentials())
+
+
+def _error_body(code: int, reason: str, message: str) -> Dict:
+    """Corpo de erro no formato da API do Google"""
+    return {
+        'error': {
+            'code': code,
+            'message': message,
+            'errors': [{'domain': 'youtube.video', 'reason': reason, 'message': message}]
+        }
+    }
+
+
+class FakeYouTubeServer:
+    """Servidor HTTP em thread com o estado (sessões, vídeos) e as estatísticas"""
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 bandwidth_mbps: Optional[float] = None, error_rate: float = 0.0,
+                 upload_limit: Optional[int] = None, seed: Optional[int] = None):
+        self.latency = latency
+        self.bandwidth_mbps = bandwidth_mbps
+        self.error_rate = error_rate
+        self.upload_limit = upload_limit
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # upload_id → {total, received, body}
+        self.sessions: Dict[str, Dict] = {}
+        # video_id → recurso do vídeo
+        self.videos: Dict[str, Dict] = {}
+        self.calls: Counter = Counter()
+        self.bytes_received = 0
+        self.errors_injected = 0
+        self.chunk_latencies: List[float] = []
+        
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> 'FakeYouTubeServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def __enter__(self) -> 'FakeYouTubeServer':
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def count(self, method: str):
+        with self._lock:
+            self.calls[method] += 1
+    
+    def should_fail(self) -> bool:
+        """Sorteia uma falha 5xx injetada"""
+        with self._lock:
+            if self.error_rate > 0 and self._random.random() < self.error_rate:
+                self.errors_injected += 1
+                return True
+            return False
+    
+    def stats(self) -> Dict:
+        """Estatísticas das chamadas recebidas"""
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'bytesReceived': self.bytes_received,
+                'errorsInjected': self.errors_injected,
+                'videos': len(self.videos),
+                'chunkLatencies': list(self.chunk_latencies)
+            }
+    
+    def open_session(self, body: Dict, total: int) -> Optional[str]:
+        """Cria uma sessão de upload; None se o limite de uploads foi atingido"""
+        with self._lock:
+            if self.upload_limit is not None and len(self.sessions) >= self.upload_limit:
+                return None
+            upload_id = uuid.uuid4().hex
+            self.sessions[upload_id] = {'total': total, 'received': 0, 'body': body}
+            return upload_id
+    
+    def complete_session(self, upload_id: str) -> Dict:
+        """Cria o vídeo de uma sessão concluída (idempotente)"""
+        with self._lock:
+            session = self.sessions[upload_id]
+            if 'videoId' in session:
+                return self.videos[session['videoId']]
+            
+            video_id = uuid.uuid4().hex[:11]
+            seconds = max(1, session['total'] // BYTES_PER_SECOND_OF_VIDEO)
+            body = session['body']
+            video = {
+                'kind': 'youtube#video',
+                'id': video_id,
+                'snippet': dict(body.get('snippet', {})),
+                'status': dict(body.get('status', {}), uploadStatus='processed'),
+                'contentDetails': {'duration': f"PT{seconds // 60}M{seconds % 60}S"}
+            }
+            self.videos[video_id] = video
+            session['videoId'] = video_id
+            return video
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Rotas da API falsa (HTTP/1.1 com keep-alive)"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    @property
+    def fake(self) -> FakeYouTubeServer:
+        return self.server.fake
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send(self, code: int, body: Optional[Dict] = None, headers: Optional[Dict] = None):
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def _read_body(self, throttle: bool = False) -> bytes:
+        """Lê o corpo da requisição, limitado à banda configurada se throttle"""
+        length = int(self.headers.get('Content-Length') or 0)
+        rate = self.fake.bandwidth_mbps * 1_000_000 / 8 if throttle and self.fake.bandwidth_mbps else None
+        chunks = []
+        started = time.monotonic()
+        received = 0
+        
+        while received < length:
+            block = self.rfile.read(min(READ_BLOCK, length - received))
+            if not block:
+                break
+            received += len(block)
+            chunks.append(block)
+            if rate:
+                ahead = received / rate - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        
+        return b''.join(chunks)
+    
+    def _route(self):
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+        url = urlparse(self.path)
+        return url.path.rstrip('/'), {k: v[-1] for k, v in parse_qs(url.query).items()}
+    
+    def do_POST(self):
+        path, query = self._route()
+        if path != UPLOAD_PATH or query.get('uploadType') != 'resumable':
+            self._read_body()
+            self._send(404, _error_body(404, 'notFound', f'Rota não suportada: {self.path}'))
+            return
+        
+        self.fake.count('videos.insert')
+        body = json.loads(self._read_body() or b'{}')
+        total = int(self.headers.get('X-Upload-Content-Length') or 0)
+        
+        upload_id = self.fake.open_session(body, total)
+        if upload_id is None:
+            self._send(400, _error_body(400, 'uploadLimitExceeded',
+                                        'The user has exceeded the number of videos they may upload.'))
+            return
+        
+        location = f"{self.fake.url}{UPLOAD_PATH}?uploadType=resumable&upload_id={upload_id}"
+        self._send(200, {}, {'Location': location})
+    
+    def do_PUT(self):
+        path, query = self._route()
+        if path == VIDEOS_PATH:
+            self._update_video(query)
+        elif path == UPLOAD_PATH and 'upload_id' in query:
+            self._upload_chunk(query['upload_id'])
+        else:
+            self._read_body()
+            self._send(404, _error_body(404, 'notFound', f'Rota não suportada: {self.path}'))
+    
+    def do_GET(self):
+        path, query = self._route()
+        if path == VIDEOS_PATH:
+            self._list_videos(query)
+        elif path == CHANNELS_PATH:
+            self._list_channels()
+        elif path == PLAYLIST_ITEMS_PATH:
+            self._list_playlist_items(query)
+        else:
+            self._send(404, _error_body(404, 'notFound', f'Rota não suportada: {self.path}'))
+    
+    def _upload_chunk(self, upload_id: str):
+        started = time.monotonic()
+        session = self.fake.sessions.get(upload_id)
+        match = re.match(r'bytes (\*|(\d+)-(\d+))/(\d+|\*)', self.headers.get('Content-Range', ''))
+        
+        if session is None or match is None:
+            self._read_body()
+            self._send(404, _error_body(404, 'notFound', 'Sessão de upload não encontrada'))
+            return
+        
+        if match.group(1) == '*':
+            # Consulta de estado da sessão
+            self.fake.count('upload.status')
+            self._read_body()
+        else:
+            self.fake.count('upload.chunk')
+            data = self._read_body(throttle=True)
+            if self.fake.should_fail():
+                self._send(503, _error_body(503, 'backendError', 'Backend Error'))
+                return
+            
+            first = int(match.group(2))
+            with self.fake._lock:
+                self.fake.bytes_received += len(data)
+                # Bytes fora de ordem são descartados; o cliente ressincroniza pelo Range
+                if first == session['received']:
+                    session['received'] += len(data)
+                self.fake.chunk_latencies.append(time.monotonic() - started)
+        
+        if session['received'] >= session['total']:
+            self._send(200, self.fake.complete_session(upload_id))
+        elif session['received'] > 0:
+            self._send(308, None, {'Range': f"bytes=0-{session['received'] - 1}"})
+        else:
+            self._send(308)
+    
+    def _list_videos(self, query: Dict):
+        self.fake.count('videos.list')
+        parts = set(query.get('part', '').split(','))
+        items = []
+        
+        for video_id in query.get('id', '').split(','):
+            video = self.fake.videos.get(video_id)
+            if not video:
+                continue
+            item = {'kind': video['kind'], 'id': video_id}
+            item.update({part: video[part] for part in parts if part in video})
+            items.append(item)
+        
+        body = {'kind': 'youtube#videoListResponse', 'items': items,
+                'pageInfo': {'totalResults': len(items), 'resultsPerPage': len(items)}}
+        
+        # ETag da resposta: If-None-Match com o mesmo valor recebe 304 sem corpo
+        etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.fake.count('videos.list.304')
+            self._send(304, None, {'ETag': etag})
+            return
+        body['etag'] = etag
+        self._send(200, body, {'ETag': etag})
+    
+    def _list_channels(self):
+        self.fake.count('channels.list')
+        self._send(200, {
+            'kind': 'youtube#channelListResponse',
+            'items': [{'kind': 'youtube#channel', 'id': 'UCfake',
+                       'contentDetails': {'relatedPlaylists': {'uploads': UPLOADS_PLAYLIST_ID}}}]
+        })
+    
+    def _list_playlist_items(self, query: Dict):
+        self.fake.count('playlistItems.list')
+        if query.get('playlistId') != UPLOADS_PLAYLIST_ID:
+            self._send(404, _error_body(404, 'playlistNotFound', 'Playlist not found'))
+            return
+        
+        # pageToken é o deslocamento na lista (vídeos mais recentes primeiro)
+        with self.fake._lock:
+            videos = list(reversed(list(self.fake.videos.values())))
+        start = int(query.get('pageToken') or 0)
+        size = int(query.get('maxResults') or 5)
+        items = []
+        for video in videos[start:start + size]:
+            title = video.get('snippet', {}).get('title', '')
+            items.append({
+                'kind': 'youtube#playlistItem',
+                'etag': '"' + hashlib.sha1(f"{video['id']}|{title}".encode('utf-8')).hexdigest() + '"',
+                'snippet': {'title': title, 'resourceId': {'kind': 'youtube#video', 'videoId': video['id']}}
+            })
+        
+        body = {'kind': 'youtube#playlistItemListResponse', 'items': items,
+                'pageInfo': {'totalResults': len(videos), 'resultsPerPage': size}}
+        if start + size < len(videos):
+            body['nextPageToken'] = str(start + size)
+        self._send(200, body)
+    
+    def _update_video(self, query: Dict):
+        self.fake.count('videos.update')
+        body = json.loads(self._read_body() or b'{}')
+        video = self.fake.videos.get(body.get('id', ''))
+        
+        if video is None:
+            self._send(404, _error_body(404, 'videoNotFound', 'Video not found'))
+            return
+        
+        with self.fake._lock:
+            for part in query.get('part', '').split(','):
+                if part in body:
+                    video[part] = body[part]
+        
+        self._send(200, video)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local que imita a YouTube Data API v3')
+    
+    parser.add_argument('--host', default='127.0.0.1', help='Endereço (padrão: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Porta (padrão: 8765)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latência por requisição em segundos')
+    parser.add_argument('--bandwidth', type=float, default=None, help='Banda de upload em Mbit/s (padrão: sem limite)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de chunks respondidos com 503')
+    parser.add_argument('--upload-limit', type=int, default=None,
+                        help='Uploads aceitos antes de responder uploadLimitExceeded')
+    
+    args = parser.parse_args()
+    
+    server = FakeYouTubeServer(args.host, args.port, args.latency, args.bandwidth,
+                               args.error_rate, args.upload_limit)
+    print(f"🧪 Fake YouTube API em {server.url} (Ctrl-C para encerrar)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {json.dumps({k: v for k, v in server.stats().items() if k != 'chunkLatencies'})}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,89 +3,88 @@
 Fetch Video Durations Script
 Busca durações de vídeos já enviados para o YouTube e atualiza o course-metadata.json
 
+Os vídeos sem duração são consultados em lotes de até 50 IDs por chamada
+videos.list (1 unidade de quota por lote), vários lotes ao mesmo tempo.
+Vídeos ainda em processamento e vídeos não encontrados são listados à parte.
+
+O JSON é lido em fluxo (metadata_stream.py): só as aulas sem duração ficam em
+memória, e a gravação reescreve apenas essas aulas e os totais que mudaram.
+
 Uso:
     python fetch_durations.py
     python fetch_durations.py --metadata-file outro-curso.json
 """
 
 import argparse
-import json
 import os
 import sys
 import re
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 
 try:
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-    from googleapiclient.discovery import build
+    from youtube_client import (
+        connect, TOKEN_FILE, CREDENTIALS_FILE, READONLY_SCOPE, DURATION_STATUS_FIELDS, MAX_LIST_IDS
+    )
 except ImportError:
     print("❌ Erro: Bibliotecas do Google API não encontradas.")
     print("   Instale com: pip install google-api-python-client google-auth-oauthlib")
     sys.exit(1)
 
+from async_api import AsyncApiEngine, DEFAULT_CONCURRENCY, DEFAULT_RATE
+from catalog import Lesson
+from channel_mirror import open_mirror, DEFAULT_MIRROR_FILE
+from metadata_stream import MetadataReader, patch_metadata
+from quota_ledger import QuotaLedger, UNIT_COSTS, DEFAULT_DAILY_QUOTA
+from telemetry import Telemetry
+from video_cache import VideoCache, DEFAULT_VIDEO_CACHE_FILE
+
 
 # Configurações
-# Usa ambos os scopes para compatibilidade com youtube_uploader.py
-SCOPES = [
-    'https://www.googleapis.com/auth/youtube.upload',
-    'https://www.googleapis.com/auth/youtube.readonly'
-]
-TOKEN_FILE = 'youtube_token.json'
-CREDENTIALS_FILE = 'client_secret.json'
+# Só leitura; o token é o mesmo do youtube_uploader.py (youtube_client.py)
+SCOPES = [READONLY_SCOPE]
 DEFAULT_METADATA_FILE = 'course-metadata.json'
+VIDEO_CACHE_FILE = DEFAULT_VIDEO_CACHE_FILE
+MIRROR_FILE = DEFAULT_MIRROR_FILE
+# Part das consultas em lote (chave no cache)
+CACHE_PART = 'contentDetails,status'
 
 
 class DurationFetcher:
     """Busca durações de vídeos do YouTube"""
     
-    def __init__(self, metadata_file: str = DEFAULT_METADATA_FILE, credentials_file: str = CREDENTIALS_FILE):
+    def __init__(self, metadata_file: str = DEFAULT_METADATA_FILE, credentials_file: str = CREDENTIALS_FILE,
+                 daily_quota: int = DEFAULT_DAILY_QUOTA, reserve_units: int = 0,
+                 client_factory: Optional[Callable] = None,
+                 events_file: Optional[str] = None, metrics_file: Optional[str] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                 refresh_cache: bool = False):
         self.metadata_file = metadata_file
         self.credentials_file = credentials_file
+        # Cria o cliente da API sem OAuth (ex: fake_youtube_server em benchmarks)
+        self.client_factory = client_factory
+        self.clients = None
         self.youtube = None
-        self.metadata = None
-        
+        # Campos do curso; as aulas são lidas do arquivo sob demanda
+        self.course: Optional[Dict] = None
+        self.reader: Optional[MetadataReader] = None
+        # Quota diária compartilhada; reserve_units fica guardado para os uploads
+        self.quota = QuotaLedger('fetch_durations', daily_quota)
+        self.reserve_units = reserve_units
+        self.quota_exhausted = False
+        # Eventos JSONL e métricas Prometheus (--events-file / --metrics-file)
+        self.telemetry = Telemetry('fetch_durations', events_file, metrics_file)
+        # Lotes de 50 vídeos consultados ao mesmo tempo e limite de chamadas/segundo
+        self.concurrency = concurrency
+        self.rate = rate
+        # Durações já consultadas (TTL); refresh_cache consulta todas de novo
+        self.video_cache = VideoCache(VIDEO_CACHE_FILE, refresh_cache)
+        # Espelho local do canal (channel_mirror.py --sync), se existir
+        self.mirror = None if refresh_cache else open_mirror(MIRROR_FILE)
+    
     def authenticate(self):
         """Autentica com a API do YouTube"""
-        creds = None
-        
-        # Carrega token salvo se existir
-        if os.path.exists(TOKEN_FILE):
-            try:
-                creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
-            except Exception as e:
-                print(f"⚠️  Token existente inválido: {e}")
-                print(f"💡 Se você mudou de credenciais, delete o arquivo {TOKEN_FILE} e tente novamente")
-        
-        # Se não há credenciais válidas, faz login
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                print("🔄 Renovando token de acesso...")
-                creds.refresh(Request())
-            else:
-                if not os.path.exists(self.credentials_file):
-                    print(f"❌ Arquivo de credenciais não encontrado: {self.credentials_file}")
-                    print("\n📋 Como obter credenciais:")
-                    print("   1. Acesse: https://console.cloud.google.com/")
-                    print("   2. Crie um projeto (ou selecione existente)")
-                    print("   3. Ative a YouTube Data API v3")
-                    print("   4. Crie credenciais OAuth 2.0 (Desktop app)")
-                    print("   5. Baixe o JSON e salve como 'client_secret.json'")
-                    sys.exit(1)
-                
-                print("🔐 Iniciando autenticação OAuth...")
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_file, SCOPES)
-                creds = flow.run_local_server(port=8080)
-            
-            # Salva token para uso futuro
-            with open(TOKEN_FILE, 'w') as token:
-                token.write(creds.to_json())
-            print("✅ Token salvo com sucesso!")
-        
-        self.youtube = build('youtube', 'v3', credentials=creds)
-        print("✅ Autenticado com sucesso!\n")
+        self.clients = connect(self.credentials_file, SCOPES, self.client_factory)
+        self.youtube = self.clients.client()
     
     def load_metadata(self):
         """Carrega metadados do curso"""
@@ -93,11 +92,11 @@ class DurationFetcher:
             print(f"❌ Arquivo de metadados não encontrado: {self.metadata_file}")
             sys.exit(1)
         
-        with open(self.metadata_file, 'r', encoding='utf-8') as f:
-            self.metadata = json.load(f)
+        self.reader = MetadataReader(self.metadata_file)
+        self.course = self.reader.course()
         
-        print(f"📚 Curso: {self.metadata['course']['title']}")
-        print(f"📹 Total de vídeos: {self.metadata['course']['totalVideos']}\n")
+        print(f"📚 Curso: {self.course['title']}")
+        print(f"📹 Total de vídeos: {self.course['totalVideos']}\n")
     
     def _parse_duration(self, iso_duration: str) -> int:
         """Converte duração ISO 8601 (ex: PT15M33S) para segundos"""
@@ -114,34 +113,40 @@ class DurationFetcher:
         
         return hours * 3600 + minutes * 60 + seconds
     
-    def _get_video_duration(self, video_id: str) -> Optional[int]:
+    async def _fetch_batch(self, engine: AsyncApiEngine, video_ids: List[str]) -> Dict[str, Dict]:
         """
-        Busca a duração do vídeo via YouTube API
-        Retorna duração em segundos ou None em caso de erro
+        Busca até 50 vídeos em uma única chamada videos.list
+        Retorna os itens encontrados por video ID
         """
         try:
-            request = self.youtube.videos().list(
-                part='contentDetails',
-                id=video_id
-            )
-            response = request.execute()
-            
-            if 'items' in response and len(response['items']) > 0:
-                duration_iso = response['items'][0]['contentDetails']['duration']
-                duration_seconds = self._parse_duration(duration_iso)
-                return duration_seconds
-            
-            return None
+            response = await engine.call('videos.list', lambda youtube: youtube.videos().list(
+                part=CACHE_PART,
+                id=','.join(video_ids),
+                fields=DURATION_STATUS_FIELDS
+            ))
         except Exception as e:
-            error_str = str(e)
-            if 'insufficientPermissions' in error_str or 'insufficient authentication scopes' in error_str:
-                print(f"❌ Erro de permissão ao buscar duração do vídeo {video_id}")
-                print(f"💡 O token atual não tem as permissões necessárias.")
-                print(f"   Solução: Delete o arquivo '{TOKEN_FILE}' e execute o script novamente")
-                print(f"   para re-autenticar com as credenciais corretas.\n")
-            else:
-                print(f"⚠️  Erro ao buscar duração do vídeo {video_id}: {e}")
-            return None
+            if 'quotaExceeded' in str(e):
+                self.telemetry.quota_error('quotaExceeded', 'videos.list')
+                self.quota.exhaust()
+                self.quota_exhausted = True
+                # Sem quota, os próximos lotes falhariam da mesma forma
+                engine.stop()
+            raise
+        
+        return {item['id']: item for item in response.get('items', [])}
+    
+    def _print_batch_error(self, error: Exception):
+        """Explica a falha de um lote"""
+        error_str = str(error)
+        if 'quotaExceeded' in error_str:
+            print(f"❌ Quota diária da API esgotada (reset à meia-noite do Pacífico)")
+        elif 'insufficientPermissions' in error_str or 'insufficient authentication scopes' in error_str:
+            print(f"❌ Erro de permissão ao buscar durações")
+            print(f"💡 O token atual não tem as permissões necessárias.")
+            print(f"   Solução: Delete o arquivo '{TOKEN_FILE}' e execute o script novamente")
+            print(f"   para re-autenticar com as credenciais corretas.\n")
+        else:
+            print(f"⚠️  Erro ao buscar durações: {error}")
     
     def _format_duration(self, seconds: int) -> str:
         """Formata duração em segundos para HH:MM:SS"""
@@ -156,75 +161,143 @@ class DurationFetcher:
         else:
             return f"{secs}s"
     
-    def _extract_video_id(self, youtube_url: str) -> Optional[str]:
-        """Extrai video ID de uma URL do YouTube"""
-        if not youtube_url:
-            return None
-        
-        # Suporta vários formatos de URL
-        patterns = [
-            r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',  # youtube.com/watch?v=ID ou youtu.be/ID
-            r'(?:embed\/)([0-9A-Za-z_-]{11})',   # youtube.com/embed/ID
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, youtube_url)
-            if match:
-                return match.group(1)
-        
-        return None
-    
     def fetch_missing_durations(self):
         """Busca durações de vídeos que não têm o campo duration"""
-        missing_count = 0
         updated_count = 0
+        processing_count = 0
+        not_found_count = 0
         failed_count = 0
         
-        # Conta vídeos sem duração
-        for module in self.metadata['course']['modules']:
-            for section in module['sections']:
-                for lesson in section['lessons']:
-                    if lesson.get('youtubeUrl') and not lesson.get('duration'):
-                        missing_count += 1
+        # Coleta os vídeos sem duração: video ID → aulas (o mesmo vídeo pode estar em mais de uma)
+        missing: Dict[str, List[Lesson]] = {}
+        missing_count = 0
+        for lesson in self.reader.missing_durations():
+            missing_count += 1
+            
+            video_id = lesson.video_id
+            if not video_id:
+                print(f"⚠️  URL inválida: {lesson.id} - {lesson['youtubeUrl']}")
+                failed_count += 1
+                continue
+            missing.setdefault(video_id, []).append(lesson)
         
         if missing_count == 0:
             print("✅ Todos os vídeos já têm duração cadastrada!")
+            # Arquivos de antes dos totais (ou alterados à mão) ganham os totais atualizados
+            if patch_metadata(self.metadata_file)['rollups']:
+                print(f"💾 Totais de duração atualizados em {self.metadata_file}")
             return
         
         print(f"📋 Vídeos sem duração: {missing_count}")
-        print(f"🔍 Buscando durações via YouTube API...\n")
         
-        # Processa cada vídeo
-        for module in self.metadata['course']['modules']:
-            for section in module['sections']:
-                for lesson in section['lessons']:
-                    # Pula se já tem duração ou não tem URL
-                    if lesson.get('duration') or not lesson.get('youtubeUrl'):
-                        continue
-                    
-                    # Extrai video ID
-                    video_id = self._extract_video_id(lesson['youtubeUrl'])
-                    if not video_id:
-                        print(f"⚠️  URL inválida: {lesson['id']} - {lesson['youtubeUrl']}")
-                        failed_count += 1
-                        continue
-                    
-                    # Busca duração
-                    print(f"⏱️  {lesson['id']}: {lesson['title'][:50]}...")
-                    duration_seconds = self._get_video_duration(video_id)
-                    
-                    if duration_seconds:
-                        lesson['duration'] = duration_seconds
-                        print(f"   ✅ Duração: {self._format_duration(duration_seconds)}\n")
-                        updated_count += 1
-                    else:
-                        print(f"   ❌ Falha ao buscar duração\n")
-                        failed_count += 1
+        # Vídeos já processados no espelho do canal não custam chamadas
+        from_mirror: Dict[str, int] = {}
+        if self.mirror:
+            for video_id, video in self.mirror.videos(missing).items():
+                if video['upload_status'] == 'processed' and video['duration']:
+                    from_mirror[video_id] = video['duration']
+            if from_mirror:
+                print(f"📺 Do espelho do canal: {len(from_mirror)} vídeos")
+        
+        # Durações já consultadas (por este script ou pelo uploader) dentro do TTL também não
+        items: Dict[str, Optional[Dict]] = {}
+        for video_id in missing:
+            if video_id in from_mirror:
+                continue
+            cached = self.video_cache.get(video_id, CACHE_PART) or self.video_cache.get(video_id, 'contentDetails')
+            if cached is not None:
+                items[video_id] = cached
+        if items:
+            print(f"🗄️  Do cache: {len(items)} vídeos")
+        
+        # Até 50 IDs por chamada videos.list; ajusta o plano à quota restante
+        # Entradas vencidas voltam ao lote sem If-None-Match: revalidar uma a uma custaria
+        # uma chamada por vídeo em vez de uma a cada 50 (ver video_cache.py)
+        cached_count = len(items)
+        video_ids = [video_id for video_id in missing if video_id not in items and video_id not in from_mirror]
+        batches = [video_ids[i:i + MAX_LIST_IDS] for i in range(0, len(video_ids), MAX_LIST_IDS)]
+        allowed = self.quota.plan(len(batches), UNIT_COSTS['videos.list'], self.reserve_units) if batches else 0
+        if batches and allowed <= 0 and not items and not from_mirror:
+            return
+        batches = batches[:max(allowed, 0)]
+        
+        if batches:
+            print(f"🔍 Buscando durações via YouTube API ({len(batches)} chamadas de até {MAX_LIST_IDS} vídeos)...\n")
+        
+        def report(done: int, total: int, batch: List[str], result):
+            if isinstance(result, Exception):
+                print(f"📦 Lote {done}/{total} ({len(batch)} vídeos): falhou")
+                self._print_batch_error(result)
+            else:
+                print(f"📦 Lote {done}/{total}: {len(result)} de {len(batch)} vídeos encontrados")
+        
+        engine = AsyncApiEngine(self.clients, self.concurrency, self.rate, self.telemetry, self.quota)
+        results = engine.run(batches, self._fetch_batch, report)
+        if batches:
+            print()
+        
+        # Resultado de cada vídeo: do cache, da API ou falha do lote
+        failed_ids = set()
+        for batch, found in zip(batches, results):
+            for video_id in batch:
+                if found is None or isinstance(found, Exception):
+                    failed_ids.add(video_id)
+                else:
+                    items[video_id] = found.get(video_id)
         
-        # Salva JSON atualizado
-        if updated_count > 0:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2, ensure_ascii=False)
+        # Resultado de cada aula, na ordem do curso (ID da aula → campos alterados)
+        updates: Dict[str, Dict] = {}
+        processing = []
+        not_found = []
+        for video_id, lessons in missing.items():
+            if video_id in failed_ids:
+                failed_count += len(lessons)
+                continue
+            
+            if video_id in from_mirror:
+                duration_seconds = from_mirror[video_id]
+            elif video_id not in items:
+                # Fora do plano de quota: continua pendente
+                continue
+            else:
+                item = items[video_id]
+                if item is None:
+                    not_found += lessons
+                    continue
+                
+                duration_seconds = self._parse_duration(item.get('contentDetails', {}).get('duration', ''))
+                upload_status = item.get('status', {}).get('uploadStatus', 'processed')
+                if not duration_seconds or upload_status == 'uploaded':
+                    processing += lessons
+                    continue
+                
+                # Só vídeos processados entram no cache (a duração não muda mais)
+                self.video_cache.store(video_id, CACHE_PART, item)
+            
+            for lesson in lessons:
+                updates[lesson.id] = {'duration': duration_seconds}
+                print(f"⏱️  {lesson['id']}: {lesson['title'][:50]}...")
+                print(f"   ✅ Duração: {self._format_duration(duration_seconds)}\n")
+                updated_count += 1
+        self.video_cache.save()
+        
+        if processing:
+            print(f"⏳ Ainda em processamento no YouTube (tente de novo mais tarde): {len(processing)}")
+            for lesson in processing:
+                print(f"   • {lesson['id']}: {lesson['youtubeUrl']}")
+            print()
+            processing_count = len(processing)
+        
+        if not_found:
+            print(f"🚫 Não encontrados no YouTube (removidos, privados de outro canal ou URL errada): {len(not_found)}")
+            for lesson in not_found:
+                print(f"   • {lesson['id']}: {lesson['youtubeUrl']}")
+            print()
+            not_found_count = len(not_found)
+        
+        # Salva JSON atualizado: só as aulas alteradas e os totais por seção, módulo e curso que mudaram
+        result = patch_metadata(self.metadata_file, updates)
+        if result['lessons'] or result['rollups']:
             print(f"💾 Arquivo {self.metadata_file} atualizado com sucesso!")
         
         # Resumo
@@ -232,48 +305,42 @@ class DurationFetcher:
         print("📊 RESUMO")
         print("=" * 70)
         print(f"✅ Durações adicionadas: {updated_count}")
+        print(f"⏳ Em processamento: {processing_count}")
+        print(f"🚫 Não encontrados: {not_found_count}")
         print(f"❌ Falhas: {failed_count}")
-        print(f"📋 Pendentes: {missing_count - updated_count - failed_count}")
+        print(f"📋 Pendentes: {missing_count - updated_count - processing_count - not_found_count - failed_count}")
+        print(f"📞 Chamadas videos.list: {len(batches)}")
+        print(f"📺 Do espelho do canal: {len(from_mirror)} vídeos")
+        print(f"🗄️  Do cache: {cached_count} vídeos")
         print("=" * 70)
         
         # Calcula estatísticas
-        self._print_statistics()
+        self._print_statistics(result)
     
-    def _print_statistics(self):
-        """Imprime estatísticas de duração por módulo"""
+    def _print_statistics(self, result: Dict):
+        """Imprime estatísticas de duração por módulo (totais recalculados pelo patch_metadata)"""
         print("\n" + "=" * 70)
         print("📈 ESTATÍSTICAS DE DURAÇÃO")
         print("=" * 70)
         
-        total_duration = 0
-        total_videos_with_duration = 0
+        for module_title, stats in result['modules']:
+            if stats['withDuration'] > 0:
+                print(f"\n{module_title}:")
+                print(f"  Vídeos: {stats['withDuration']}/{stats['lessons']}")
+                print(f"  Duração total: {self._format_duration(stats['totalSeconds'])}")
+                print(f"  Média: {self._format_duration(stats['averageSeconds'])}   "
+                      f"Mediana: {self._format_duration(stats['medianSeconds'])}")
         
-        for module in self.metadata['course']['modules']:
-            module_duration = 0
-            module_videos = 0
-            
-            for section in module['sections']:
-                for lesson in section['lessons']:
-                    if lesson.get('duration'):
-                        module_duration += lesson['duration']
-                        module_videos += 1
-                        total_duration += lesson['duration']
-                        total_videos_with_duration += 1
-            
-            if module_videos > 0:
-                print(f"\n{module['title']}:")
-                print(f"  Vídeos: {module_videos}")
-                print(f"  Duração total: {self._format_duration(module_duration)}")
-        
-        if total_videos_with_duration > 0:
+        stats = result['course']
+        if stats['withDuration'] > 0:
             print(f"\n{'='*70}")
             print(f"TOTAL DO CURSO:")
-            print(f"  Vídeos com duração: {total_videos_with_duration}/{self.metadata['course']['totalVideos']}")
-            print(f"  Duração total: {self._format_duration(total_duration)}")
-            print(f"  Duração média por vídeo: {self._format_duration(total_duration // total_videos_with_duration)}")
+            print(f"  Vídeos com duração: {stats['withDuration']}/{self.course['totalVideos']}")
+            print(f"  Duração total: {self._format_duration(stats['totalSeconds'])}")
+            print(f"  Duração média por vídeo: {self._format_duration(stats['averageSeconds'])}")
+            print(f"  Duração mediana: {self._format_duration(stats['medianSeconds'])}")
             print("=" * 70)
 
-
 def main():
     parser = argparse.ArgumentParser(
         description='Busca durações de vídeos do YouTube e atualiza course-metadata.json',
@@ -306,17 +373,73 @@ Requisitos:
         help=f'Arquivo de credenciais OAuth 2.0 (padrão: {CREDENTIALS_FILE})'
     )
     
+    parser.add_argument(
+        '--daily-quota',
+        type=int,
+        default=DEFAULT_DAILY_QUOTA,
+        help=f'Quota diária da API do projeto, compartilhada entre os scripts (padrão: {DEFAULT_DAILY_QUOTA})'
+    )
+    
+    parser.add_argument(
+        '--reserve-units',
+        type=int,
+        default=0,
+        help='Unidades de quota que esta execução não pode usar (ex: reservadas para os uploads)'
+    )
+    
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Chamadas videos.list (lotes de {MAX_LIST_IDS} vídeos) ao mesmo tempo (padrão: {DEFAULT_CONCURRENCY})'
+    )
+    
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=DEFAULT_RATE,
+        help=f'Máximo de chamadas à API por segundo, 0 = sem limite (padrão: {DEFAULT_RATE:g})'
+    )
+    
+    parser.add_argument(
+        '--refresh-cache',
+        action='store_true',
+        help=f'Ignora as durações em cache ({VIDEO_CACHE_FILE} e {MIRROR_FILE}) e consulta todas na API'
+    )
+    
+    parser.add_argument(
+        '--events-file',
+        default=None,
+        help='Grava eventos estruturados (JSONL): chamadas à API e erros de quota'
+    )
+    
+    parser.add_argument(
+        '--metrics-file',
+        default=None,
+        help='Grava um snapshot de métricas no formato textfile do Prometheus (ex: .../node_exporter/fetch_durations.prom)'
+    )
+    
     args = parser.parse_args()
     
     # Executa
     fetcher = DurationFetcher(
         metadata_file=args.metadata_file,
-        credentials_file=args.credentials
+        credentials_file=args.credentials,
+        daily_quota=args.daily_quota,
+        reserve_units=args.reserve_units,
+        events_file=args.events_file,
+        metrics_file=args.metrics_file,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        refresh_cache=args.refresh_cache
     )
     
     fetcher.authenticate()
     fetcher.load_metadata()
-    fetcher.fetch_missing_durations()
+    try:
+        fetcher.fetch_missing_durations()
+    finally:
+        fetcher.telemetry.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Video Fingerprints
+Impressão digital do conteúdo dos vídeos para evitar uploads duplicados
+
+A mesma gravação aparece em vários cursos e arquivos renomeados seriam
+enviados de novo, gastando um insert (1600 unidades) e uma vaga diária.
+O fingerprint é um hash amostrado (tamanho + início + fim + blocos
+espaçados ao longo do arquivo) lido via mmap, então um arquivo de 2 GB é
+processado em milissegundos. O resultado fica em cache por
+(inode, tamanho, mtime), junto com o mapa fingerprint → vídeo no YouTube.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from atomic_file import atomic_write
+
+
+DEFAULT_FINGERPRINTS_FILE = 'fingerprints.json'
+MB = 1024 * 1024
+
+# Arquivos até este tamanho são hasheados por inteiro
+FULL_HASH_LIMIT = 64 * MB
+# Início e fim do arquivo (cabeçalhos/moov do MP4 costumam estar aqui)
+EDGE_SIZE = 4 * MB
+# Blocos amostrados ao longo do arquivo
+SAMPLE_SIZE = 1 * MB
+SAMPLE_COUNT = 16
+
+
+def fingerprint_file(path: Path) -> str:
+    """Calcula o fingerprint amostrado do conteúdo de um arquivo"""
+    size = path.stat().st_size
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(size).encode('ascii'))
+    
+    if size == 0:
+        return digest.hexdigest()
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if size <= FULL_HASH_LIMIT:
+            digest.update(data)
+            return digest.hexdigest()
+        
+        digest.update(data[:EDGE_SIZE])
+        step = (size - 2 * EDGE_SIZE - SAMPLE_SIZE) // SAMPLE_COUNT
+        for i in range(SAMPLE_COUNT):
+            offset = EDGE_SIZE + i * step
+            digest.update(data[offset:offset + SAMPLE_SIZE])
+        digest.update(data[size - EDGE_SIZE:])
+    
+    return digest.hexdigest()
+
+
+class FingerprintStore:
+    """Cache de fingerprints por arquivo e mapa fingerprint → vídeo já enviado"""
+    
+    def __init__(self, store_file: str = DEFAULT_FINGERPRINTS_FILE):
+        self.store_file = store_file
+        self._lock = threading.Lock()
+        # "dev:inode" → {size, mtime, fingerprint}
+        self.files: Dict[str, Dict] = {}
+        # fingerprint → {youtubeUrl, lessonId, duration}
+        self.videos: Dict[str, Dict] = {}
+        self._dirty = False
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.store_file):
+            return
+        
+        try:
+            with open(self.store_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Arquivo de fingerprints inválido, recriando: {e}")
+            return
+        
+        self.files = data.get('files', {})
+        self.videos = data.get('videos', {})
+    
+    def save(self):
+        """Salva o cache de forma atômica (se houve alterações)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            with atomic_write(self.store_file) as f:
+                json.dump({'files': self.files, 'videos': self.videos}, f, ensure_ascii=False)
+            self._dirty = False
+    
+    def fingerprint(self, path: Path) -> str:
+        """Fingerprint do arquivo, recalculado só se inode, tamanho ou mtime mudaram"""
+        stat = path.stat()
+        key = f"{stat.st_dev}:{stat.st_ino}"
+        
+        with self._lock:
+            cached = self.files.get(key)
+            if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime_ns:
+                return cached['fingerprint']
+        
+        value = fingerprint_file(path)
+        
+        with self._lock:
+            self.files[key] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'fingerprint': value}
+            self._dirty = True
+        return value
+    
+    def lookup(self, fingerprint: str) -> Optional[Dict]:
+        """Vídeo já enviado com o mesmo conteúdo, se houver"""
+        with self._lock:
+            return self.videos.get(fingerprint)
+    
+    def register(self, fingerprint: str, youtube_url: str, lesson_id: str, duration: Optional[int] = None):
+        """Associa um fingerprint ao vídeo enviado (o primeiro registro prevalece)"""
+        with self._lock:
+            if fingerprint in self.videos:
+                return
+            self.videos[fingerprint] = {'youtubeUrl': youtube_url, 'lessonId': lesson_id, 'duration': duration}
+            self._dirty = True
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Media Probe
+Lê duração, resolução, codecs e integridade de arquivos MP4/MOV localmente
+
+Percorre os atoms do container (ISO BMFF) via mmap, sem decodificar nenhum
+frame: moov/mvhd para a duração, trak/tkhd para a resolução e stsd para o
+codec. Um arquivo sem moov, ou com atoms que ultrapassam o fim do arquivo,
+está truncado/corrompido e seria rejeitado pelo YouTube depois de gastar a
+vaga de upload.
+
+Em MP4/MOV fragmentados o mvhd tem duração 0: a duração vem do mvex/mehd
+quando existe e, sem ele, fica desconhecida (o arquivo não é tratado como
+corrompido por isso).
+
+Uso:
+    python media_probe.py --videos-dir /caminho/para/videos
+    python media_probe.py --videos-dir /caminho/para/videos --metadata-file course-metadata.json --update-metadata
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from atomic_file import atomic_write
+
+
+DEFAULT_PROBE_CACHE_FILE = 'media_probe.json'
+VIDEO_EXTENSIONS = {'.mp4', '.m4v', '.mov'}
+
+# Versão dos resultados: entradas do cache de outra versão são analisadas de novo
+PROBE_VERSION = 2
+
+# Atoms que contêm outros atoms no caminho até mvhd/tkhd/hdlr/stsd
+CONTAINER_ATOMS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+# Atoms de nível superior conhecidos (para reconhecer um arquivo ISO BMFF)
+TOP_LEVEL_ATOMS = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'uuid', b'pdin', b'moof', b'mfra', b'meta'}
+
+
+def _iter_atoms(data, start: int, end: int) -> Iterator[Tuple[bytes, int, int, bool]]:
+    """
+    Itera os atoms entre start e end
+    Gera (tipo, início do conteúdo, fim do atom, cabe no intervalo)
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                yield kind, offset + header, end, False
+                return
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        
+        if size < header:
+            yield kind, offset + header, end, False
+            return
+        
+        atom_end = offset + size
+        yield kind, offset + header, min(atom_end, end), atom_end <= end
+        offset = atom_end
+
+
+def _parse_mvhd(data, start: int) -> Tuple[int, int]:
+    """Retorna (timescale, duration) do mvhd"""
+    version = data[start]
+    if version == 1:
+        timescale, duration = struct.unpack_from('>IQ', data, start + 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', data, start + 12)
+    return timescale, duration
+
+
+def _parse_mehd(data, start: int, end: int) -> Optional[int]:
+    """Duração total de um arquivo fragmentado (mvex/mehd), na timescale do mvhd"""
+    version = data[start]
+    size = 8 if version == 1 else 4
+    if start + 4 + size > min(end, len(data)):
+        return None
+    return struct.unpack_from('>Q' if version == 1 else '>I', data, start + 4)[0]
+
+
+def _parse_tkhd(data, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """Retorna (largura, altura) em pixels do tkhd (valores 16.16); None se o atom estiver truncado"""
+    version = data[start]
+    # version/flags, tempos, track_ID, duração, reservados, layer, volume e matriz 3x3
+    offset = start + (88 if version == 1 else 76)
+    if offset + 8 > min(end, len(data)):
+        return None
+    width, height = struct.unpack_from('>II', data, offset)
+    return width >> 16, height >> 16
+
+
+def _parse_trak(data, start: int, end: int) -> Dict:
+    """Extrai tipo da trilha, resolução e codec de um trak"""
+    track: Dict = {}
+    stack = [(start, end)]
+    
+    while stack:
+        block_start, block_end = stack.pop()
+        for kind, content, atom_end, _ in _iter_atoms(data, block_start, block_end):
+            if kind in CONTAINER_ATOMS:
+                stack.append((content, atom_end))
+            elif kind == b'tkhd':
+                dimensions = _parse_tkhd(data, content, atom_end)
+                if dimensions:
+                    track['width'], track['height'] = dimensions
+            elif kind == b'hdlr':
+                track['handler'] = bytes(data[content + 8:content + 12]).decode('latin-1')
+            elif kind == b'stsd' and content + 16 <= atom_end:
+                # version/flags (4) + entry_count (4) + primeira entrada: size (4) + formato (4)
+                track['codec'] = bytes(data[content + 12:content + 16]).decode('latin-1').strip()
+    
+    return track
+
+
+def probe_file(path: str) -> Dict:
+    """
+    Analisa um arquivo MP4/MOV sem decodificar frames
+    
+    Retorna um dicionário com:
+        supported   - o arquivo é ISO BMFF (MP4/MOV)
+        moovPresent - o atom moov (índice do vídeo) existe
+        complete    - moov presente e nenhum atom ultrapassa o fim do arquivo
+        duration    - duração em segundos (None se desconhecida, ex: fragmentado sem mehd)
+        width, height, videoCodec, audioCodec
+    """
+    result: Dict = {
+        'supported': False, 'moovPresent': False, 'complete': False,
+        'duration': None, 'width': None, 'height': None,
+        'videoCodec': None, 'audioCodec': None
+    }
+    
+    size = os.path.getsize(path)
+    if size < 8:
+        return result
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        in_bounds = True
+        for index, (kind, content, atom_end, fits) in enumerate(_iter_atoms(data, 0, size)):
+            if index == 0:
+                if kind not in TOP_LEVEL_ATOMS:
+                    return result
+                result['supported'] = True
+            
+            if not fits:
+                in_bounds = False
+            
+            if kind != b'moov':
+                continue
+            
+            result['moovPresent'] = True
+            timescale = duration = 0
+            fragment_duration = None
+            for child, child_content, child_end, _ in _iter_atoms(data, content, atom_end):
+                if child == b'mvhd' and child_content + 32 <= child_end:
+                    timescale, duration = _parse_mvhd(data, child_content)
+                elif child == b'mvex':
+                    for grandchild, grandchild_content, grandchild_end, _ in _iter_atoms(data, child_content, child_end):
+                        if grandchild == b'mehd':
+                            fragment_duration = _parse_mehd(data, grandchild_content, grandchild_end)
+                elif child == b'trak':
+                    track = _parse_trak(data, child_content, child_end)
+                    if track.get('handler') == 'vide' and not result['videoCodec']:
+                        result['videoCodec'] = track.get('codec')
+                        result['width'] = track.get('width')
+                        result['height'] = track.get('height')
+                    elif track.get('handler') == 'soun' and not result['audioCodec']:
+                        result['audioCodec'] = track.get('codec')
+            
+            # Fragmentado: mvhd com duração 0 e o total (se houver) no mehd
+            duration = duration or fragment_duration
+            if timescale and duration:
+                result['duration'] = round(duration / timescale, 3)
+        
+        result['complete'] = in_bounds and result['moovPresent']
+    
+    return result
+
+
+def _probe_worker(path: str) -> Tuple[str, Dict]:
+    """Executado nos processos do pool: nunca propaga exceções"""
+    try:
+        return path, probe_file(path)
+    except (OSError, ValueError, struct.error) as e:
+        return path, {'supported': True, 'moovPresent': False, 'complete': False, 'error': str(e)}
+
+
+class MediaProbeCache:
+    """Resultados do probe em cache por (inode, tamanho, mtime)"""
+    
+    def __init__(self, cache_file: str = DEFAULT_PROBE_CACHE_FILE):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        # "dev:inode" → {size, mtime, version, result}
+        self.entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Cache de probe inválido, recriando: {e}")
+    
+    def save(self):
+        """Salva o cache de forma atômica (se houve alterações)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            with atomic_write(self.cache_file) as f:
+                json.dump(self.entries, f)
+            self._dirty = False
+    
+    def _key(self, path: Path) -> Tuple[str, os.stat_result]:
+        stat = path.stat()
+        return f"{stat.st_dev}:{stat.st_ino}", stat
+    
+    def _cached(self, path: Path) -> Optional[Dict]:
+        key, stat = self._key(path)
+        with self._lock:
+            entry = self.entries.get(key)
+        if (entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns
+                and entry.get('version') == PROBE_VERSION):
+            return entry['result']
+        return None
+    
+    def _store(self, path: Path, result: Dict):
+        key, stat = self._key(path)
+        with self._lock:
+            self.entries[key] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                                 'version': PROBE_VERSION, 'result': result}
+            self._dirty = True
+    
+    def probe(self, path: Path) -> Dict:
+        """Probe de um único arquivo (no processo atual)"""
+        result = self._cached(path)
+        if result is None:
+            result = _probe_worker(str(path))[1]
+            self._store(path, result)
+        return result
+    
+    def probe_many(self, paths: Iterable[Path], workers: Optional[int] = None) -> Dict[Path, Dict]:
+        """Probe de vários arquivos; os que não estão em cache rodam em um pool de processos"""
+        results: Dict[Path, Dict] = {}
+        missing: List[Path] = []
+        
+        for path in paths:
+            cached = self._cached(path)
+            if cached is None:
+                missing.append(path)
+            else:
+                results[path] = cached
+        
+        if len(missing) == 1:
+            results[missing[0]] = self.probe(missing[0])
+        elif missing:
+            by_name = {str(path): path for path in missing}
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for name, result in pool.map(_probe_worker, by_name, chunksize=8):
+                    self._store(by_name[name], result)
+                    results[by_name[name]] = result
+        
+        return results
+
+
+def is_broken(result: Dict) -> bool:
+    """Arquivo MP4/MOV reconhecido mas truncado ou sem índice (moov)"""
+    return bool(result.get('supported')) and not result.get('complete')
+
+
+def describe(result: Dict) -> str:
+    """Resumo de uma linha do resultado do probe"""
+    if not result.get('supported'):
+        return 'formato não suportado pelo probe'
+    if result.get('error'):
+        return f"erro: {result['error']}"
+    if not result.get('moovPresent'):
+        return 'sem atom moov (arquivo truncado ou ainda sendo gravado)'
+    if not result.get('complete'):
+        return 'atoms ultrapassam o fim do arquivo (truncado)'
+    
+    parts = [f"{result['duration']:.0f}s" if result.get('duration') else 'duração desconhecida']
+    if result.get('width'):
+        parts.append(f"{result['width']}x{result['height']}")
+    codecs = [c for c in (result.get('videoCodec'), result.get('audioCodec')) if c]
+    if codecs:
+        parts.append('/'.join(codecs))
+    return ', '.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Analisa os vídeos locais (duração, resolução, codec, integridade) sem gastar quota',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    parser.add_argument(
+        '--videos-dir',
+        required=True,
+        help='Diretório contendo os arquivos de vídeo'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Número de processos do pool (padrão: número de CPUs)'
+    )
+    
+    parser.add_argument(
+        '--metadata-file',
+        default=None,
+        help='Arquivo JSON com metadados do curso'
+    )
+    
+    parser.add_argument(
+        '--update-metadata',
+        action='store_true',
+        help='Preenche o campo duration das aulas que ainda não o têm (requer --metadata-file)'
+    )
+    
+    args = parser.parse_args()
+    
+    if not os.path.isdir(args.videos_dir):
+        print(f"❌ Diretório não encontrado: {args.videos_dir}")
+        sys.exit(1)
+    
+    from video_index import VideoIndex
+    index = VideoIndex.load(args.videos_dir)
+    
+    paths = [
+        index.videos_dir / rel_path
+        for rel_paths in index.files.values()
+        for rel_path in rel_paths
+        if Path(rel_path).suffix.lower() in VIDEO_EXTENSIONS
+    ]
+    
+    cache = MediaProbeCache()
+    results = cache.probe_many(paths, args.workers)
+    cache.save()
+    
+    broken = [path for path in sorted(results) if is_broken(results[path])]
+    print(f"📹 Arquivos analisados: {len(results)}")
+    print(f"❌ Arquivos com problema: {len(broken)}")
+    for path in broken:
+        print(f"   • {path}: {describe(results[path])}")
+    
+    if args.metadata_file and args.update_metadata:
+        from metadata_store import MetadataStore
+        store = MetadataStore(args.metadata_file)
+        updated = 0
+        
+        for lesson in store.catalog.missing_durations(published_only=False):
+            path = index.find(lesson['fileName'], lesson.get('module_folder', ''))
+            result = results.get(path) if path else None
+            if result and result.get('complete') and result.get('duration'):
+                store.update_lesson(lesson.id, duration=int(round(result['duration'])))
+                updated += 1
+        
+        store.close()
+        print(f"💾 Durações preenchidas localmente: {updated}")
+
+
+if __name__ == '__main__':
+    main()
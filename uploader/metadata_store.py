@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Metadata Store
+Escrita journaled e indexada do course-metadata.json
+
+Em vez de reescrever o JSON inteiro a cada upload, cada alteração de aula é
+anexada a um journal (uma linha JSON por alteração). Periodicamente, e ao
+final da execução, o journal é compactado no JSON com escrita em arquivo
+temporário + rename atômico, de modo que leitores (ex: sync-from-json.mjs)
+nunca veem um arquivo pela metade.
+
+A compactação não recarrega o documento: o patch_metadata (metadata_stream.py)
+percorre o arquivo em disco e reserializa só as aulas do journal e os totais
+de duração que mudaram.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from atomic_file import atomic_write
+from catalog import Catalog
+from duration_rollups import update_rollups
+from metadata_stream import patch_metadata
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+
+DEFAULT_COMPACT_EVERY = 10
+
+
+def write_json_atomic(path: str, data: Dict):
+    """Grava o JSON em um arquivo temporário exclusivo e o renomeia sobre o destino"""
+    with atomic_write(path, fsync=True) as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+@contextmanager
+def metadata_lock(metadata_file: str):
+    """Lock exclusivo entre processos que gravam o mesmo arquivo de metadados"""
+    if fcntl is None:
+        yield
+        return
+    
+    with open(f"{metadata_file}.lock", 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class MetadataStore:
+    """Metadados do curso com índice por ID de aula e journal de alterações"""
+    
+    def __init__(self, metadata_file: str, compact_every: int = DEFAULT_COMPACT_EVERY):
+        self.metadata_file = metadata_file
+        self.journal_file = f"{metadata_file}.journal"
+        self.compact_every = compact_every
+        self.data: Dict = {}
+        # Índices por aula, vídeo e pendências (recriado a cada recarga do JSON)
+        self.catalog: Optional[Catalog] = None
+        self._journaled = 0
+        
+        self._load()
+    
+    def _locked(self):
+        """Lock exclusivo entre processos que usam o mesmo arquivo de metadados"""
+        return metadata_lock(self.metadata_file)
+    
+    def _read_journal(self) -> List[Dict]:
+        """Lê as entradas do journal, ignorando uma última linha incompleta"""
+        if not os.path.exists(self.journal_file):
+            return []
+        
+        entries = []
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Linha truncada por queda durante a escrita
+                    continue
+        return entries
+    
+    def _build_index(self):
+        """Monta o catálogo (índices por ID da aula, vídeo e pendências)"""
+        self.catalog = Catalog(self.data)
+    
+    def _apply(self, entries: List[Dict]) -> int:
+        """Aplica entradas do journal nos metadados; retorna quantas foram aplicadas"""
+        applied = 0
+        for entry in entries:
+            if self.catalog.update(entry.get('id'), **entry.get('fields', {})) is not None:
+                applied += 1
+        return applied
+    
+    def _load(self):
+        """Carrega o JSON e reaplica alterações que ficaram só no journal"""
+        with self._locked():
+            with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            # Mantém o mesmo objeto em memória: quem guardou uma referência continua válido
+            self.data.clear()
+            self.data.update(data)
+            self._build_index()
+            self._apply(self._read_journal())
+    
+    def lesson(self, lesson_id: str) -> Optional[Dict]:
+        """Retorna a aula pelo ID em O(1)"""
+        lesson = self.catalog.lesson(lesson_id)
+        return lesson.data if lesson else None
+    
+    def update_lesson(self, lesson_id: str, **fields) -> bool:
+        """
+        Atualiza campos de uma aula e registra a alteração no journal
+        Retorna False se a aula não existir
+        """
+        if self.catalog.update(lesson_id, **fields) is None:
+            return False
+        
+        line = json.dumps({'id': lesson_id, 'fields': fields, 'ts': int(time.time())}, ensure_ascii=False) + '\n'
+        
+        with self._locked():
+            fd = os.open(self.journal_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode('utf-8'))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        
+        self._journaled += 1
+        if self.compact_every and self._journaled >= self.compact_every:
+            self.compact()
+        return True
+    
+    def compact(self):
+        """
+        Incorpora o journal ao JSON com rename atômico e esvazia o journal
+        Parte do arquivo em disco para preservar alterações de outros processos
+        """
+        with self._locked():
+            entries = self._read_journal()
+            if entries:
+                # Entradas de outros processos também entram na memória
+                self._apply(entries)
+                
+                # Durações novas: atualiza os totais das seções/módulos dessas aulas
+                changed = {entry.get('id') for entry in entries if 'duration' in entry.get('fields', {})}
+                if changed:
+                    update_rollups(self.data['course'], changed)
+                
+                # No disco, só as aulas alteradas (a última entrada de cada campo vale)
+                updates: Dict[str, Dict] = {}
+                for entry in entries:
+                    updates.setdefault(entry.get('id'), {}).update(entry.get('fields', {}))
+                # Já dentro do lock: o flock não é reentrante entre descritores
+                patch_metadata(self.metadata_file, updates, lock=False)
+                os.remove(self.journal_file)
+        
+        self._journaled = 0
+    
+    def close(self):
+        """Compacta alterações pendentes (chamar ao final da execução)"""
+        if self._journaled or os.path.exists(self.journal_file):
+            self.compact()
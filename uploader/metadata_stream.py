@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Metadata Stream
+Leitura e gravação incrementais do course-metadata.json, sem carregar o documento inteiro
+
+Com vários cursos consolidados em um só arquivo, o JSON chega a dezenas de MB
+e um json.load + json.dump completo custa mais que o resto de uma execução
+pequena. Aqui o arquivo é percorrido em blocos, um valor por vez (campos do
+curso, do módulo e da seção, e cada aula inteira), com memória limitada ao
+bloco lido e à maior aula:
+    - MetadataReader: campos do curso e aulas sob demanda, na ordem do curso;
+      quem só precisa do começo (ex: as primeiras pendências) para de ler ali
+    - patch_metadata: copia o arquivo trecho a trecho, reserializa só as aulas
+      alteradas e os durationStats que mudaram, e troca o arquivo com rename
+      atômico (o resto do texto fica byte a byte como estava)
+
+As aulas lidas são objetos Lesson do catalog.py, com o contexto do módulo e da
+seção (os campos que vêm antes de 'sections' e 'lessons' no JSON).
+
+Uso:
+    python metadata_stream.py
+    python metadata_stream.py --pending 10
+    python metadata_stream.py --stats
+"""
+
+import argparse
+import json
+import os
+import re
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from atomic_file import temp_file_for
+from catalog import Lesson, Module, Section
+from duration_rollups import ROLLUP_KEY, rollup
+
+
+DEFAULT_METADATA_FILE = 'course-metadata.json'
+
+# Caracteres lidos por vez
+CHUNK_SIZE = 64 * 1024
+# Recuo do write_json_atomic (usado nos objetos reserializados)
+INDENT = 2
+
+# Nó → chave dos filhos e nível dos filhos
+CHILDREN = {'course': 'modules', 'module': 'sections', 'section': 'lessons'}
+CHILD_LEVEL = {'course': 'module', 'module': 'section'}
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+
+
+class _Scanner:
+    """
+    Cursor sobre o texto do arquivo, lido em blocos (posições absolutas, em caracteres)
+    Com out, o texto consumido é copiado para out por copy_to/replace; sem out, é descartado
+    """
+    
+    def __init__(self, f, out=None):
+        self.f = f
+        self.out = out
+        self.buf = ''
+        # Posição absoluta de buf[0], do cursor, do início do último valor e do texto já copiado
+        self.base = 0
+        self.pos = 0
+        self.start = 0
+        self.copied = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        """Lê mais um bloco, descartando o texto já consumido (e copiado)"""
+        if self.eof:
+            return False
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        cut = (self.copied if self.out else self.pos) - self.base
+        if cut > 0:
+            self.buf = self.buf[cut:]
+            self.base += cut
+        self.buf += chunk
+        return True
+    
+    def error(self, expected: str) -> ValueError:
+        return ValueError(f"JSON inválido na posição {self.pos}: esperado {expected}")
+    
+    def skip_ws(self) -> str:
+        """Avança sobre espaços; retorna o próximo caractere ('' no fim do arquivo)"""
+        while True:
+            i = WHITESPACE.match(self.buf, self.pos - self.base).end()
+            self.pos = self.base + i
+            if i < len(self.buf):
+                return self.buf[i]
+            if not self._fill():
+                return ''
+    
+    def advance(self) -> str:
+        """Consome o próximo caractere (depois dos espaços) e o retorna"""
+        char = self.skip_ws()
+        self.pos += 1
+        return char
+    
+    def expect(self, char: str):
+        if self.advance() != char:
+            raise self.error(repr(char))
+    
+    def value(self):
+        """Decodifica o valor JSON no cursor (start/pos ficam nas bordas do valor)"""
+        self.skip_ws()
+        self.start = self.pos
+        while True:
+            i = self.start - self.base
+            try:
+                value, end = _decoder.raw_decode(self.buf, i)
+            except json.JSONDecodeError as e:
+                # Valor cortado no fim do bloco: lê mais e tenta de novo
+                if self._fill():
+                    continue
+                raise ValueError(f"JSON inválido na posição {self.base + e.pos}: {e.msg}") from None
+            # Um número no fim do bloco pode continuar no próximo
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = self.base + end
+            return value
+    
+    def indent(self) -> Optional[str]:
+        """Espaços entre o início da linha e o cursor (None se a linha tem outro texto antes)"""
+        i = self.pos - self.base
+        line_start = self.buf.rfind('\n', 0, i) + 1
+        prefix = self.buf[line_start:i]
+        return prefix if line_start and not prefix.strip() else None
+    
+    def copy_to(self, position: int):
+        """Copia para out o texto ainda não copiado até position"""
+        self.out.write(self.buf[self.copied - self.base:position - self.base])
+        self.copied = position
+    
+    def replace(self, start: int, end: int, text: str):
+        """Copia até start, grava text no lugar de [start, end) e segue de end"""
+        self.copy_to(start)
+        self.out.write(text)
+        self.copied = end
+    
+    def copy_rest(self):
+        """Copia o que falta do bloco atual e do arquivo"""
+        self.copy_to(self.base + len(self.buf))
+        for chunk in iter(lambda: self.f.read(CHUNK_SIZE), ''):
+            self.out.write(chunk)
+
+
+def _members(scanner: _Scanner) -> Iterator[Tuple[str, Optional[str]]]:
+    """Chaves (e recuo) de um objeto já aberto; quem itera consome o valor de cada uma"""
+    if scanner.skip_ws() == '}':
+        scanner.pos += 1
+        return
+    
+    while True:
+        scanner.skip_ws()
+        indent = scanner.indent() if scanner.out else None
+        key = scanner.value()
+        if not isinstance(key, str):
+            raise scanner.error('chave')
+        scanner.expect(':')
+        yield key, indent
+        
+        char = scanner.advance()
+        if char == '}':
+            return
+        if char != ',':
+            raise scanner.error("',' ou '}'")
+
+
+def _elements(scanner: _Scanner) -> Iterator[None]:
+    """Posiciona o cursor em cada elemento de um array; quem itera consome o elemento"""
+    scanner.expect('[')
+    if scanner.skip_ws() == ']':
+        scanner.pos += 1
+        return
+    
+    while True:
+        yield
+        char = scanner.advance()
+        if char == ']':
+            return
+        if char != ',':
+            raise scanner.error("',' ou ']'")
+
+
+def _node(scanner: _Scanner, level: str) -> Iterator[Tuple]:
+    """
+    Eventos de um curso, módulo ou seção e dos nós abaixo dele:
+        ('open', nível, campos)            - antes dos filhos (campos lidos até ali)
+        ('lesson', aula, início, fim, recuo)
+        ('stats', nível, totais, início, fim, recuo)
+        ('close', nível, campos, fim do último valor, recuo, nº de campos)
+    """
+    scanner.expect('{')
+    header: Dict = {}
+    opened = False
+    indent = None
+    count = 0
+    value_end = scanner.pos
+    
+    for key, indent in _members(scanner):
+        count += 1
+        if key == CHILDREN[level]:
+            opened = True
+            yield ('open', level, header)
+            for _ in _elements(scanner):
+                if level == 'section':
+                    scanner.skip_ws()
+                    lesson_indent = scanner.indent() if scanner.out else None
+                    data = scanner.value()
+                    yield ('lesson', data, scanner.start, scanner.pos, lesson_indent)
+                else:
+                    yield from _node(scanner, CHILD_LEVEL[level])
+        elif key == ROLLUP_KEY:
+            stats = scanner.value()
+            yield ('stats', level, stats, scanner.start, scanner.pos, indent)
+        else:
+            header[key] = scanner.value()
+        value_end = scanner.pos
+    
+    if not opened:
+        yield ('open', level, header)
+    yield ('close', level, header, value_end, indent, count)
+
+
+def _walk(scanner: _Scanner) -> Iterator[Tuple]:
+    """Eventos do documento, na ordem do arquivo"""
+    scanner.expect('{')
+    for key, _ in _members(scanner):
+        if key == 'course':
+            yield from _node(scanner, 'course')
+        else:
+            scanner.value()
+
+
+def _dumps(value, indent: Optional[str]) -> str:
+    """Serializa um valor como o write_json_atomic, alinhado ao recuo da linha onde começa"""
+    if indent is None:
+        return json.dumps(value, ensure_ascii=False)
+    return json.dumps(value, indent=INDENT, ensure_ascii=False).replace('\n', '\n' + indent)
+
+
+class MetadataReader:
+    """Percorre o course-metadata.json sob demanda (cada método lê o arquivo de novo)"""
+    
+    def __init__(self, metadata_file: str = DEFAULT_METADATA_FILE):
+        self.metadata_file = metadata_file
+    
+    def _events(self) -> Iterator[Tuple]:
+        # newline='': \r\n e \n ficam como estão no arquivo
+        with open(self.metadata_file, 'r', encoding='utf-8', newline='') as f:
+            yield from _walk(_Scanner(f))
+    
+    def course(self) -> Dict:
+        """Campos do curso que vêm antes de 'modules' (lê só o começo do arquivo)"""
+        events = self._events()
+        try:
+            for event in events:
+                if event[0] == 'open' and event[1] == 'course':
+                    return event[2]
+        finally:
+            events.close()
+        raise ValueError(f"{self.metadata_file}: sem o objeto 'course'")
+    
+    def lessons(self) -> Iterator[Lesson]:
+        """Todas as aulas, na ordem do curso (o contexto vem dos campos antes dos filhos)"""
+        module = section = None
+        for event in self._events():
+            if event[0] == 'lesson':
+                yield Lesson(event[1], section)
+            elif event[0] == 'open' and event[1] == 'module':
+                module = Module(event[2], None)
+            elif event[0] == 'open' and event[1] == 'section':
+                section = Section(event[2], module)
+    
+    def published(self) -> Iterator[Lesson]:
+        """Aulas com youtubeUrl, na ordem do curso"""
+        return (lesson for lesson in self.lessons() if lesson.data.get('youtubeUrl'))
+    
+    def pending_uploads(self) -> Iterator[Lesson]:
+        """Aulas sem youtubeUrl, na ordem do curso"""
+        return (lesson for lesson in self.lessons() if not lesson.data.get('youtubeUrl'))
+    
+    def missing_durations(self, published_only: bool = True) -> Iterator[Lesson]:
+        """Aulas sem duration (por padrão só as que já têm vídeo), na ordem do curso"""
+        for lesson in self.lessons():
+            data = lesson.data
+            if not data.get('duration') and not (published_only and not data.get('youtubeUrl')):
+                yield lesson
+    
+    def rollups(self) -> Iterator[Tuple[str, Dict, Dict]]:
+        """Totais gravados: (nível, campos do nó, durationStats) de cada seção, módulo e do curso"""
+        headers: Dict[str, Dict] = {}
+        for event in self._events():
+            if event[0] == 'open':
+                headers[event[1]] = event[2]
+            elif event[0] == 'stats':
+                yield event[1], headers.get(event[1], {}), event[2]
+
+
+class _Unordered(Exception):
+    """durationStats antes dos filhos: os totais não podem ser recalculados em uma passada"""
+
+
+class _Patcher:
+    """Consome os eventos do documento copiando o texto e trocando só o que mudou"""
+    
+    def __init__(self, scanner: _Scanner, updates: Dict[str, Dict]):
+        self.scanner = scanner
+        self.updates = updates
+        # Por nível aberto: durações das aulas, nº de aulas e se já tem durationStats
+        self.durations: Dict[str, List[int]] = {}
+        self.counts: Dict[str, int] = {}
+        self.has_stats: Dict[str, bool] = {}
+        self.found = set()
+        self.result = {'lessons': 0, 'rollups': 0, 'missing': [], 'course': None, 'modules': []}
+    
+    def run(self) -> Dict:
+        for event in _walk(self.scanner):
+            getattr(self, f"_on_{event[0]}")(*event[1:])
+        self.scanner.copy_rest()
+        self.result['missing'] = [lesson_id for lesson_id in self.updates if lesson_id not in self.found]
+        return self.result
+    
+    def _on_open(self, level: str, header: Dict):
+        self.durations[level] = []
+        self.counts[level] = 0
+        self.has_stats[level] = False
+    
+    def _on_lesson(self, data: Dict, start: int, end: int, indent: Optional[str]):
+        fields = self.updates.get(data.get('id'))
+        if fields is not None:
+            self.found.add(data['id'])
+            patched = {**data, **fields}
+            if patched != data:
+                self.scanner.replace(start, end, _dumps(patched, indent))
+                self.result['lessons'] += 1
+                data = patched
+        self.scanner.copy_to(end)
+        
+        duration = data.get('duration')
+        for level in CHILDREN:
+            self.counts[level] += 1
+            if duration:
+                self.durations[level].append(duration)
+    
+    def _stats(self, level: str) -> Dict:
+        return rollup(self.durations[level], self.counts[level])
+    
+    def _on_stats(self, level: str, stats: Dict, start: int, end: int, indent: Optional[str]):
+        if level not in self.counts:
+            raise _Unordered(level)
+        self.has_stats[level] = True
+        current = self._stats(level)
+        if current != stats:
+            self.scanner.replace(start, end, _dumps(current, indent))
+            self.result['rollups'] += 1
+        else:
+            self.scanner.copy_to(end)
+    
+    def _on_close(self, level: str, header: Dict, value_end: int, indent: Optional[str], count: int):
+        stats = self._stats(level)
+        if not self.has_stats[level]:
+            # Nó sem totais: durationStats entra como último campo (como update_rollups faz)
+            separator = (',\n' + indent if indent is not None else ', ') if count else ''
+            self.scanner.replace(value_end, value_end,
+                                 f'{separator}"{ROLLUP_KEY}": {_dumps(stats, indent)}')
+            self.result['rollups'] += 1
+        
+        if level == 'module':
+            self.result['modules'].append((header.get('title'), stats))
+        elif level == 'course':
+            self.result['course'] = stats
+        del self.durations[level], self.counts[level], self.has_stats[level]
+
+
+def _patch_document(metadata_file: str, updates: Dict[str, Dict]) -> Dict:
+    """Mesmo resultado do patch_metadata carregando o documento inteiro (arquivos fora de ordem)"""
+    # metadata_store importa este módulo (compactação do journal)
+    from catalog import Catalog
+    from duration_rollups import update_rollups
+    from metadata_store import write_json_atomic
+    
+    catalog = Catalog.load(metadata_file)
+    result = {'lessons': 0, 'rollups': 0, 'missing': [], 'course': None, 'modules': []}
+    for lesson_id, fields in updates.items():
+        lesson = catalog.lesson(lesson_id)
+        if lesson is None:
+            result['missing'].append(lesson_id)
+        elif {**lesson.data, **fields} != lesson.data:
+            catalog.update(lesson_id, **fields)
+            result['lessons'] += 1
+    
+    result['rollups'] = update_rollups(catalog.course, set(updates))
+    if result['lessons'] or result['rollups']:
+        write_json_atomic(metadata_file, catalog.document)
+    
+    result['course'] = catalog.course[ROLLUP_KEY]
+    result['modules'] = [(module.data.get('title'), module.data[ROLLUP_KEY]) for module in catalog.modules]
+    return result
+
+
+def _patch_file(metadata_file: str, updates: Dict[str, Dict]) -> Dict:
+    """Uma passada de patch_metadata (quem chama já tem o lock do arquivo)"""
+    fd, tmp_file = temp_file_for(metadata_file)
+    try:
+        with open(metadata_file, 'r', encoding='utf-8', newline='') as src, \
+                os.fdopen(fd, 'w', encoding='utf-8', newline='') as dst:
+            result = _Patcher(_Scanner(src, dst), updates).run()
+            dst.flush()
+            os.fsync(dst.fileno())
+    except _Unordered:
+        os.remove(tmp_file)
+        return _patch_document(metadata_file, updates)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    
+    if result['lessons'] or result['rollups']:
+        os.replace(tmp_file, metadata_file)
+    else:
+        os.remove(tmp_file)
+    return result
+
+
+def patch_metadata(metadata_file: str, updates: Optional[Dict[str, Dict]] = None, lock: bool = True) -> Dict:
+    """
+    Aplica updates (ID da aula → campos) ao arquivo em uma passada, com memória limitada
+    Os durationStats de todas as seções, módulos e do curso são recalculados no caminho
+    e só os que mudaram são regravados; o arquivo só é trocado se algo mudou
+    Leitura e troca acontecem sob o lock do MetadataStore (lock=False: quem chama já o tem)
+    Retorna {lessons, rollups (nº de objetos regravados), missing (IDs não encontrados),
+             course (totais do curso), modules ([(título, totais)])}
+    """
+    from metadata_store import metadata_lock
+    
+    updates = updates or {}
+    if not lock:
+        return _patch_file(metadata_file, updates)
+    with metadata_lock(metadata_file):
+        return _patch_file(metadata_file, updates)
+
+
+def _format_hours(seconds: int) -> str:
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pendências e totais do curso lidos sem carregar o JSON inteiro')
+    
+    parser.add_argument(
+        '--metadata-file',
+        default=DEFAULT_METADATA_FILE,
+        help=f'Arquivo JSON com metadados do curso (padrão: {DEFAULT_METADATA_FILE})'
+    )
+    
+    parser.add_argument(
+        '--pending',
+        type=int,
+        metavar='N',
+        help='Lista as N primeiras aulas sem youtubeUrl e para de ler o arquivo ali'
+    )
+    
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Mostra os totais de duração gravados (durationStats) do curso e de cada módulo'
+    )
+    
+    args = parser.parse_args()
+    
+    reader = MetadataReader(args.metadata_file)
+    course = reader.course()
+    print(f"📚 {course.get('title')}")
+    
+    if args.pending is not None:
+        pending = list(islice(reader.pending_uploads(), args.pending))
+        print(f"📤 Primeiras {len(pending)} aulas sem youtubeUrl:")
+        for lesson in pending:
+            print(f"   • {lesson.id}: {lesson['module_title']} / {lesson['title']}")
+        return
+    
+    if args.stats:
+        for level, header, stats in reader.rollups():
+            if level == 'section':
+                continue
+            name = 'TOTAL DO CURSO' if level == 'course' else header.get('title')
+            print(f"⏱️  {name}: {stats['withDuration']}/{stats['lessons']} aulas com duração, "
+                  f"{_format_hours(stats['totalSeconds'])}")
+        return
+    
+    lessons = pending = missing = 0
+    for lesson in reader.lessons():
+        lessons += 1
+        if not lesson.data.get('youtubeUrl'):
+            pending += 1
+        elif not lesson.data.get('duration'):
+            missing += 1
+    print(f"📋 Aulas: {lessons}")
+    print(f"📤 Sem youtubeUrl: {pending}")
+    print(f"⏱️  Com vídeo e sem duração: {missing}")
+
+
+if __name__ == '__main__':
+    main()
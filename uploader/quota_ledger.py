@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+API Quota Ledger
+Registro persistente da quota diária da YouTube Data API compartilhado
+entre youtube_uploader.py, fetch_durations.py e update_youtube_language.py
+
+Os três scripts usam o mesmo projeto do Google Cloud (10.000 unidades/dia,
+reset à meia-noite do horário do Pacífico). Cada chamada é cobrada no ledger
+com o custo conhecido do método, e cada execução verifica antes de começar
+se o saldo cobre o plano, reduzindo-o ou recusando-o se necessário.
+
+Uso:
+    python quota_ledger.py              # mostra o consumo do dia
+"""
+
+import argparse
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from atomic_file import atomic_write
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+try:
+    from zoneinfo import ZoneInfo
+    PACIFIC_TZ = ZoneInfo('America/Los_Angeles')
+except Exception:  # Python < 3.9 ou sistema sem tzdata: aproxima pelo PST
+    PACIFIC_TZ = timezone(timedelta(hours=-8))
+
+
+DEFAULT_LEDGER_FILE = 'api_quota.json'
+DEFAULT_DAILY_QUOTA = 10000
+
+# Custo em unidades de quota de cada método usado pelos scripts
+# https://developers.google.com/youtube/v3/determine_quota_cost
+UNIT_COSTS = {
+    'videos.insert': 1600,
+    'videos.list': 1,
+    'videos.update': 50,
+    'channels.list': 1,
+    'playlistItems.list': 1
+}
+
+
+def quota_day() -> str:
+    """Dia de quota atual (a quota reseta à meia-noite do Pacífico)"""
+    return datetime.now(PACIFIC_TZ).date().isoformat()
+
+
+class QuotaLedger:
+    """Contabiliza as unidades de quota gastas no dia por todos os scripts"""
+    
+    def __init__(self, source: str, daily_quota: int = DEFAULT_DAILY_QUOTA,
+                 ledger_file: str = DEFAULT_LEDGER_FILE):
+        self.source = source
+        self.daily_quota = daily_quota
+        self.ledger_file = ledger_file
+        self.lock_file = f"{ledger_file}.lock"
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def _locked(self):
+        """Lock entre threads e entre processos"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            
+            with open(self.lock_file, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+    
+    def _read(self) -> Dict:
+        """Lê o ledger do dia; um ledger de outro dia equivale a zerado"""
+        today = quota_day()
+        data = None
+        
+        if os.path.exists(self.ledger_file):
+            try:
+                with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ledger de quota inválido, recomeçando: {e}")
+        
+        if not data or data.get('day') != today:
+            data = {'day': today, 'used': 0, 'bySource': {}, 'byMethod': {}}
+        return data
+    
+    def _write(self, data: Dict):
+        with atomic_write(self.ledger_file) as f:
+            json.dump(data, f, indent=2)
+    
+    def snapshot(self) -> Dict:
+        """Consumo do dia: total, por script e por método"""
+        with self._locked():
+            return self._read()
+    
+    def used(self) -> int:
+        """Unidades gastas hoje por todos os scripts"""
+        return self.snapshot()['used']
+    
+    def remaining(self, reserve: int = 0) -> int:
+        """Unidades ainda disponíveis hoje, descontando a reserva"""
+        return max(0, self.daily_quota - self.used() - reserve)
+    
+    def affordable(self, cost_per_item: int, reserve: int = 0) -> int:
+        """Quantos itens de custo cost_per_item o saldo atual cobre"""
+        if cost_per_item <= 0:
+            return 0
+        return self.remaining(reserve) // cost_per_item
+    
+    def charge(self, method: str, count: int = 1) -> int:
+        """
+        Cobra count chamadas do método no ledger
+        Retorna as unidades cobradas
+        """
+        units = UNIT_COSTS.get(method, 1) * count
+        
+        with self._locked():
+            data = self._read()
+            data['used'] += units
+            data['bySource'][self.source] = data['bySource'].get(self.source, 0) + units
+            data['byMethod'][method] = data['byMethod'].get(method, 0) + units
+            self._write(data)
+        
+        return units
+    
+    def exhaust(self):
+        """Marca a quota do dia como esgotada (a API respondeu quotaExceeded)"""
+        with self._locked():
+            data = self._read()
+            data['used'] = max(data['used'], self.daily_quota)
+            data['exhaustedBy'] = self.source
+            self._write(data)
+    
+    def plan(self, items: int, cost_per_item: int, reserve: int = 0) -> int:
+        """
+        Ajusta um plano de items chamadas ao saldo disponível, avisando
+        quando ele precisa ser reduzido. Retorna quantos itens executar
+        """
+        affordable = self.affordable(cost_per_item, reserve)
+        remaining = self.remaining(reserve)
+        
+        if affordable <= 0:
+            print(f"🛑 Quota insuficiente: restam {remaining} unidades hoje "
+                  f"(necessário {cost_per_item} por item)")
+            return 0
+        
+        if affordable < items:
+            print(f"⚠️  Quota cobre apenas {affordable} de {items} itens "
+                  f"({remaining} unidades restantes, {cost_per_item} por item)")
+            return affordable
+        
+        return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mostra o consumo de quota da YouTube Data API no dia')
+    
+    parser.add_argument(
+        '--daily-quota',
+        type=int,
+        default=DEFAULT_DAILY_QUOTA,
+        help=f'Quota diária do projeto (padrão: {DEFAULT_DAILY_QUOTA})'
+    )
+    
+    args = parser.parse_args()
+    
+    data = QuotaLedger('quota_ledger', args.daily_quota).snapshot()
+    
+    print(f"📅 Dia de quota (Pacífico): {data['day']}")
+    print(f"📊 Usado: {data['used']}/{args.daily_quota} unidades")
+    for source, units in sorted(data['bySource'].items()):
+        print(f"   • {source}: {units}")
+    for method, units in sorted(data['byMethod'].items()):
+        print(f"   • {method}: {units}")
+
+
+if __name__ == '__main__':
+    main()
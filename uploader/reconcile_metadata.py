@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+YouTube Metadata Reconciler
+Mantém o snippet dos vídeos publicados igual ao que os metadados do curso definem
+
+Para cada aula com youtubeUrl, renderiza o snippet desejado (título,
+descrição, tags, categoria e idioma) com os mesmos builders do upload
+(video_snippet.py) e compara:
+    1. com o hash do último snippet enviado (upload_state.db): igual → nada a fazer,
+       sem nenhuma chamada à API
+    2. com o snippet publicado (videos.list em lotes de 50): só os vídeos com
+       campos diferentes recebem videos.update
+
+Por padrão apenas mostra o plano (campos que mudariam em cada vídeo e a
+estimativa de quota); --apply executa as atualizações.
+
+Uso:
+    python reconcile_metadata.py            # plano
+    python reconcile_metadata.py --apply    # aplica
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from googleapiclient.errors import HttpError
+    from youtube_client import (
+        connect, CREDENTIALS_FILE, FORCE_SSL_SCOPE, READONLY_SCOPE,
+        SNIPPET_FIELDS, UPDATE_FIELDS, MAX_LIST_IDS
+    )
+except ImportError:
+    print("❌ Erro: Bibliotecas do Google API não encontradas.")
+    print("   Instale com: pip install google-api-python-client google-auth-oauthlib")
+    sys.exit(1)
+
+from async_api import AsyncApiEngine, DEFAULT_CONCURRENCY, DEFAULT_RATE
+from channel_mirror import open_mirror, DEFAULT_MIRROR_FILE
+from metadata_stream import MetadataReader
+from quota_ledger import QuotaLedger, UNIT_COSTS, DEFAULT_DAILY_QUOTA
+from state_store import UploadStateStore, DEFAULT_STATE_FILE
+from telemetry import Telemetry
+from video_cache import VideoCache, DEFAULT_VIDEO_CACHE_FILE
+from video_snippet import build_snippet, snippet_hash, snippet_diff
+
+
+# Escopos: leitura dos snippets publicados e videos.update
+SCOPES = [FORCE_SSL_SCOPE, READONLY_SCOPE]
+DEFAULT_METADATA_FILE = 'course-metadata.json'
+STATE_FILE = DEFAULT_STATE_FILE
+VIDEO_CACHE_FILE = DEFAULT_VIDEO_CACHE_FILE
+MIRROR_FILE = DEFAULT_MIRROR_FILE
+
+
+class MetadataReconciler:
+    """Compara o snippet renderizado de cada aula com o publicado e atualiza só o que mudou"""
+    
+    def __init__(self, metadata_file: str = DEFAULT_METADATA_FILE, credentials_file: str = CREDENTIALS_FILE,
+                 daily_quota: int = DEFAULT_DAILY_QUOTA, reserve_units: int = 0,
+                 client_factory: Optional[Callable] = None,
+                 events_file: Optional[str] = None, metrics_file: Optional[str] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                 check_remote: bool = False):
+        self.metadata_file = metadata_file
+        self.credentials_file = credentials_file
+        # Cria o cliente da API sem OAuth (ex: fake_youtube_server em benchmarks)
+        self.client_factory = client_factory
+        self.clients = None
+        # Campos do curso; as aulas são lidas do arquivo sob demanda
+        self.course: Optional[Dict] = None
+        self.reader: Optional[MetadataReader] = None
+        # Hash do último snippet enviado de cada aula (gravado pelo uploader e pelo --apply)
+        self.state = UploadStateStore(STATE_FILE)
+        # Quota diária compartilhada; reserve_units fica guardado para os uploads
+        self.quota = QuotaLedger('reconcile_metadata', daily_quota)
+        self.reserve_units = reserve_units
+        self.quota_exhausted = False
+        # Eventos JSONL e métricas Prometheus (--events-file / --metrics-file)
+        self.telemetry = Telemetry('reconcile_metadata', events_file, metrics_file)
+        self.concurrency = concurrency
+        self.rate = rate
+        # check_remote: compara com o YouTube mesmo as aulas com hash igual (ex: edições no Studio)
+        self.check_remote = check_remote
+        # Snippets em cache ficam velhos depois de um videos.update
+        self.video_cache = VideoCache(VIDEO_CACHE_FILE)
+        self.mirror = open_mirror(MIRROR_FILE)
+    
+    def authenticate(self):
+        """Autentica com a API do YouTube"""
+        self.clients = connect(self.credentials_file, SCOPES, self.client_factory)
+    
+    def load_metadata(self):
+        """Carrega metadados do curso"""
+        if not os.path.exists(self.metadata_file):
+            print(f"❌ Arquivo de metadados não encontrado: {self.metadata_file}")
+            sys.exit(1)
+        
+        self.reader = MetadataReader(self.metadata_file)
+        self.course = self.reader.course()
+        
+        # Mesmo curso do upload_state.db usado pelo youtube_uploader.py
+        self.state.course_id = self.course.get('id') or Path(self.metadata_file).stem
+        
+        print(f"📚 Curso: {self.course['title']}")
+        print(f"📹 Total de vídeos: {self.course['totalVideos']}\n")
+    
+    def _desired(self) -> List[Dict]:
+        """Snippet renderizado e hash de cada aula publicada, na ordem do curso"""
+        desired = []
+        for lesson in self.reader.published():
+            video_id = lesson.video_id
+            if not video_id:
+                continue
+            snippet = build_snippet(self.course, lesson)
+            desired.append({
+                'lesson_id': lesson.id,
+                'video_id': video_id,
+                'snippet': snippet,
+                'hash': snippet_hash(snippet)
+            })
+        return desired
+    
+    def _stop_on_quota(self, engine: AsyncApiEngine, error: Exception, method: str):
+        if 'quotaExceeded' in str(error):
+            self.telemetry.quota_error('quotaExceeded', method)
+            self.quota.exhaust()
+            self.quota_exhausted = True
+            # Sem quota, as próximas chamadas falhariam da mesma forma
+            engine.stop()
+    
+    async def _fetch_snippets(self, engine: AsyncApiEngine, video_ids: List[str]) -> Dict[str, Dict]:
+        """Snippets publicados de até 50 vídeos em uma chamada videos.list"""
+        try:
+            response = await engine.call('videos.list', lambda youtube: youtube.videos().list(
+                part='snippet',
+                id=','.join(video_ids),
+                fields=SNIPPET_FIELDS
+            ))
+        except Exception as e:
+            self._stop_on_quota(engine, e, 'videos.list')
+            raise
+        
+        return {item['id']: item for item in response.get('items', [])}
+    
+    def plan(self) -> Optional[Dict]:
+        """
+        Compara o snippet desejado de cada aula com o último enviado e com o publicado
+        Retorna {'changes', 'in_sync', 'unchanged', 'not_found', 'failed', 'pending'}
+        (changes: aulas com os campos que diferem e o snippet publicado), ou None sem quota
+        """
+        applied = self.state.applied_hashes()
+        desired = self._desired()
+        
+        # Hash igual ao último enviado (para o mesmo vídeo): nada mudou nos metadados
+        unchanged = []
+        candidates = []
+        for entry in desired:
+            last = applied.get(entry['lesson_id'])
+            if not self.check_remote and last == (entry['video_id'], entry['hash']):
+                unchanged.append(entry)
+            else:
+                candidates.append(entry)
+        
+        video_ids = list(dict.fromkeys(entry['video_id'] for entry in candidates))
+        batches = [video_ids[i:i + MAX_LIST_IDS] for i in range(0, len(video_ids), MAX_LIST_IDS)]
+        if batches:
+            allowed = self.quota.plan(len(batches), UNIT_COSTS['videos.list'], self.reserve_units)
+            if allowed <= 0:
+                return None
+            batches = batches[:allowed]
+            print(f"🔍 Lendo {len(video_ids)} snippets publicados ({len(batches)} chamadas videos.list)...\n")
+        
+        engine = AsyncApiEngine(self.clients, self.concurrency, self.rate, self.telemetry, self.quota)
+        results = engine.run(batches, self._fetch_snippets)
+        
+        remote: Dict[str, Optional[Dict]] = {}
+        failed_ids = set()
+        for batch, found in zip(batches, results):
+            for video_id in batch:
+                if found is None or isinstance(found, Exception):
+                    failed_ids.add(video_id)
+                else:
+                    remote[video_id] = found.get(video_id)
+        for error in {str(found) for found in results if isinstance(found, Exception)}:
+            print(f"⚠️  Erro ao ler snippets: {error}")
+        
+        result = {'changes': [], 'in_sync': [], 'unchanged': unchanged, 'not_found': [], 'failed': [], 'pending': []}
+        for entry in candidates:
+            video_id = entry['video_id']
+            if video_id in failed_ids:
+                result['failed'].append(entry)
+            elif video_id not in remote:
+                # Fora do plano de quota
+                result['pending'].append(entry)
+            elif remote[video_id] is None:
+                result['not_found'].append(entry)
+            else:
+                fields = snippet_diff(entry['snippet'], remote[video_id]['snippet'])
+                if fields:
+                    result['changes'].append({**entry, 'fields': fields, 'remote': remote[video_id]})
+                else:
+                    result['in_sync'].append(entry)
+        
+        result['listCalls'] = len(batches)
+        return result
+    
+    def print_plan(self, plan: Dict):
+        """Mostra as alterações planejadas e a estimativa de quota"""
+        for change in plan['changes']:
+            print(f"✏️  {change['lesson_id']} ({change['video_id']}): {', '.join(change['fields'])}")
+            if 'title' in change['fields']:
+                print(f"   - {change['remote']['snippet'].get('title', '')}")
+                print(f"   + {change['snippet']['title']}")
+        if plan['changes']:
+            print()
+        
+        for entry in plan['not_found']:
+            print(f"🚫 Não encontrado no YouTube: {entry['lesson_id']} ({entry['video_id']})")
+        
+        update_units = len(plan['changes']) * UNIT_COSTS['videos.update']
+        print(f"📋 Plano: {len(plan['changes'])} vídeos a atualizar, {len(plan['in_sync'])} já iguais no YouTube, "
+              f"{len(plan['unchanged'])} sem alterações desde o último envio")
+        print(f"🧮 Quota: {plan['listCalls'] * UNIT_COSTS['videos.list']} unidades de leitura (já gastas) + "
+              f"{update_units} para aplicar ({len(plan['changes'])} × videos.update); "
+              f"restam {self.quota.remaining()} hoje\n")
+    
+    async def _update_snippet(self, engine: AsyncApiEngine, change: Dict) -> Tuple[str, str]:
+        """Envia o snippet publicado com os campos controlados substituídos pelos desejados"""
+        # videos.update substitui o snippet inteiro: parte do publicado (todos os campos graváveis)
+        snippet = dict(change['remote']['snippet'])
+        snippet.update(change['snippet'])
+        try:
+            await engine.call('videos.update', lambda youtube: youtube.videos().update(
+                part='snippet',
+                fields=UPDATE_FIELDS,
+                body={'id': change['video_id'], 'snippet': snippet}
+            ))
+        except HttpError as e:
+            self._stop_on_quota(engine, e, 'videos.update')
+            if self.quota_exhausted:
+                return 'failed', "❌ Erro: Cota da API excedida"
+            return 'failed', f"❌ Erro HTTP: {e}"
+        except Exception as e:
+            return 'failed', f"❌ Erro inesperado: {e}"
+        
+        self.state.mark_applied(change['lesson_id'], change['video_id'], change['hash'])
+        self.video_cache.invalidate(change['video_id'])
+        if self.mirror:
+            self.mirror.record_snippet(change['video_id'], snippet)
+        return 'updated', f"✅ Atualizado: {', '.join(change['fields'])}"
+    
+    def apply(self, plan: Dict) -> Tuple[int, int]:
+        """Executa o plano; retorna (atualizados, falhas)"""
+        # Já iguais no YouTube: só registra o hash (a próxima execução não os consulta)
+        for entry in plan['in_sync']:
+            self.state.mark_applied(entry['lesson_id'], entry['video_id'], entry['hash'])
+        
+        changes = plan['changes']
+        if not changes:
+            return 0, 0
+        
+        allowed = self.quota.plan(len(changes), UNIT_COSTS['videos.update'], self.reserve_units)
+        if allowed <= 0:
+            return 0, 0
+        changes = changes[:allowed]
+        print(f"🚀 Aplicando {len(changes)} atualizações...\n")
+        
+        def report(done: int, total: int, change: Dict, result: Tuple[str, str]):
+            print(f"[{done}/{total}] {change['lesson_id']} ({change['video_id']})")
+            print(f"   {result[1]}")
+        
+        engine = AsyncApiEngine(self.clients, self.concurrency, self.rate, self.telemetry, self.quota)
+        results = engine.run(changes, self._update_snippet, report)
+        self.video_cache.save()
+        print()
+        
+        updated = sum(1 for result in results if result and result[0] == 'updated')
+        failed = sum(1 for result in results if result and result[0] == 'failed')
+        if self.quota_exhausted:
+            print("🛑 Quota diária da API esgotada. Parando execução.\n")
+        return updated, failed
+    
+    def run(self, apply: bool = False):
+        """Plano e, com apply, execução"""
+        plan = self.plan()
+        if plan is None:
+            return
+        self.print_plan(plan)
+        
+        updated = failed = 0
+        if apply:
+            updated, failed = self.apply(plan)
+        elif plan['changes'] or plan['in_sync']:
+            print("💡 Execute com --apply para aplicar o plano\n")
+        
+        # Resumo
+        print("=" * 70)
+        print("📊 RESUMO")
+        print("=" * 70)
+        if apply:
+            print(f"✅ Atualizados: {updated}")
+            print(f"❌ Falhas: {failed + len(plan['failed'])}")
+        else:
+            print(f"✏️  A atualizar: {len(plan['changes'])}")
+            print(f"❌ Falhas de leitura: {len(plan['failed'])}")
+        print(f"✓ Já iguais no YouTube: {len(plan['in_sync'])}")
+        print(f"💤 Sem alterações desde o último envio: {len(plan['unchanged'])}")
+        print(f"🚫 Não encontrados: {len(plan['not_found'])}")
+        print(f"📋 Pendentes (quota): {len(plan['pending'])}")
+        print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Atualiza no YouTube apenas os snippets que mudaram nos metadados do curso',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  # Plano: quais vídeos mudariam e quanto custa
+  python reconcile_metadata.py
+  
+  # Aplica o plano
+  python reconcile_metadata.py --apply
+  
+  # Compara também as aulas sem alteração local (ex: vídeos editados no Studio)
+  python reconcile_metadata.py --check-remote
+        """
+    )
+    
+    parser.add_argument(
+        '--metadata-file',
+        default=DEFAULT_METADATA_FILE,
+        help=f'Arquivo JSON com metadados do curso (padrão: {DEFAULT_METADATA_FILE})'
+    )
+    
+    parser.add_argument(
+        '--credentials',
+        default=CREDENTIALS_FILE,
+        help=f'Arquivo de credenciais OAuth 2.0 (padrão: {CREDENTIALS_FILE})'
+    )
+    
+    parser.add_argument(
+        '--apply',
+        action='store_true',
+        help='Executa as atualizações (sem esta opção apenas mostra o plano)'
+    )
+    
+    parser.add_argument(
+        '--check-remote',
+        action='store_true',
+        help=f'Lê do YouTube também as aulas cujo snippet não mudou desde o último envio ({STATE_FILE})'
+    )
+    
+    parser.add_argument(
+        '--daily-quota',
+        type=int,
+        default=DEFAULT_DAILY_QUOTA,
+        help=f'Quota diária da API do projeto, compartilhada entre os scripts (padrão: {DEFAULT_DAILY_QUOTA})'
+    )
+    
+    parser.add_argument(
+        '--reserve-units',
+        type=int,
+        default=0,
+        help='Unidades de quota que esta execução não pode usar (ex: reservadas para os uploads)'
+    )
+    
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Chamadas à API ao mesmo tempo (padrão: {DEFAULT_CONCURRENCY})'
+    )
+    
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=DEFAULT_RATE,
+        help=f'Máximo de chamadas à API por segundo, 0 = sem limite (padrão: {DEFAULT_RATE:g})'
+    )
+    
+    parser.add_argument(
+        '--events-file',
+        default=None,
+        help='Grava eventos estruturados (JSONL): chamadas à API e erros de quota'
+    )
+    
+    parser.add_argument(
+        '--metrics-file',
+        default=None,
+        help='Grava um snapshot de métricas no formato textfile do Prometheus (ex: .../node_exporter/reconcile_metadata.prom)'
+    )
+    
+    args = parser.parse_args()
+    
+    print("=" * 70)
+    print("🔁 YouTube Metadata Reconciler")
+    print("=" * 70 + "\n")
+    
+    reconciler = MetadataReconciler(
+        metadata_file=args.metadata_file,
+        credentials_file=args.credentials,
+        daily_quota=args.daily_quota,
+        reserve_units=args.reserve_units,
+        events_file=args.events_file,
+        metrics_file=args.metrics_file,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        check_remote=args.check_remote
+    )
+    
+    reconciler.authenticate()
+    reconciler.load_metadata()
+    try:
+        reconciler.run(apply=args.apply)
+    finally:
+        reconciler.state.close()
+        if reconciler.mirror:
+            reconciler.mirror.close()
+        reconciler.telemetry.close()
+
+
+if __name__ == '__main__':
+    main()
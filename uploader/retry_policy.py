@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Retry Policy
+Classifica os erros das chamadas à API em transitórios ou fatais e calcula
+a espera antes da próxima tentativa (backoff exponencial com jitter)
+
+Transitórios (nova tentativa):
+    - HTTP 408, 429, 500, 502, 503 e 504
+    - HTTP 403 por rateLimitExceeded / userRateLimitExceeded
+    - Erros de rede: conexão recusada/resetada, timeout, DNS, SSL, resposta incompleta
+
+Fatais (a aula falha): todos os outros, inclusive quotaExceeded e
+uploadLimitExceeded, que param a execução inteira.
+"""
+
+import http.client
+import random
+import socket
+import ssl
+from typing import Optional
+
+import httplib2
+
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+RETRYABLE_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+NETWORK_ERRORS = (
+    ConnectionError, TimeoutError, socket.timeout, socket.gaierror,
+    http.client.HTTPException, httplib2.ServerNotFoundError
+)
+
+DEFAULT_MAX_RETRIES = 8
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 64.0
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """
+    Motivo da nova tentativa (ex: 'http_503', 'ssl', 'network'),
+    ou None se o erro é fatal
+    """
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is not None:
+        status = int(status)
+        if status in RETRYABLE_STATUS:
+            return f'http_{status}'
+        if status == 403 and any(reason in str(error) for reason in RETRYABLE_REASONS):
+            return 'rate_limit'
+        return None
+    
+    # ssl.SSLError não é ConnectionError: motivo próprio nos eventos e no resumo
+    if isinstance(error, ssl.SSLError):
+        return 'ssl'
+    if isinstance(error, NETWORK_ERRORS):
+        return 'network'
+    return None
+
+
+class RetryPolicy:
+    """Limite de tentativas e espera (full jitter) entre elas"""
+    
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def delay(self, attempt: int) -> float:
+        """Espera antes da tentativa número attempt (1, 2, ...): aleatória em [0, base × 2^(attempt-1)]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+    
+    def should_retry(self, error: Exception, attempt: int) -> Optional[str]:
+        """Motivo da nova tentativa, ou None se o erro é fatal ou as tentativas acabaram"""
+        if attempt >= self.max_retries:
+            return None
+        return classify_error(error)
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Upload State Store
+Estado dos uploads em SQLite (upload_state.db), substituindo
+upload_progress.json e upload_sessions.json
+
+Tabelas (todas indexadas por curso + aula):
+    lessons          - situação atual de cada aula (uploaded/failed), URL e duração
+    attempts         - histórico de tentativas (uma linha por upload ou falha)
+    upload_sessions  - sessões resumable em andamento (URI + último byte confirmado)
+    failures         - última falha de cada aula, com o número de ocorrências
+    applied_snippets - hash do último snippet enviado de cada aula (reconcile_metadata.py)
+
+Cada evento é um UPSERT de uma linha em uma transação curta, em vez de
+reescrever um JSON inteiro. O banco usa WAL e busy_timeout, então vários
+processos (cron, daemon, outro curso) podem gravar ao mesmo tempo.
+
+Na primeira execução, upload_progress.json e upload_sessions.json são
+importados uma única vez e renomeados para *.imported.
+
+Uso:
+    python state_store.py                     # resumo por curso
+    python state_store.py --course curso-id   # falhas de um curso
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+
+DEFAULT_STATE_FILE = 'upload_state.db'
+# Espera até 30s por um lock de escrita de outro processo
+BUSY_TIMEOUT_MS = 30000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lessons (
+    course_id   TEXT NOT NULL,
+    lesson_id   TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    youtube_url TEXT,
+    duration    INTEGER,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (course_id, lesson_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lessons_by_status ON lessons (course_id, status);
+
+CREATE TABLE IF NOT EXISTS attempts (
+    id         INTEGER PRIMARY KEY,
+    course_id  TEXT NOT NULL,
+    lesson_id  TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    reason     TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_by_lesson ON attempts (course_id, lesson_id);
+
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    course_id   TEXT NOT NULL,
+    lesson_id   TEXT NOT NULL,
+    uri         TEXT NOT NULL,
+    byte_offset INTEGER NOT NULL,
+    file        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime       INTEGER NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (course_id, lesson_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS failures (
+    course_id  TEXT NOT NULL,
+    lesson_id  TEXT NOT NULL,
+    reason     TEXT NOT NULL,
+    filename   TEXT,
+    count      INTEGER NOT NULL,
+    first_at   REAL NOT NULL,
+    last_at    REAL NOT NULL,
+    PRIMARY KEY (course_id, lesson_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS applied_snippets (
+    course_id  TEXT NOT NULL,
+    lesson_id  TEXT NOT NULL,
+    video_id   TEXT NOT NULL,
+    hash       TEXT NOT NULL,
+    applied_at REAL NOT NULL,
+    PRIMARY KEY (course_id, lesson_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS imports (
+    source      TEXT PRIMARY KEY,
+    course_id   TEXT NOT NULL,
+    imported_at REAL NOT NULL
+);
+"""
+
+
+class _SharedConnection:
+    """Conexão com o banco e o lock que serializa seu uso, compartilhados pelos stores de cada curso"""
+    
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        self.db: Optional[sqlite3.Connection] = None
+    
+    def get(self) -> sqlite3.Connection:
+        """Abre a conexão na primeira vez (quem chama já tem self.lock)"""
+        if self.db is None:
+            db = sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT_MS / 1000,
+                                 isolation_level=None, check_same_thread=False)
+            db.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = NORMAL')
+            db.executescript(SCHEMA)
+            self.db = db
+        return self.db
+    
+    def close(self):
+        """Fecha a conexão (a próxima operação reabre)"""
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+
+class UploadStateStore:
+    """Progresso, falhas e sessões de upload de um curso"""
+    
+    def __init__(self, db_file: str = DEFAULT_STATE_FILE, course_id: str = '',
+                 shared: Optional[_SharedConnection] = None):
+        self.db_file = db_file
+        self.course_id = course_id
+        # Só o store que abriu a conexão a fecha; os de for_course() a usam emprestada
+        self._owner = shared is None
+        self._shared = shared or _SharedConnection(db_file)
+        self._lock = self._shared.lock
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Conexão compartilhada entre as threads (acesso serializado por self._lock)"""
+        return self._shared.get()
+    
+    @contextmanager
+    def _transaction(self):
+        """Transação de escrita (BEGIN IMMEDIATE: pega o lock de escrita já no início)"""
+        with self._lock:
+            db = self._conn()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn().execute(sql, params).fetchall()
+    
+    def for_course(self, course_id: str = '') -> 'UploadStateStore':
+        """
+        Store de outro curso no mesmo banco, com a mesma conexão e lock (modo multi-curso)
+        O close() dele não faz nada: a conexão é fechada pelo store original
+        """
+        return UploadStateStore(self.db_file, course_id, shared=self._shared)
+    
+    def close(self):
+        """Fecha a conexão (a próxima operação reabre); ignorado nos stores de for_course()"""
+        if self._owner:
+            self._shared.close()
+    
+    def uploaded_ids(self) -> Set[str]:
+        """IDs das aulas já enviadas do curso"""
+        rows = self._query(
+            "SELECT lesson_id FROM lessons WHERE course_id = ? AND status = 'uploaded'",
+            (self.course_id,)
+        )
+        return {row[0] for row in rows}
+    
+    def uploaded_count(self) -> int:
+        return self._query(
+            "SELECT COUNT(*) FROM lessons WHERE course_id = ? AND status = 'uploaded'",
+            (self.course_id,)
+        )[0][0]
+    
+    def failed_count(self) -> int:
+        """Aulas com falha ainda não enviadas (cada aula conta uma vez)"""
+        return self._query(
+            "SELECT COUNT(*) FROM lessons WHERE course_id = ? AND status = 'failed'",
+            (self.course_id,)
+        )[0][0]
+    
+    def failures(self) -> List[Dict]:
+        """Falhas das aulas ainda não enviadas"""
+        rows = self._query(
+            "SELECT lesson_id, reason, filename, count, last_at FROM failures "
+            "WHERE course_id = ? ORDER BY lesson_id",
+            (self.course_id,)
+        )
+        return [
+            {'id': lesson_id, 'reason': reason, 'filename': filename, 'count': count, 'lastAt': last_at}
+            for lesson_id, reason, filename, count, last_at in rows
+        ]
+    
+    def mark_uploaded(self, lesson_id: str, youtube_url: Optional[str] = None, duration: Optional[int] = None):
+        """Registra o upload da aula e descarta sua falha e sessão"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO lessons (course_id, lesson_id, status, youtube_url, duration, updated_at) "
+                "VALUES (?, ?, 'uploaded', ?, ?, ?) "
+                "ON CONFLICT (course_id, lesson_id) DO UPDATE SET "
+                "status = 'uploaded', youtube_url = excluded.youtube_url, "
+                "duration = excluded.duration, updated_at = excluded.updated_at",
+                (self.course_id, lesson_id, youtube_url, duration, now)
+            )
+            db.execute(
+                "INSERT INTO attempts (course_id, lesson_id, status, reason, created_at) "
+                "VALUES (?, ?, 'uploaded', NULL, ?)",
+                (self.course_id, lesson_id, now)
+            )
+            db.execute("DELETE FROM failures WHERE course_id = ? AND lesson_id = ?", (self.course_id, lesson_id))
+            db.execute("DELETE FROM upload_sessions WHERE course_id = ? AND lesson_id = ?", (self.course_id, lesson_id))
+    
+    def applied_hashes(self) -> Dict[str, Tuple[str, str]]:
+        """lesson_id → (video ID, hash do último snippet enviado ao YouTube)"""
+        rows = self._query(
+            "SELECT lesson_id, video_id, hash FROM applied_snippets WHERE course_id = ?",
+            (self.course_id,)
+        )
+        return {row[0]: (row[1], row[2]) for row in rows}
+    
+    def mark_applied(self, lesson_id: str, video_id: str, snippet_hash: str):
+        """Registra o snippet enviado (upload ou reconcile) para a aula"""
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO applied_snippets (course_id, lesson_id, video_id, hash, applied_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (course_id, lesson_id) DO UPDATE SET "
+                "video_id = excluded.video_id, hash = excluded.hash, applied_at = excluded.applied_at",
+                (self.course_id, lesson_id, video_id, snippet_hash, time.time())
+            )
+    
+    def mark_failed(self, lesson_id: str, reason: str, filename: Optional[str] = None):
+        """Registra uma falha; repetições da mesma aula só incrementam o contador"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO lessons (course_id, lesson_id, status, updated_at) VALUES (?, ?, 'failed', ?) "
+                "ON CONFLICT (course_id, lesson_id) DO UPDATE SET status = 'failed', updated_at = excluded.updated_at "
+                "WHERE lessons.status != 'uploaded'",
+                (self.course_id, lesson_id, now)
+            )
+            db.execute(
+                "INSERT INTO attempts (course_id, lesson_id, status, reason, created_at) "
+                "VALUES (?, ?, 'failed', ?, ?)",
+                (self.course_id, lesson_id, reason, now)
+            )
+            db.execute(
+                "INSERT INTO failures (course_id, lesson_id, reason, filename, count, first_at, last_at) "
+                "VALUES (?, ?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT (course_id, lesson_id) DO UPDATE SET "
+                "reason = excluded.reason, filename = excluded.filename, "
+                "count = failures.count + 1, last_at = excluded.last_at",
+                (self.course_id, lesson_id, reason, filename, now, now)
+            )
+    
+    def get_session(self, lesson_id: str, video_path: Path) -> Optional[Dict]:
+        """
+        Retorna a sessão salva da aula, se ela ainda corresponde ao arquivo
+        (mesmo tamanho e mtime); sessões de arquivos alterados são descartadas
+        """
+        rows = self._query(
+            "SELECT uri, byte_offset, size, mtime FROM upload_sessions WHERE course_id = ? AND lesson_id = ?",
+            (self.course_id, lesson_id)
+        )
+        if not rows:
+            return None
+        
+        uri, offset, size, mtime = rows[0]
+        stat = video_path.stat()
+        if size != stat.st_size or mtime != stat.st_mtime_ns:
+            self.remove_session(lesson_id)
+            return None
+        
+        return {'uri': uri, 'offset': offset, 'size': size, 'mtime': mtime}
+    
+    def update_session(self, lesson_id: str, video_path: Path, uri: str, offset: int):
+        """Registra a URI da sessão e o último byte confirmado"""
+        stat = video_path.stat()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO upload_sessions (course_id, lesson_id, uri, byte_offset, file, size, mtime, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (course_id, lesson_id) DO UPDATE SET "
+                "uri = excluded.uri, byte_offset = excluded.byte_offset, file = excluded.file, "
+                "size = excluded.size, mtime = excluded.mtime, updated_at = excluded.updated_at",
+                (self.course_id, lesson_id, uri, offset, str(video_path), stat.st_size, stat.st_mtime_ns, time.time())
+            )
+    
+    def remove_session(self, lesson_id: str):
+        """Remove a sessão de uma aula (upload concluído ou sessão expirada)"""
+        with self._transaction() as db:
+            db.execute("DELETE FROM upload_sessions WHERE course_id = ? AND lesson_id = ?", (self.course_id, lesson_id))
+    
+    def summary(self) -> List[Dict]:
+        """Enviados, falhas e sessões em andamento de todos os cursos do banco"""
+        rows = self._query(
+            "SELECT course_id, SUM(status = 'uploaded'), SUM(status = 'failed') FROM lessons "
+            "GROUP BY course_id ORDER BY course_id"
+        )
+        sessions = dict(self._query("SELECT course_id, COUNT(*) FROM upload_sessions GROUP BY course_id"))
+        return [
+            {'course': course_id, 'uploaded': uploaded, 'failed': failed, 'sessions': sessions.get(course_id, 0)}
+            for course_id, uploaded, failed in rows
+        ]
+    
+    def import_json(self, progress_file: str, sessions_file: str):
+        """
+        Importa upload_progress.json e upload_sessions.json (uma única vez)
+        para o curso atual e renomeia os arquivos para *.imported
+        """
+        for source, loader in ((progress_file, self._import_progress), (sessions_file, self._import_sessions)):
+            if not os.path.exists(source):
+                continue
+            
+            key = os.path.abspath(source)
+            if self._query("SELECT 1 FROM imports WHERE source = ?", (key,)):
+                continue
+            
+            try:
+                with open(source, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Não foi possível importar {source}: {e}")
+                continue
+            
+            with self._transaction() as db:
+                imported = loader(db, data, os.path.getmtime(source))
+                db.execute(
+                    "INSERT INTO imports (source, course_id, imported_at) VALUES (?, ?, ?)",
+                    (key, self.course_id, time.time())
+                )
+            os.replace(source, f"{source}.imported")
+            print(f"📥 {source} importado para {self.db_file} ({imported} registros)")
+    
+    def _import_progress(self, db: sqlite3.Connection, data: Dict, mtime: float) -> int:
+        uploaded = set(data.get('uploaded', []))
+        for lesson_id in uploaded:
+            db.execute(
+                "INSERT OR REPLACE INTO lessons (course_id, lesson_id, status, updated_at) VALUES (?, ?, 'uploaded', ?)",
+                (self.course_id, lesson_id, mtime)
+            )
+        
+        # A lista failed tinha uma entrada por tentativa: vira uma linha por aula com o contador
+        failed = [entry for entry in data.get('failed', []) if entry.get('id') not in uploaded]
+        counts = Counter(entry['id'] for entry in failed)
+        for entry in failed:
+            db.execute(
+                "INSERT INTO attempts (course_id, lesson_id, status, reason, created_at) VALUES (?, ?, 'failed', ?, ?)",
+                (self.course_id, entry['id'], entry.get('reason'), mtime)
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO failures (course_id, lesson_id, reason, filename, count, first_at, last_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.course_id, entry['id'], entry.get('reason', 'unknown'), entry.get('filename'),
+                 counts[entry['id']], mtime, mtime)
+            )
+            db.execute(
+                "INSERT OR IGNORE INTO lessons (course_id, lesson_id, status, updated_at) VALUES (?, ?, 'failed', ?)",
+                (self.course_id, entry['id'], mtime)
+            )
+        
+        return len(uploaded) + len(counts)
+    
+    def _import_sessions(self, db: sqlite3.Connection, data: Dict, mtime: float) -> int:
+        for lesson_id, session in data.items():
+            db.execute(
+                "INSERT OR REPLACE INTO upload_sessions "
+                "(course_id, lesson_id, uri, byte_offset, file, size, mtime, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.course_id, lesson_id, session['uri'], session.get('offset', 0), session.get('file', ''),
+                 session.get('size', 0), session.get('mtime', 0), session.get('updatedAt', mtime))
+            )
+        return len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mostra o estado dos uploads (upload_state.db)')
+    
+    parser.add_argument(
+        '--state-file',
+        default=DEFAULT_STATE_FILE,
+        help=f'Banco SQLite com o estado dos uploads (padrão: {DEFAULT_STATE_FILE})'
+    )
+    
+    parser.add_argument(
+        '--course',
+        default=None,
+        help='Lista as falhas pendentes deste curso (ID do course-metadata.json)'
+    )
+    
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.state_file):
+        print(f"❌ Arquivo não encontrado: {args.state_file}")
+        return
+    
+    store = UploadStateStore(args.state_file)
+    
+    if args.course:
+        store.course_id = args.course
+        print(f"📚 Curso: {args.course}")
+        print(f"✅ Enviados: {store.uploaded_count()}")
+        print(f"❌ Com falha: {store.failed_count()}")
+        for failure in store.failures():
+            print(f"   • {failure['id']}: {failure['reason']} ({failure['count']}x) {failure['filename'] or ''}")
+        return
+    
+    courses = store.summary()
+    if not courses:
+        print("📭 Nenhum upload registrado")
+    for course in courses:
+        print(f"📚 {course['course']}: {course['uploaded']} enviados, {course['failed']} com falha, "
+              f"{course['sessions']} uploads em andamento")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Telemetry
+Eventos estruturados (JSONL) e métricas no formato textfile do Prometheus
+
+Cada script grava um evento por linha no arquivo de eventos:
+    chunk_sent         - lessonId, bytes, ms, offset
+    upload_completed   - lessonId, bytes, seconds, mbps
+    api_call           - method, units, ms, status
+    retry              - reason, attempt, waitSeconds
+    quota_error        - reason, method
+
+O arquivo de métricas é reescrito de forma atômica (tmp + rename) para que o
+textfile collector do node_exporter nunca leia um arquivo pela metade. Use um
+arquivo .prom por script, todos no diretório do collector.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from atomic_file import atomic_write
+from quota_ledger import UNIT_COSTS
+
+
+# Limites (segundos) do histograma de latência dos chunks
+CHUNK_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _labels(**labels) -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in sorted(labels.items())]
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _status_of(error: Exception) -> str:
+    """Código HTTP de um HttpError (ou o nome da exceção)"""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    return str(status) if status else type(error).__name__
+
+
+class Telemetry:
+    """Stream de eventos e métricas agregadas de uma execução"""
+    
+    def __init__(self, source: str, events_file: Optional[str] = None, metrics_file: Optional[str] = None):
+        self.source = source
+        self.events_file = events_file
+        self.metrics_file = metrics_file
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._events = open(events_file, 'a', encoding='utf-8', buffering=1) if events_file else None
+        
+        self.chunks = 0
+        self.chunk_bytes = 0
+        self.chunk_seconds = 0.0
+        self.chunk_buckets = [0] * len(CHUNK_BUCKETS)
+        self.uploads = 0
+        self.upload_bytes = 0
+        self.upload_seconds = 0.0
+        self.last_upload_mbps = 0.0
+        # (method, status) → [chamadas, segundos]
+        self.api_calls: Dict[Tuple[str, str], list] = defaultdict(lambda: [0, 0.0])
+        self.api_units: Dict[str, int] = defaultdict(int)
+        self.retries: Dict[str, int] = defaultdict(int)
+        self.retry_seconds = 0.0
+        self.quota_errors: Dict[str, int] = defaultdict(int)
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self._events or self.metrics_file)
+    
+    def emit(self, event: str, **fields):
+        """Grava um evento no arquivo JSONL"""
+        if not self._events:
+            return
+        record = {'ts': round(time.time(), 3), 'source': self.source, 'run': self.run_id, 'event': event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._events.write(line + '\n')
+    
+    def chunk_sent(self, lesson_id: str, nbytes: int, seconds: float, offset: int):
+        with self._lock:
+            self.chunks += 1
+            self.chunk_bytes += nbytes
+            self.chunk_seconds += seconds
+            for i, bound in enumerate(CHUNK_BUCKETS):
+                if seconds <= bound:
+                    self.chunk_buckets[i] += 1
+        self.emit('chunk_sent', lessonId=lesson_id, bytes=nbytes, ms=round(seconds * 1000, 1), offset=offset)
+    
+    def upload_completed(self, lesson_id: str, nbytes: int, seconds: float):
+        mbps = nbytes * 8 / 1_000_000 / seconds if seconds > 0 else 0.0
+        with self._lock:
+            self.uploads += 1
+            self.upload_bytes += nbytes
+            self.upload_seconds += seconds
+            self.last_upload_mbps = mbps
+        self.emit('upload_completed', lessonId=lesson_id, bytes=nbytes,
+                  seconds=round(seconds, 3), mbps=round(mbps, 3))
+        self.write_metrics()
+    
+    def api_call(self, method: str, seconds: float, status: str = '200', units: Optional[int] = None):
+        units = UNIT_COSTS.get(method, 1) if units is None else units
+        with self._lock:
+            entry = self.api_calls[(method, status)]
+            entry[0] += 1
+            entry[1] += seconds
+            self.api_units[method] += units
+        self.emit('api_call', method=method, units=units, ms=round(seconds * 1000, 1), status=status)
+    
+    def retry(self, reason: str, attempt: int = 1, wait_seconds: float = 0.0, **fields):
+        with self._lock:
+            self.retries[reason] += 1
+            self.retry_seconds += wait_seconds
+        self.emit('retry', reason=reason, attempt=attempt, waitSeconds=round(wait_seconds, 3), **fields)
+    
+    def retry_totals(self) -> Tuple[Dict[str, int], float]:
+        """Novas tentativas por motivo e tempo total de espera até agora"""
+        with self._lock:
+            return dict(self.retries), self.retry_seconds
+    
+    def quota_error(self, reason: str, method: str):
+        with self._lock:
+            self.quota_errors[reason] += 1
+        self.emit('quota_error', reason=reason, method=method)
+    
+    def execute(self, method: str, request, units: Optional[int] = None):
+        """Executa request.execute() registrando o api_call (inclusive em caso de erro)"""
+        with self.timed(method, units):
+            return request.execute()
+    
+    @contextmanager
+    def timed(self, method: str, units: Optional[int] = None):
+        """Mede um bloco como uma chamada à API"""
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.api_call(method, time.monotonic() - started, _status_of(e), units)
+            raise
+        self.api_call(method, time.monotonic() - started, '200', units)
+    
+    def write_metrics(self):
+        """Reescreve o snapshot de métricas (formato textfile do Prometheus)"""
+        if not self.metrics_file:
+            return
+        
+        source = self.source
+        with self._lock:
+            lines = [
+                '# HELP youtube_run_start_timestamp_seconds Início da execução',
+                '# TYPE youtube_run_start_timestamp_seconds gauge',
+                f'youtube_run_start_timestamp_seconds{_labels(source=source)} {self.started:.3f}',
+                '# HELP youtube_metrics_timestamp_seconds Momento deste snapshot',
+                '# TYPE youtube_metrics_timestamp_seconds gauge',
+                f'youtube_metrics_timestamp_seconds{_labels(source=source)} {time.time():.3f}',
+                '# HELP youtube_chunk_seconds Latência dos chunks de upload',
+                '# TYPE youtube_chunk_seconds histogram'
+            ]
+            for bound, count in zip(CHUNK_BUCKETS, self.chunk_buckets):
+                lines.append(f'youtube_chunk_seconds_bucket{_labels(source=source, le=bound)} {count}')
+            lines += [
+                f'youtube_chunk_seconds_bucket{_labels(source=source, le="+Inf")} {self.chunks}',
+                f'youtube_chunk_seconds_sum{_labels(source=source)} {self.chunk_seconds:.3f}',
+                f'youtube_chunk_seconds_count{_labels(source=source)} {self.chunks}',
+                '# HELP youtube_chunk_bytes_total Bytes enviados em chunks',
+                '# TYPE youtube_chunk_bytes_total counter',
+                f'youtube_chunk_bytes_total{_labels(source=source)} {self.chunk_bytes}',
+                '# HELP youtube_uploads_completed_total Uploads concluídos',
+                '# TYPE youtube_uploads_completed_total counter',
+                f'youtube_uploads_completed_total{_labels(source=source)} {self.uploads}',
+                '# HELP youtube_upload_bytes_total Bytes dos uploads concluídos',
+                '# TYPE youtube_upload_bytes_total counter',
+                f'youtube_upload_bytes_total{_labels(source=source)} {self.upload_bytes}',
+                '# HELP youtube_upload_seconds_total Tempo total dos uploads concluídos',
+                '# TYPE youtube_upload_seconds_total counter',
+                f'youtube_upload_seconds_total{_labels(source=source)} {self.upload_seconds:.3f}',
+                '# HELP youtube_upload_last_mbps Vazão do último upload concluído (Mbit/s)',
+                '# TYPE youtube_upload_last_mbps gauge',
+                f'youtube_upload_last_mbps{_labels(source=source)} {self.last_upload_mbps:.3f}',
+                '# HELP youtube_api_calls_total Chamadas à API por método e status',
+                '# TYPE youtube_api_calls_total counter'
+            ]
+            for (method, status), (count, _) in sorted(self.api_calls.items()):
+                lines.append(f'youtube_api_calls_total{_labels(source=source, method=method, status=status)} {count}')
+            lines += [
+                '# HELP youtube_api_call_seconds_total Tempo total das chamadas à API',
+                '# TYPE youtube_api_call_seconds_total counter'
+            ]
+            for (method, status), (_, seconds) in sorted(self.api_calls.items()):
+                lines.append(f'youtube_api_call_seconds_total{_labels(source=source, method=method, status=status)} {seconds:.3f}')
+            lines += [
+                '# HELP youtube_api_units_total Unidades de quota gastas por método',
+                '# TYPE youtube_api_units_total counter'
+            ]
+            for method, units in sorted(self.api_units.items()):
+                lines.append(f'youtube_api_units_total{_labels(source=source, method=method)} {units}')
+            lines += [
+                '# HELP youtube_retries_total Novas tentativas por motivo',
+                '# TYPE youtube_retries_total counter'
+            ]
+            for reason, count in sorted(self.retries.items()):
+                lines.append(f'youtube_retries_total{_labels(source=source, reason=reason)} {count}')
+            lines += [
+                '# HELP youtube_retry_wait_seconds_total Tempo de espera antes das novas tentativas',
+                '# TYPE youtube_retry_wait_seconds_total counter',
+                f'youtube_retry_wait_seconds_total{_labels(source=source)} {self.retry_seconds:.3f}',
+                '# HELP youtube_quota_errors_total Erros de quota/limite da API',
+                '# TYPE youtube_quota_errors_total counter'
+            ]
+            for reason, count in sorted(self.quota_errors.items()):
+                lines.append(f'youtube_quota_errors_total{_labels(source=source, reason=reason)} {count}')
+        
+        with atomic_write(self.metrics_file) as f:
+            f.write('\n'.join(lines) + '\n')
+    
+    def close(self):
+        """Grava o snapshot final e fecha o arquivo de eventos"""
+        self.write_metrics()
+        with self._lock:
+            if self._events:
+                self._events.close()
+                self._events = None
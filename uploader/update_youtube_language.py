@@ -12,85 +12,78 @@ Uso:
 """
 
 import argparse
-import json
 import os
 import sys
-import re
-from typing import Dict, List, Optional
-import time
+from typing import Callable, Dict, List, Optional, Tuple
 
 try:
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-    from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
+    from youtube_client import (
+        connect, CREDENTIALS_FILE, FORCE_SSL_SCOPE, READONLY_SCOPE,
+        SNIPPET_FIELDS, UPDATE_FIELDS
+    )
 except ImportError:
     print("❌ Erro: Bibliotecas do Google API não encontradas.")
     print("   Instale com: pip install google-api-python-client google-auth-oauthlib")
     sys.exit(1)
 
+from async_api import AsyncApiEngine, DEFAULT_CONCURRENCY, DEFAULT_RATE
+from channel_mirror import open_mirror, DEFAULT_MIRROR_FILE
+from metadata_stream import MetadataReader
+from quota_ledger import QuotaLedger, UNIT_COSTS, DEFAULT_DAILY_QUOTA
+from telemetry import Telemetry
+from video_cache import VideoCache, DEFAULT_VIDEO_CACHE_FILE, conditional, not_modified
+from video_snippet import lesson_language
+
 
 # Escopos necessários para atualizar vídeos
 # youtube.force-ssl: Permite atualizar metadados de vídeos existentes
 # youtube.readonly: Permite ler informações dos vídeos
-SCOPES = [
-    'https://www.googleapis.com/auth/youtube.force-ssl',
-    'https://www.googleapis.com/auth/youtube.readonly'
-]
-TOKEN_FILE = 'youtube_token.json'
-CREDENTIALS_FILE = 'client_secret.json'
+SCOPES = [FORCE_SSL_SCOPE, READONLY_SCOPE]
 DEFAULT_METADATA_FILE = 'course-metadata.json'
+VIDEO_CACHE_FILE = DEFAULT_VIDEO_CACHE_FILE
+MIRROR_FILE = DEFAULT_MIRROR_FILE
 
 
 class YouTubeLanguageUpdater:
     """Atualiza metadados de idioma de vídeos do YouTube"""
     
-    def __init__(self, metadata_file: str = DEFAULT_METADATA_FILE, credentials_file: str = CREDENTIALS_FILE):
+    def __init__(self, metadata_file: str = DEFAULT_METADATA_FILE, credentials_file: str = CREDENTIALS_FILE,
+                 daily_quota: int = DEFAULT_DAILY_QUOTA, reserve_units: int = 0,
+                 client_factory: Optional[Callable] = None,
+                 events_file: Optional[str] = None, metrics_file: Optional[str] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                 refresh_cache: bool = False):
         self.metadata_file = metadata_file
         self.credentials_file = credentials_file
+        # Cria o cliente da API sem OAuth (ex: fake_youtube_server em benchmarks)
+        self.client_factory = client_factory
+        self.clients = None
         self.youtube = None
-        self.metadata = None
-        
+        # Campos do curso; as aulas são lidas do arquivo sob demanda
+        self.course: Optional[Dict] = None
+        self.reader: Optional[MetadataReader] = None
+        # Quota diária compartilhada; reserve_units fica guardado para os uploads
+        self.quota = QuotaLedger('update_youtube_language', daily_quota)
+        self.reserve_units = reserve_units
+        self.quota_exhausted = False
+        # Eventos JSONL e métricas Prometheus (--events-file / --metrics-file)
+        self.telemetry = Telemetry('update_youtube_language', events_file, metrics_file)
+        # Vídeos em andamento ao mesmo tempo e limite de chamadas/segundo (--concurrency / --rate)
+        self.concurrency = concurrency
+        self.rate = rate
+        # Snippets já consultados (ETag + TTL); refresh_cache revalida todos com a API
+        self.video_cache = VideoCache(VIDEO_CACHE_FILE, refresh_cache)
+        self.cache_hits = 0
+        # Espelho local do canal (channel_mirror.py --sync), se existir; refresh_cache o ignora
+        self.mirror = None if refresh_cache else open_mirror(MIRROR_FILE)
+        self.mirror_videos: Dict[str, Dict] = {}
+        self.mirror_hits = 0
+    
     def authenticate(self):
         """Autentica com a API do YouTube"""
-        creds = None
-        
-        # Carrega token salvo se existir
-        if os.path.exists(TOKEN_FILE):
-            try:
-                creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
-            except Exception as e:
-                print(f"⚠️  Token existente inválido: {e}")
-        
-        # Se não há credenciais válidas, faz login
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                print("🔄 Renovando token de acesso...")
-                creds.refresh(Request())
-            else:
-                if not os.path.exists(self.credentials_file):
-                    print(f"❌ Arquivo de credenciais não encontrado: {self.credentials_file}")
-                    print("\n📋 Como obter credenciais:")
-                    print("   1. Acesse: https://console.cloud.google.com/")
-                    print("   2. Crie um projeto (ou selecione existente)")
-                    print("   3. Ative a YouTube Data API v3")
-                    print("   4. Crie credenciais OAuth 2.0 (Desktop app)")
-                    print("   5. Baixe o JSON e salve como 'client_secret.json'")
-                    sys.exit(1)
-                
-                print("🔐 Iniciando autenticação OAuth...")
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_file, SCOPES)
-                creds = flow.run_local_server(port=8080)
-            
-            # Salva token para uso futuro
-            with open(TOKEN_FILE, 'w') as token:
-                token.write(creds.to_json())
-            print("✅ Token salvo com sucesso!")
-        
-        self.youtube = build('youtube', 'v3', credentials=creds)
-        print("✅ Autenticado com sucesso!\n")
+        self.clients = connect(self.credentials_file, SCOPES, self.client_factory)
+        self.youtube = self.clients.client()
     
     def load_metadata(self):
         """Carrega metadados do curso"""
@@ -98,84 +91,85 @@ class YouTubeLanguageUpdater:
             print(f"❌ Arquivo de metadados não encontrado: {self.metadata_file}")
             sys.exit(1)
         
-        with open(self.metadata_file, 'r', encoding='utf-8') as f:
-            self.metadata = json.load(f)
+        self.reader = MetadataReader(self.metadata_file)
+        self.course = self.reader.course()
         
-        print(f"📚 Curso: {self.metadata['course']['title']}")
-        print(f"📹 Total de vídeos: {self.metadata['course']['totalVideos']}\n")
+        print(f"📚 Curso: {self.course['title']}")
+        print(f"📹 Total de vídeos: {self.course['totalVideos']}\n")
     
-    def _extract_video_id(self, youtube_url: str) -> Optional[str]:
-        """Extrai video ID de uma URL do YouTube"""
-        if not youtube_url:
-            return None
-        
-        # Suporta vários formatos de URL
-        patterns = [
-            r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',  # youtube.com/watch?v=ID ou youtu.be/ID
-            r'(?:embed\/)([0-9A-Za-z_-]{11})',   # youtube.com/embed/ID
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, youtube_url)
-            if match:
-                return match.group(1)
-        
-        return None
+    def _has_language(self, snippet: Dict, language: str) -> bool:
+        return snippet.get('defaultLanguage', '') == language and snippet.get('defaultAudioLanguage', '') == language
+    
+    def _mirror_language_ok(self, video_id: str, language: str) -> bool:
+        """O espelho do canal mostra o vídeo com o idioma certo"""
+        video = self.mirror_videos.get(video_id)
+        return bool(video) and video['default_language'] == language and video['default_audio_language'] == language
+    
+    def _cached_language_ok(self, video_info: Dict) -> bool:
+        """O espelho ou o snippet em cache (dentro do TTL) já tem o idioma: o vídeo não custa nenhuma chamada"""
+        if self._mirror_language_ok(video_info['video_id'], video_info['language']):
+            return True
+        item = self.video_cache.get(video_info['video_id'], 'snippet')
+        return bool(item) and self._has_language(item['snippet'], video_info['language'])
     
-    def _get_language(self, lesson: Dict) -> Optional[str]:
+    async def _get_current_video_metadata(self, engine: AsyncApiEngine, video_id: str,
+                                          revalidate: bool = False) -> Tuple[Optional[Dict], bool]:
         """
-        Obtém o idioma do vídeo
-        Prioridade: lesson.language > course.language
-        Retorna código ISO 639-1 (ex: 'pt-BR', 'en', 'es')
+        Busca metadados atuais do vídeo no YouTube
+        Retorna (item, veio do cache sem consultar a API); revalidate=True ignora o TTL
         """
-        # Primeiro tenta obter do lesson
-        if lesson.get('language'):
-            return lesson['language']
+        if not revalidate:
+            cached = self.video_cache.get(video_id, 'snippet')
+            if cached is not None:
+                self.cache_hits += 1
+                return cached, True
         
-        # Se não tiver no lesson, usa o do course
-        if self.metadata and self.metadata.get('course', {}).get('language'):
-            return self.metadata['course']['language']
-        
-        return None
-    
-    def _get_current_video_metadata(self, video_id: str) -> Optional[Dict]:
-        """Busca metadados atuais do vídeo no YouTube"""
+        etag = self.video_cache.etag(video_id, 'snippet')
         try:
-            request = self.youtube.videos().list(
+            response = await engine.call('videos.list', lambda youtube: conditional(youtube.videos().list(
                 part='snippet',
-                id=video_id
-            )
-            response = request.execute()
-            
-            if 'items' in response and len(response['items']) > 0:
-                return response['items'][0]
-            
-            return None
-        except Exception as e:
-            print(f"⚠️  Erro ao buscar metadados do vídeo {video_id}: {e}")
-            return None
+                id=video_id,
+                fields=SNIPPET_FIELDS
+            ), etag))
+        except HttpError as e:
+            # 304: o snippet em cache continua atual
+            if not_modified(e):
+                return self.video_cache.renew(video_id, 'snippet'), False
+            raise
+        
+        if 'items' in response and len(response['items']) > 0:
+            self.video_cache.store(video_id, 'snippet', response['items'][0], response.get('etag'))
+            return response['items'][0], False
+        
+        self.video_cache.invalidate(video_id)
+        return None, False
     
-    def update_video_language(self, video_id: str, language: str) -> bool:
+    async def update_video_language(self, engine: AsyncApiEngine, video_id: str, language: str) -> Tuple[str, str]:
         """
         Atualiza o idioma de um vídeo no YouTube
-        Retorna True se bem-sucedido, False caso contrário
+        Retorna (status, mensagem), com status 'updated', 'unchanged' ou 'failed'
         """
+        if self._mirror_language_ok(video_id, language):
+            self.mirror_hits += 1
+            return 'unchanged', f"✓ Idioma já está correto: {language} (espelho do canal)"
+        
+        method = 'videos.list'
         try:
             # Busca metadados atuais do vídeo
-            video_data = self._get_current_video_metadata(video_id)
+            video_data, cached = await self._get_current_video_metadata(engine, video_id)
+            if video_data and cached and not self._has_language(video_data['snippet'], language):
+                # videos.update substitui o snippet inteiro: confirma o snippet em cache com a API
+                video_data, cached = await self._get_current_video_metadata(engine, video_id, revalidate=True)
             if not video_data:
-                print(f"⚠️  Vídeo {video_id} não encontrado no YouTube")
-                return False
+                return 'failed', f"⚠️  Vídeo {video_id} não encontrado no YouTube"
             
-            snippet = video_data['snippet']
+            # Cópia: o item pode ser o mesmo objeto guardado no cache
+            snippet = dict(video_data['snippet'])
             
             # Verifica se o idioma já está correto
-            current_lang = snippet.get('defaultLanguage', '')
-            current_audio_lang = snippet.get('defaultAudioLanguage', '')
-            
-            if current_lang == language and current_audio_lang == language:
-                print(f"   ✓ Idioma já está correto: {language}")
-                return True
+            if self._has_language(snippet, language):
+                source = " (cache)" if cached else ""
+                return 'unchanged', f"✓ Idioma já está correto: {language}{source}"
             
             # Atualiza o snippet com o novo idioma
             snippet['defaultLanguage'] = language
@@ -188,84 +182,118 @@ class YouTubeLanguageUpdater:
             }
             
             # Atualiza o vídeo
-            request = self.youtube.videos().update(
+            method = 'videos.update'
+            await engine.call(method, lambda youtube: youtube.videos().update(
                 part='snippet',
+                fields=UPDATE_FIELDS,
                 body=body
-            )
-            response = request.execute()
-            
-            print(f"   ✅ Idioma atualizado: {language}")
-            return True
+            ))
+            # O snippet em cache ficou velho
+            self.video_cache.invalidate(video_id)
+            if self.mirror:
+                self.mirror.set_language(video_id, language)
             
+            return 'updated', f"✅ Idioma atualizado: {language}"
+        
         except HttpError as e:
             error_details = str(e)
             if 'quotaExceeded' in error_details:
-                print(f"   ❌ Erro: Cota da API excedida")
-                print(f"      Aguarde antes de tentar novamente")
+                self.telemetry.quota_error('quotaExceeded', method)
+                self.quota.exhaust()
+                self.quota_exhausted = True
+                # Sem quota, as próximas chamadas falhariam da mesma forma
+                engine.stop()
+                return 'failed', "❌ Erro: Cota da API excedida\n      Aguarde antes de tentar novamente"
             elif 'forbidden' in error_details.lower() or 'insufficientPermissions' in error_details:
-                print(f"   ❌ Erro: Sem permissão para atualizar este vídeo")
+                return 'failed', "❌ Erro: Sem permissão para atualizar este vídeo"
             else:
-                print(f"   ❌ Erro HTTP: {e}")
-            return False
+                return 'failed', f"❌ Erro HTTP: {e}"
         except Exception as e:
-            print(f"   ❌ Erro inesperado: {e}")
-            return False
+            return 'failed', f"❌ Erro inesperado: {e}"
+    
+    def _print_video(self, position: int, total: int, video_info: Dict):
+        print(f"[{position}/{total}] {video_info['lesson_id']}: {video_info['lesson_title'][:50]}...")
+        print(f"   Video ID: {video_info['video_id']}")
+        print(f"   Idioma: {video_info['language']}")
     
     def update_all_videos(self, dry_run: bool = False):
         """Atualiza idioma de todos os vídeos que têm youtubeUrl"""
         videos_to_update = []
         
         # Coleta todos os vídeos que precisam ser atualizados
-        for module in self.metadata['course']['modules']:
-            for section in module['sections']:
-                for lesson in section['lessons']:
-                    if lesson.get('youtubeUrl'):
-                        language = self._get_language(lesson)
-                        if language:
-                            video_id = self._extract_video_id(lesson['youtubeUrl'])
-                            if video_id:
-                                videos_to_update.append({
-                                    'lesson_id': lesson['id'],
-                                    'lesson_title': lesson['title'],
-                                    'video_id': video_id,
-                                    'youtube_url': lesson['youtubeUrl'],
-                                    'language': language
-                                })
+        for lesson in self.reader.published():
+            language = lesson_language(self.course, lesson)
+            video_id = lesson.video_id
+            if language and video_id:
+                videos_to_update.append({
+                    'lesson_id': lesson.id,
+                    'lesson_title': lesson['title'],
+                    'video_id': video_id,
+                    'youtube_url': lesson['youtubeUrl'],
+                    'language': language
+                })
         
         if not videos_to_update:
             print("✅ Nenhum vídeo encontrado para atualizar!")
             return
         
         print(f"📋 Vídeos encontrados: {len(videos_to_update)}")
+        if self.mirror:
+            self.mirror_videos = self.mirror.videos(video_info['video_id'] for video_info in videos_to_update)
         if dry_run:
             print("🔍 Modo DRY RUN - Nenhuma alteração será feita\n")
         else:
+            # Cada vídeo custa uma leitura (list) e, no pior caso, uma atualização (update);
+            # os que o cache já mostra com o idioma certo não custam nada
+            cost_per_video = UNIT_COSTS['videos.list'] + UNIT_COSTS['videos.update']
+            costly = [video_info for video_info in videos_to_update if not self._cached_language_ok(video_info)]
+            if costly:
+                allowed = self.quota.plan(len(costly), cost_per_video, self.reserve_units)
+                if allowed <= 0:
+                    return
+                deferred = {id(video_info) for video_info in costly[allowed:]}
+                videos_to_update = [video_info for video_info in videos_to_update if id(video_info) not in deferred]
             print("🚀 Iniciando atualização...\n")
         
         success_count = 0
+        unchanged_count = 0
         fail_count = 0
         skip_count = 0
         
-        for i, video_info in enumerate(videos_to_update, 1):
-            print(f"[{i}/{len(videos_to_update)}] {video_info['lesson_id']}: {video_info['lesson_title'][:50]}...")
-            print(f"   Video ID: {video_info['video_id']}")
-            print(f"   Idioma: {video_info['language']}")
+        if dry_run:
+            for i, video_info in enumerate(videos_to_update, 1):
+                self._print_video(i, len(videos_to_update), video_info)
+                if self._cached_language_ok(video_info):
+                    print(f"   ✓ [DRY RUN] Idioma já está correto: {video_info['language']} (cache/espelho)")
+                    unchanged_count += 1
+                else:
+                    print(f"   🔍 [DRY RUN] Seria atualizado para: {video_info['language']}")
+                    skip_count += 1
+                print()
+        else:
+            engine = AsyncApiEngine(self.clients, self.concurrency, self.rate, self.telemetry, self.quota)
             
-            if dry_run:
-                print(f"   🔍 [DRY RUN] Seria atualizado para: {video_info['language']}")
-                skip_count += 1
-            else:
-                success = self.update_video_language(video_info['video_id'], video_info['language'])
-                if success:
+            async def handler(engine: AsyncApiEngine, video_info: Dict) -> Tuple[str, str]:
+                return await self.update_video_language(engine, video_info['video_id'], video_info['language'])
+            
+            def report(done: int, total: int, video_info: Dict, result: Tuple[str, str]):
+                # As linhas de cada vídeo saem juntas, na ordem em que terminam
+                self._print_video(done, total, video_info)
+                print(f"   {result[1]}")
+                print()
+            
+            for status, _ in filter(None, engine.run(videos_to_update, handler, report)):
+                if status == 'updated':
                     success_count += 1
+                elif status == 'unchanged':
+                    unchanged_count += 1
                 else:
                     fail_count += 1
-                
-                # Aguarda um pouco entre requisições para evitar rate limiting
-                if i < len(videos_to_update):
-                    time.sleep(1)
             
-            print()
+            self.video_cache.save()
+            
+            if self.quota_exhausted:
+                print("🛑 Quota diária da API esgotada. Parando execução.\n")
         
         # Resumo
         print("=" * 70)
@@ -274,10 +302,16 @@ class YouTubeLanguageUpdater:
         if dry_run:
             print(f"🔍 Modo DRY RUN - Nenhuma alteração foi feita")
             print(f"📋 Vídeos que seriam atualizados: {skip_count}")
+            print(f"✓ Já corretos (cache/espelho): {unchanged_count}")
+            print(f"📈 Total processado: {len(videos_to_update)}")
         else:
-            print(f"✅ Sucessos: {success_count}")
+            print(f"✅ Atualizados: {success_count}")
+            print(f"✓ Já corretos: {unchanged_count}")
             print(f"❌ Falhas: {fail_count}")
-        print(f"📈 Total processado: {len(videos_to_update)}")
+            print(f"📈 Total processado: {success_count + unchanged_count + fail_count} de {len(videos_to_update)}")
+            print(f"🗄️  Cache: {self.cache_hits} snippets sem consultar a API, "
+                  f"{self.video_cache.revalidated} revalidados (304)")
+            print(f"📺 Espelho do canal: {self.mirror_hits} vídeos sem consultar a API")
         print("=" * 70)
 
 
@@ -295,6 +329,9 @@ Exemplos de uso:
   
   # Com arquivo de metadados customizado
   python update_youtube_language.py --metadata-file outro-curso.json
+  
+  # Mais vídeos em paralelo, até 20 chamadas à API por segundo
+  python update_youtube_language.py --concurrency 16 --rate 20
 
 Requisitos:
   1. Instalar dependências: pip install google-api-python-client google-auth-oauthlib
@@ -322,6 +359,52 @@ Requisitos:
         help='Modo dry-run: apenas simula as atualizações sem fazer alterações reais'
     )
     
+    parser.add_argument(
+        '--daily-quota',
+        type=int,
+        default=DEFAULT_DAILY_QUOTA,
+        help=f'Quota diária da API do projeto, compartilhada entre os scripts (padrão: {DEFAULT_DAILY_QUOTA})'
+    )
+    
+    parser.add_argument(
+        '--reserve-units',
+        type=int,
+        default=0,
+        help='Unidades de quota que esta execução não pode usar (ex: reservadas para os uploads)'
+    )
+    
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Vídeos atualizados ao mesmo tempo (padrão: {DEFAULT_CONCURRENCY})'
+    )
+    
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=DEFAULT_RATE,
+        help=f'Máximo de chamadas à API por segundo, 0 = sem limite (padrão: {DEFAULT_RATE:g})'
+    )
+    
+    parser.add_argument(
+        '--refresh-cache',
+        action='store_true',
+        help=f'Ignora o espelho do canal ({MIRROR_FILE}) e o TTL do cache de snippets ({VIDEO_CACHE_FILE}) e revalida todos com a API'
+    )
+    
+    parser.add_argument(
+        '--events-file',
+        default=None,
+        help='Grava eventos estruturados (JSONL): chamadas à API e erros de quota'
+    )
+    
+    parser.add_argument(
+        '--metrics-file',
+        default=None,
+        help='Grava um snapshot de métricas no formato textfile do Prometheus (ex: .../node_exporter/update_youtube_language.prom)'
+    )
+    
     args = parser.parse_args()
     
     print("=" * 70)
@@ -331,12 +414,22 @@ Requisitos:
     # Executa
     updater = YouTubeLanguageUpdater(
         metadata_file=args.metadata_file,
-        credentials_file=args.credentials
+        credentials_file=args.credentials,
+        daily_quota=args.daily_quota,
+        reserve_units=args.reserve_units,
+        events_file=args.events_file,
+        metrics_file=args.metrics_file,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        refresh_cache=args.refresh_cache
     )
     
     updater.authenticate()
     updater.load_metadata()
-    updater.update_all_videos(dry_run=args.dry_run)
+    try:
+        updater.update_all_videos(dry_run=args.dry_run)
+    finally:
+        updater.telemetry.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Upload Planner
+Escolhe quais aulas pendentes enviar em uma janela de upload e em que ordem
+
+Com --order pack, em vez de seguir a ordem do curso, o planner enche a
+janela com o maior número de aulas possível: dado o tempo disponível
+(--pack-hours) e a velocidade do link (--link-mbps), o tempo estimado de
+cada upload é tamanho / velocidade, e as aulas mais rápidas entram primeiro
+(para maximizar a quantidade de aulas, ordenar pelo tempo é a solução ótima
+da mochila). O número de aulas também é limitado pelas vagas do canal e
+pela quota do dia.
+
+--keep-order preserva a ordem do curso por grupo:
+    none     - qualquer aula pendente do curso pode entrar
+    module   - só começa um módulo depois que o anterior cabe inteiro
+    section  - idem, por seção
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+
+ORDER_POLICIES = ('course', 'pack')
+KEEP_ORDER_POLICIES = ('none', 'module', 'section')
+
+
+def _group_key(lesson: Dict, keep_order: str) -> Tuple:
+    if keep_order == 'module':
+        return (lesson.get('module_order', 0),)
+    if keep_order == 'section':
+        return (lesson.get('module_order', 0), lesson.get('section_order', 0))
+    return ()
+
+
+class UploadPlanner:
+    """Empacota as aulas pendentes na janela de upload"""
+    
+    def __init__(self, keep_order: str = 'none', hours: Optional[float] = None, link_mbps: Optional[float] = None):
+        if keep_order not in KEEP_ORDER_POLICIES:
+            raise ValueError(f"Política de ordem inválida: '{keep_order}' (use {', '.join(KEEP_ORDER_POLICIES)})")
+        self.keep_order = keep_order
+        self.hours = hours
+        self.link_mbps = link_mbps
+    
+    def capacity(self, hours: Optional[float] = None, link_mbps: Optional[float] = None) -> Optional[int]:
+        """Bytes que cabem na janela (None = sem limite de tempo)"""
+        hours = self.hours if hours is None else hours
+        link_mbps = self.link_mbps if link_mbps is None else link_mbps
+        if not hours or not link_mbps:
+            return None
+        return int(hours * 3600 * link_mbps * 1_000_000 / 8)
+    
+    def plan(self, lessons: List[Dict], sizes: Dict[str, int], slots: Optional[int] = None,
+             hours: Optional[float] = None, link_mbps: Optional[float] = None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Divide as aulas (na ordem do curso) em (escolhidas, adiadas)
+        As escolhidas vêm agrupadas na ordem do curso e, dentro de cada grupo,
+        da mais rápida para a mais lenta
+        """
+        capacity = self.capacity(hours, link_mbps)
+        
+        groups: Dict[Tuple, List[Tuple[int, Dict]]] = {}
+        for position, lesson in enumerate(lessons):
+            groups.setdefault(_group_key(lesson, self.keep_order), []).append((position, lesson))
+        
+        chosen: List[Dict] = []
+        used = 0
+        for key in sorted(groups):
+            complete = True
+            for position, lesson in sorted(groups[key], key=lambda item: (sizes.get(item[1]['id'], 0), item[0])):
+                size = sizes.get(lesson['id'], 0)
+                if (slots is not None and len(chosen) >= slots) or (capacity is not None and used + size > capacity):
+                    # As próximas são maiores: também não cabem
+                    complete = False
+                    break
+                chosen.append(lesson)
+                used += size
+            
+            # Grupo incompleto: o próximo módulo/seção espera (com keep_order none há um grupo só)
+            if not complete:
+                break
+        
+        # Nada cabe na janela: envia mesmo assim a menor aula do primeiro grupo (a próxima
+        # que o plano escolheria), já que o upload é retomável entre janelas
+        if not chosen and lessons and (slots is None or slots > 0):
+            first = groups[min(groups)]
+            chosen = [min(first, key=lambda item: (sizes.get(item[1]['id'], 0), item[0]))[1]]
+        
+        chosen_ids = {lesson['id'] for lesson in chosen}
+        deferred = [lesson for lesson in lessons if lesson['id'] not in chosen_ids]
+        return chosen, deferred
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Upload Scheduler
+Controla o limite de uploads do canal em uma janela rolante de 24 horas
+
+O YouTube libera cada "vaga" de upload 24 horas depois do upload que a
+ocupou (veja UPLOAD_LIMITS.md). O scheduler registra o horário de cada
+upload bem-sucedido e calcula quando a próxima vaga fica livre. Quando o
+YouTube retorna uploadLimitExceeded, o limite real do canal é aprendido a
+partir do número de uploads dentro da janela.
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from atomic_file import atomic_write
+
+
+DEFAULT_HISTORY_FILE = 'upload_history.json'
+DEFAULT_CHANNEL_LIMIT = 10
+WINDOW_SECONDS = 24 * 60 * 60
+# Sem histórico na janela não há como saber quando a vaga libera: tenta de novo depois de 1h
+UNKNOWN_RETRY_SECONDS = 60 * 60
+# O limite do canal cresce com o tempo: um limite aprendido vale por 7 dias
+LEARNED_LIMIT_TTL = 7 * 24 * 60 * 60
+
+
+class RollingWindowScheduler:
+    """Calcula vagas de upload disponíveis na janela rolante de 24h"""
+    
+    def __init__(self, history_file: str = DEFAULT_HISTORY_FILE, channel_limit: int = DEFAULT_CHANNEL_LIMIT):
+        self.history_file = history_file
+        self.channel_limit = channel_limit
+        self.uploads: List[float] = []
+        self.learned_limit: Optional[int] = None
+        self.learned_at: Optional[float] = None
+        self.blocked_until: Optional[float] = None
+        self._load()
+    
+    def _load(self):
+        """Carrega o histórico de uploads"""
+        if not os.path.exists(self.history_file):
+            return
+        
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Histórico de uploads inválido, ignorando: {e}")
+            return
+        
+        self.uploads = sorted(data.get('uploads', []))
+        self.learned_limit = data.get('learnedLimit')
+        self.learned_at = data.get('learnedAt')
+        self.blocked_until = data.get('blockedUntil')
+    
+    def _save(self):
+        """Salva o histórico de forma atômica"""
+        data: Dict = {
+            'uploads': self.uploads,
+            'learnedLimit': self.learned_limit,
+            'learnedAt': self.learned_at,
+            'blockedUntil': self.blocked_until
+        }
+        with atomic_write(self.history_file) as f:
+            json.dump(data, f, indent=2)
+    
+    def _prune(self, now: float):
+        """Descarta uploads que já saíram da janela"""
+        cutoff = now - WINDOW_SECONDS
+        self.uploads = [ts for ts in self.uploads if ts > cutoff]
+    
+    @property
+    def limit(self) -> int:
+        """Limite efetivo: o configurado ou o aprendido, se for menor e recente"""
+        if self.learned_limit and self.learned_at and time.time() - self.learned_at < LEARNED_LIMIT_TTL:
+            return min(self.channel_limit, self.learned_limit)
+        return self.channel_limit
+    
+    def used(self, now: Optional[float] = None) -> int:
+        """Número de uploads dentro da janela atual"""
+        now = now or time.time()
+        self._prune(now)
+        return len(self.uploads)
+    
+    def available(self, now: Optional[float] = None) -> int:
+        """Número de uploads que podem ser feitos agora"""
+        now = now or time.time()
+        if self.blocked_until and now < self.blocked_until:
+            return 0
+        return max(0, self.limit - self.used(now))
+    
+    def next_slot(self, now: Optional[float] = None) -> float:
+        """Timestamp em que a próxima vaga fica livre"""
+        now = now or time.time()
+        if self.blocked_until and now < self.blocked_until:
+            return self.blocked_until
+        if self.available(now) > 0:
+            return now
+        
+        # A vaga ocupada pelo (used - limit + 1)-ésimo upload mais antigo libera primeiro
+        excess = self.used(now) - self.limit
+        return self.uploads[excess] + WINDOW_SECONDS
+    
+    def record(self, timestamp: Optional[float] = None):
+        """Registra um upload bem-sucedido"""
+        timestamp = timestamp or time.time()
+        self._prune(timestamp)
+        self.uploads.append(timestamp)
+        self.uploads.sort()
+        self.blocked_until = None
+        self._save()
+    
+    def learn_limit(self, now: Optional[float] = None) -> int:
+        """
+        Ajusta o limite após um uploadLimitExceeded
+        Retorna o limite aprendido (uploads registrados na janela)
+        """
+        now = now or time.time()
+        used = self.used(now)
+        
+        if used > 0:
+            self.learned_limit = used
+            self.learned_at = now
+            self.blocked_until = None
+        else:
+            # Uploads feitos fora deste script: não sabemos quando a vaga libera
+            self.blocked_until = now + UNKNOWN_RETRY_SECONDS
+        
+        self._save()
+        return used
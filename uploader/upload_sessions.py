@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Upload Sessions
+Retomada das sessões de upload resumable do YouTube entre execuções
+
+Cada upload em andamento guarda a URI da sessão e o último byte confirmado
+pelo servidor (tabela upload_sessions do state_store.py). Se o script for
+interrompido (Ctrl-C, queda, reboot), a próxima execução consulta a sessão
+e continua de onde parou, em vez de iniciar um novo videos().insert.
+"""
+
+import json
+from typing import Tuple
+
+
+def query_session(http, uri: str, total_size: int) -> Tuple[str, object]:
+    """
+    Consulta o estado de uma sessão de upload resumable
+    O objeto http não deve seguir o 308 como redirect (use googleapiclient.http.build_http)
+    
+    Retorna uma tupla (estado, valor):
+        ('active', offset)     - sessão válida; offset é o próximo byte a enviar
+        ('complete', resposta) - upload já concluído; resposta é o recurso do vídeo
+        ('expired', None)      - sessão inexistente/expirada; é preciso recomeçar
+    """
+    resp, content = http.request(
+        uri,
+        method='PUT',
+        body=b'',
+        headers={
+            'Content-Length': '0',
+            'Content-Range': f'bytes */{total_size}'
+        }
+    )
+    
+    if resp.status == 308:
+        # Range: bytes=0-N → N+1 bytes já confirmados
+        byte_range = resp.get('range')
+        if byte_range:
+            return 'active', int(byte_range.split('-')[-1]) + 1
+        return 'active', 0
+    
+    if resp.status in (200, 201):
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        return 'complete', json.loads(content)
+    
+    return 'expired', None
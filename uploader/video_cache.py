@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Video Cache
+Cache em disco das consultas videos.list, por (video ID, part), com ETag e TTL
+
+Duração e snippet de um vídeo publicado quase nunca mudam, então os scripts
+não precisam consultá-los a cada execução:
+    - Dentro do TTL, o item em cache é usado sem chamar a API
+    - Depois do TTL, a consulta de um vídeo vai com If-None-Match (ETag da
+      resposta anterior); um 304 renova a entrada e o item continua valendo
+    - Consultas em lote (fetch_durations.py, até 50 IDs) não revalidam: o ETag
+      da resposta cobre o lote inteiro, e o lote da próxima execução é outro.
+      Os itens delas são guardados sem ETag e, vencido o TTL, voltam ao lote
+    - Depois de um videos.update nosso, a entrada do vídeo é invalidada
+
+TTL por part: contentDetails (duração) 30 dias, snippet 1 dia, status 1 hora.
+Uma consulta com vários parts usa o menor TTL entre eles. Vídeos ainda em
+processamento e vídeos não encontrados não entram no cache.
+
+Uso:
+    python video_cache.py
+    python video_cache.py --clear
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from atomic_file import atomic_write
+
+
+DEFAULT_VIDEO_CACHE_FILE = 'video_cache.json'
+
+# Segundos de validade de cada part
+PART_TTLS = {
+    'contentDetails': 30 * 86400,
+    'snippet': 86400,
+    'status': 3600
+}
+DEFAULT_TTL = 3600
+
+
+def part_ttl(part: str) -> int:
+    """TTL de uma consulta ('contentDetails,status' usa o menor TTL)"""
+    return min(PART_TTLS.get(name.strip(), DEFAULT_TTL) for name in part.split(','))
+
+
+def conditional(request, etag: Optional[str]):
+    """Adiciona If-None-Match à requisição (se houver ETag) e a retorna"""
+    if etag:
+        request.headers['If-None-Match'] = etag
+    return request
+
+
+def not_modified(error: Exception) -> bool:
+    """A API respondeu 304: o recurso não mudou desde o ETag enviado"""
+    return str(getattr(getattr(error, 'resp', None), 'status', '')) == '304'
+
+
+class VideoCache:
+    """Respostas do videos.list em cache por (video ID, part)"""
+    
+    def __init__(self, cache_file: str = DEFAULT_VIDEO_CACHE_FILE, refresh: bool = False):
+        self.cache_file = cache_file
+        # refresh=True ignora o TTL: toda consulta vai à API (com If-None-Match)
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        # "videoId|part" → {etag, item, fetchedAt}
+        self.entries: Dict[str, Dict] = {}
+        self._dirty = False
+        # Respostas 304 nesta execução
+        self.revalidated = 0
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Cache de vídeos inválido, recriando: {e}")
+    
+    def save(self):
+        """Salva o cache de forma atômica (se houve alterações)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            with atomic_write(self.cache_file) as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            self._dirty = False
+    
+    def _key(self, video_id: str, part: str) -> str:
+        return f"{video_id}|{part}"
+    
+    def get(self, video_id: str, part: str) -> Optional[Dict]:
+        """Item em cache ainda dentro do TTL (None se não há ou venceu)"""
+        if self.refresh:
+            return None
+        with self._lock:
+            entry = self.entries.get(self._key(video_id, part))
+            if entry and time.time() - entry['fetchedAt'] < part_ttl(part):
+                return entry['item']
+        return None
+    
+    def etag(self, video_id: str, part: str) -> Optional[str]:
+        """ETag da última resposta, para revalidar com If-None-Match"""
+        with self._lock:
+            entry = self.entries.get(self._key(video_id, part))
+            return entry.get('etag') if entry else None
+    
+    def renew(self, video_id: str, part: str) -> Optional[Dict]:
+        """Após um 304: renova o TTL e retorna o item em cache"""
+        with self._lock:
+            entry = self.entries.get(self._key(video_id, part))
+            if entry is None:
+                return None
+            entry['fetchedAt'] = time.time()
+            self.revalidated += 1
+            self._dirty = True
+            return entry['item']
+    
+    def store(self, video_id: str, part: str, item: Dict, etag: Optional[str] = None):
+        """Guarda o item de uma resposta (etag só serve para consultas do mesmo vídeo sozinho)"""
+        with self._lock:
+            self.entries[self._key(video_id, part)] = {'etag': etag, 'item': item, 'fetchedAt': time.time()}
+            self._dirty = True
+    
+    def invalidate(self, video_id: str):
+        """Descarta todas as entradas do vídeo (ex: depois de um videos.update)"""
+        prefix = f"{video_id}|"
+        with self._lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+                self._dirty = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mostra ou limpa o cache de consultas videos.list')
+    
+    parser.add_argument(
+        '--cache-file',
+        default=DEFAULT_VIDEO_CACHE_FILE,
+        help=f'Arquivo do cache (padrão: {DEFAULT_VIDEO_CACHE_FILE})'
+    )
+    
+    parser.add_argument(
+        '--clear',
+        action='store_true',
+        help='Apaga o cache (a próxima execução consulta tudo na API)'
+    )
+    
+    args = parser.parse_args()
+    
+    if args.clear:
+        if os.path.exists(args.cache_file):
+            os.remove(args.cache_file)
+        print(f"🗑️  Cache {args.cache_file} apagado")
+        return
+    
+    cache = VideoCache(args.cache_file)
+    now = time.time()
+    by_part: Dict[str, list] = {}
+    for key, entry in cache.entries.items():
+        part = key.split('|', 1)[1]
+        counts = by_part.setdefault(part, [0, 0])
+        counts[0 if now - entry['fetchedAt'] < part_ttl(part) else 1] += 1
+    
+    print(f"🗄️  {args.cache_file}: {len(cache.entries)} entradas")
+    for part, (fresh, expired) in sorted(by_part.items()):
+        print(f"   • {part}: {fresh} válidas, {expired} vencidas (revalidadas com If-None-Match)")
+
+
+if __name__ == '__main__':
+    main()
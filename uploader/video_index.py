@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Video File Index
+Índice persistente nome do arquivo → caminho dos vídeos locais
+
+Evita percorrer a árvore de vídeos (rglob) a cada aula: o diretório é
+varrido uma única vez e o índice é salvo em disco. Nas execuções seguintes
+apenas os diretórios cujo mtime mudou são relidos.
+
+Uso:
+    python video_index.py --videos-dir /caminho/para/videos
+    python video_index.py --videos-dir /caminho/para/videos --metadata-file outro-curso.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from atomic_file import atomic_write
+from catalog import Catalog
+
+
+DEFAULT_INDEX_FILE = 'video_index.json'
+INDEX_VERSION = 1
+
+
+class VideoIndex:
+    """Índice nome do arquivo → caminhos relativos dentro de videos_dir"""
+    
+    def __init__(self, videos_dir: str, index_file: str = DEFAULT_INDEX_FILE):
+        self.videos_dir = Path(videos_dir)
+        self.index_file = index_file
+        # nome do arquivo → lista de caminhos relativos (um arquivo pode existir em várias pastas)
+        self.files: Dict[str, List[str]] = {}
+        # diretório relativo → mtime_ns no momento da varredura
+        self.dirs: Dict[str, int] = {}
+        self.rescanned_dirs = 0
+    
+    @classmethod
+    def load(cls, videos_dir: str, index_file: str = DEFAULT_INDEX_FILE) -> 'VideoIndex':
+        """Carrega o índice do disco, atualizando-o se a árvore mudou"""
+        index = cls(videos_dir, index_file)
+        
+        if not index._read():
+            index.rebuild()
+        else:
+            index.refresh()
+        
+        if index.rescanned_dirs:
+            index.save()
+        return index
+    
+    def _read(self) -> bool:
+        """Lê o índice salvo; retorna False se não existir ou for de outro diretório"""
+        if not os.path.exists(self.index_file):
+            return False
+        
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Índice de vídeos inválido, recriando: {e}")
+            return False
+        
+        if data.get('version') != INDEX_VERSION or data.get('videosDir') != str(self.videos_dir.resolve()):
+            return False
+        
+        self.files = data.get('files', {})
+        self.dirs = data.get('dirs', {})
+        return True
+    
+    def save(self):
+        """Salva o índice de forma atômica"""
+        data = {
+            'version': INDEX_VERSION,
+            'videosDir': str(self.videos_dir.resolve()),
+            'dirs': self.dirs,
+            'files': self.files
+        }
+        with atomic_write(self.index_file) as f:
+            json.dump(data, f, ensure_ascii=False)
+    
+    def rebuild(self):
+        """Varre toda a árvore de vídeos"""
+        print(f"🔍 Indexando vídeos em {self.videos_dir}...")
+        self.files = {}
+        self.dirs = {}
+        self._scan_tree('')
+        print(f"✅ {sum(len(paths) for paths in self.files.values())} arquivos indexados\n")
+    
+    def refresh(self):
+        """Relê apenas os diretórios cujo mtime mudou desde a última varredura"""
+        for rel_dir, mtime in list(self.dirs.items()):
+            if rel_dir not in self.dirs:
+                # Já removido junto com um diretório pai
+                continue
+            
+            try:
+                current = (self.videos_dir / rel_dir).stat().st_mtime_ns
+            except OSError:
+                self._drop_tree(rel_dir)
+                self.rescanned_dirs += 1
+                continue
+            
+            if current != mtime:
+                # Subdiretórios novos são varridos por inteiro
+                for subdir in self._scan_dir(rel_dir):
+                    self._scan_tree(subdir)
+    
+    def _scan_tree(self, rel_dir: str):
+        """Varre um diretório e todos os seus subdiretórios"""
+        for subdir in self._scan_dir(rel_dir):
+            self._scan_tree(subdir)
+    
+    def _scan_dir(self, rel_dir: str) -> List[str]:
+        """
+        Relê um único diretório, substituindo as entradas dele no índice
+        Retorna os subdiretórios ainda não indexados
+        """
+        self.rescanned_dirs += 1
+        if rel_dir in self.dirs:
+            self._drop_files(rel_dir)
+        
+        abs_dir = self.videos_dir / rel_dir
+        try:
+            self.dirs[rel_dir] = abs_dir.stat().st_mtime_ns
+            entries = list(os.scandir(abs_dir))
+        except OSError as e:
+            print(f"⚠️  Não foi possível ler {abs_dir}: {e}")
+            self.dirs.pop(rel_dir, None)
+            return []
+        
+        new_subdirs = []
+        seen_subdirs = set()
+        for entry in entries:
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                seen_subdirs.add(rel_path)
+                if rel_path not in self.dirs:
+                    new_subdirs.append(rel_path)
+            elif entry.is_file():
+                self.files.setdefault(entry.name, []).append(rel_path)
+        
+        # Remove subdiretórios que deixaram de existir
+        for known in [d for d in self.dirs if d and d != rel_dir and os.path.dirname(d) == rel_dir]:
+            if known not in seen_subdirs:
+                self._drop_tree(known)
+        
+        return new_subdirs
+    
+    def _drop_files(self, rel_dir: str):
+        """Remove do índice os arquivos que estão diretamente em rel_dir"""
+        for name in list(self.files):
+            paths = [p for p in self.files[name] if os.path.dirname(p) != rel_dir]
+            if paths:
+                self.files[name] = paths
+            else:
+                del self.files[name]
+    
+    def _drop_tree(self, rel_dir: str):
+        """Remove do índice um diretório e tudo abaixo dele"""
+        prefix = rel_dir + os.sep
+        for d in [d for d in self.dirs if d == rel_dir or d.startswith(prefix)]:
+            self._drop_files(d)
+            del self.dirs[d]
+    
+    def find(self, filename: str, module_folder: str = '') -> Optional[Path]:
+        """
+        Localiza um arquivo pelo nome em O(1)
+        Prioridade: raiz > pasta do módulo > qualquer subpasta
+        """
+        paths = self.files.get(filename)
+        if not paths:
+            return None
+        
+        preferred = [filename]
+        if module_folder:
+            preferred.append(os.path.join(module_folder, filename))
+        for candidate in preferred:
+            if candidate in paths:
+                return self.videos_dir / candidate
+        
+        return self.videos_dir / sorted(paths)[0]
+    
+    def missing(self, lessons: Iterable[Dict]) -> List[Dict]:
+        """Retorna as aulas cujo arquivo não está no índice"""
+        return [
+            lesson for lesson in lessons
+            if not self.find(lesson['fileName'], lesson.get('module_folder', ''))
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Indexa os arquivos de vídeo e lista os que faltam para o curso',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    parser.add_argument(
+        '--videos-dir',
+        required=True,
+        help='Diretório contendo os arquivos de vídeo'
+    )
+    
+    parser.add_argument(
+        '--index-file',
+        default=DEFAULT_INDEX_FILE,
+        help=f'Arquivo do índice (padrão: {DEFAULT_INDEX_FILE})'
+    )
+    
+    parser.add_argument(
+        '--metadata-file',
+        default=None,
+        help='Arquivo JSON com metadados do curso para verificar arquivos ausentes'
+    )
+    
+    parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Ignora o índice salvo e varre toda a árvore novamente'
+    )
+    
+    args = parser.parse_args()
+    
+    if not os.path.isdir(args.videos_dir):
+        print(f"❌ Diretório não encontrado: {args.videos_dir}")
+        sys.exit(1)
+    
+    if args.rebuild:
+        index = VideoIndex(args.videos_dir, args.index_file)
+        index.rebuild()
+        index.save()
+    else:
+        index = VideoIndex.load(args.videos_dir, args.index_file)
+    
+    print(f"📁 Diretórios: {len(index.dirs)}")
+    print(f"📹 Arquivos: {sum(len(paths) for paths in index.files.values())}")
+    
+    if args.metadata_file:
+        missing = index.missing(Catalog.load(args.metadata_file))
+        
+        print(f"❌ Arquivos não encontrados: {len(missing)}")
+        for lesson in missing:
+            print(f"   • {lesson['id']}: {lesson['fileName']}")
+
+
+if __name__ == '__main__':
+    main()
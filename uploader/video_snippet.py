@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Video Snippet
+Snippet (título, descrição, tags, categoria e idioma) de cada aula no YouTube
+
+Fonte única dos metadados que o youtube_uploader.py envia no upload e que o
+reconcile_metadata.py mantém nos vídeos já publicados: mudar o formato do
+título, da descrição ou das tags aqui vale para os dois.
+
+As funções recebem uma aula do catalog.py, que resolve pelo módulo e pela
+seção as chaves module_title, section_order etc. (ou um dict com essas chaves).
+
+O hash do snippet renderizado é gravado no upload_state.db a cada upload ou
+atualização, para o reconcile saber quais aulas mudaram desde então.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+
+# Campos do snippet controlados pelos metadados do curso
+MANAGED_FIELDS = ('title', 'description', 'tags', 'categoryId', 'defaultLanguage', 'defaultAudioLanguage')
+CATEGORY_ID = '27'  # Education
+MAX_TITLE_LENGTH = 100
+
+
+def build_title(course: Dict, lesson: Dict) -> str:
+    """Constrói título do vídeo no formato: SIGLA | MÓDULO | 000 | NOME AULA"""
+    # Extrai sigla do curso (usa campo 'acronym' ou gera do ID)
+    course_id = course.get('acronym', course['id'].upper())
+    
+    module_title = lesson.get('module_title', '')
+    section_order = str(lesson.get('section_order', 0)).zfill(3)  # 001, 002, etc.
+    lesson_title = lesson['title']
+    
+    # Formato: SIGLA | MÓDULO | 000 | NOME AULA
+    title = f"{course_id} | {module_title} | {section_order} | {lesson_title}"
+    
+    # Se ultrapassar 100 caracteres, trunca o nome da aula
+    if len(title) > MAX_TITLE_LENGTH:
+        # Partes fixas do título
+        prefix = f"{course_id} | {module_title} | {section_order} | "
+        
+        # Espaço disponível para o nome da aula
+        available_space = MAX_TITLE_LENGTH - len(prefix)
+        
+        # Trunca o nome da aula
+        if available_space > 0:
+            lesson_title = lesson_title[:available_space]
+        
+        # Reconstrói o título
+        title = f"{prefix}{lesson_title}"
+    
+    return title
+
+
+def build_description(course: Dict, lesson: Dict) -> str:
+    """Constrói descrição do vídeo"""
+    course_title = course['title']
+    module_title = lesson.get('module_title', '')
+    section_title = lesson.get('section_title', '')
+    
+    description = f"{course_title}\n\n"
+    description += f"Módulo {lesson.get('module_order', '')}: {module_title}\n"
+    description += f"Seção {lesson.get('section_order', '')}: {section_title}\n"
+    description += f"Aula {lesson.get('order', '')}: {lesson['title']}\n\n"
+    
+    if lesson.get('type') == 'live':
+        description += "🔴 Gravação de aula ao vivo\n\n"
+    
+    description += "Este vídeo faz parte de um curso privado de gestão de fazendas leiteiras."
+    
+    return description
+
+
+def build_tags(lesson: Dict) -> List[str]:
+    """Constrói tags do vídeo"""
+    tags = [
+        'gestão rural',
+        'pecuária leiteira',
+        'gado de leite',
+        'fazenda',
+        'agronegócio'
+    ]
+    
+    if lesson.get('type') == 'live':
+        tags.append('aula ao vivo')
+    
+    return tags
+
+
+def lesson_language(course: Dict, lesson: Dict) -> Optional[str]:
+    """
+    Obtém o idioma do vídeo
+    Prioridade: lesson.language > course.language
+    Retorna código ISO 639-1 (ex: 'pt-BR', 'en', 'es')
+    """
+    return lesson.get('language') or course.get('language') or None
+
+
+def build_snippet(course: Dict, lesson: Dict) -> Dict:
+    """Snippet completo da aula (como enviado no videos.insert)"""
+    title = build_title(course, lesson)
+    
+    # Limita título a 100 caracteres (limite do YouTube)
+    if len(title) > MAX_TITLE_LENGTH:
+        title = title[:MAX_TITLE_LENGTH - 3] + "..."
+    
+    snippet = {
+        'title': title,
+        'description': build_description(course, lesson),
+        'tags': build_tags(lesson),
+        'categoryId': CATEGORY_ID
+    }
+    
+    # Adiciona idioma se disponível
+    language = lesson_language(course, lesson)
+    if language:
+        snippet['defaultLanguage'] = language
+        snippet['defaultAudioLanguage'] = language
+    
+    return snippet
+
+
+def snippet_hash(snippet: Dict) -> str:
+    """Hash estável dos campos controlados do snippet"""
+    managed = {field: snippet.get(field) for field in MANAGED_FIELDS}
+    encoded = json.dumps(managed, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def snippet_diff(desired: Dict, remote: Dict) -> List[str]:
+    """
+    Campos controlados em que o snippet publicado difere do renderizado
+    (campos que a aula não define, ex: idioma, ficam como estão no YouTube)
+    """
+    return [field for field in MANAGED_FIELDS if field in desired and desired[field] != remote.get(field)]
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+YouTube Client
+Autenticação e clientes da YouTube Data API compartilhados por
+youtube_uploader.py, fetch_durations.py e update_youtube_language.py
+
+- O documento de discovery fica em cache local (youtube_discovery.json) e é
+  renovado a cada 7 dias, em vez de ser baixado a cada execução
+- Cada thread tem um cliente com sua própria conexão HTTP keep-alive
+  (httplib2 não é thread-safe), reaproveitada por todas as chamadas
+- O token é renovado 5 minutos antes de expirar; a renovação é serializada
+  entre threads e entre processos (lock no youtube_token.json), e quem chega
+  depois reaproveita o token já renovado em vez de renovar de novo
+- As máscaras fields= reduzem as respostas aos campos realmente usados
+"""
+
+import json
+import os
+import sys
+import threading
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+from google.auth.credentials import AnonymousCredentials
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build_from_document
+from googleapiclient.http import build_http
+
+from atomic_file import atomic_write
+
+
+TOKEN_FILE = 'youtube_token.json'
+CREDENTIALS_FILE = 'client_secret.json'
+DISCOVERY_FILE = 'youtube_discovery.json'
+DISCOVERY_URL = 'https://youtube.googleapis.com/$discovery/rest?version=v3'
+DISCOVERY_TTL = 7 * 24 * 60 * 60
+# Renova o token com esta antecedência (uploads longos não param no meio para renovar)
+REFRESH_MARGIN = timedelta(minutes=5)
+
+UPLOAD_SCOPE = 'https://www.googleapis.com/auth/youtube.upload'
+READONLY_SCOPE = 'https://www.googleapis.com/auth/youtube.readonly'
+# youtube.force-ssl: permite atualizar metadados de vídeos existentes
+FORCE_SSL_SCOPE = 'https://www.googleapis.com/auth/youtube.force-ssl'
+
+# Máscaras fields= (partial response) das chamadas
+# etag: permite revalidar a consulta com If-None-Match (video_cache.py)
+INSERT_FIELDS = 'id'
+DURATION_FIELDS = 'etag,items(id,contentDetails/duration)'
+# Consulta em lote: a duração e se o YouTube ainda está processando o vídeo
+DURATION_STATUS_FIELDS = 'items(id,contentDetails/duration,status/uploadStatus)'
+# Todos os campos graváveis do snippet: o videos.update substitui o snippet inteiro
+SNIPPET_FIELDS = 'etag,items(id,snippet(title,description,tags,categoryId,defaultLanguage,defaultAudioLanguage))'
+UPDATE_FIELDS = 'id'
+# Espelho do canal (channel_mirror.py): playlist de uploads, páginas da playlist e dados dos vídeos
+CHANNEL_FIELDS = 'items/contentDetails/relatedPlaylists/uploads'
+PLAYLIST_FIELDS = 'nextPageToken,items(etag,snippet/resourceId/videoId)'
+MIRROR_FIELDS = ('items(id,etag,snippet(title,publishedAt,defaultLanguage,defaultAudioLanguage),'
+                 'contentDetails/duration,status(uploadStatus,privacyStatus))')
+# Máximo de IDs por chamada videos.list (mesmo custo de 1 unidade)
+MAX_LIST_IDS = 50
+
+_refresh_lock = threading.Lock()
+_discovery_lock = threading.Lock()
+_discovery: Optional[str] = None
+
+
+@contextmanager
+def _token_lock(token_file: str):
+    """Lock entre processos no arquivo de token"""
+    if fcntl is None:
+        yield
+        return
+    
+    with open(f"{token_file}.lock", 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _utcnow() -> datetime:
+    # google-auth usa datetimes UTC sem fuso
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _save_token(creds: Credentials, token_file: str):
+    """Grava o token de forma atômica"""
+    with atomic_write(token_file, encoding=None) as token:
+        token.write(creds.to_json())
+
+
+class SharedCredentials(Credentials):
+    """Credenciais OAuth com renovação antecipada e compartilhada entre threads e processos"""
+    
+    token_file = TOKEN_FILE
+    
+    def _due(self) -> bool:
+        return self.token is None or (self.expiry is not None and _utcnow() >= self.expiry - REFRESH_MARGIN)
+    
+    def before_request(self, request, method, url, headers):
+        if self._due():
+            self.refresh(request)
+        super().before_request(request, method, url, headers)
+    
+    def refresh(self, request):
+        with _refresh_lock, _token_lock(self.token_file):
+            # Outra thread (mesmo objeto) ou outro processo pode ter renovado enquanto esperávamos
+            if not self._due() or self._adopt_saved_token():
+                return
+            super().refresh(request)
+            _save_token(self, self.token_file)
+    
+    def _adopt_saved_token(self) -> bool:
+        """Usa o token do arquivo se outro processo já o renovou"""
+        try:
+            saved = Credentials.from_authorized_user_file(self.token_file)
+        except (OSError, ValueError):
+            return False
+        
+        if saved.token and saved.token != self.token and saved.expiry \
+                and _utcnow() < saved.expiry - REFRESH_MARGIN:
+            self.token = saved.token
+            self.expiry = saved.expiry
+            return True
+        return False
+
+
+def authenticate(credentials_file: str = CREDENTIALS_FILE, scopes: Optional[List[str]] = None,
+                 token_file: str = TOKEN_FILE) -> SharedCredentials:
+    """
+    Carrega o token salvo (renovando se necessário) ou faz o login OAuth
+    scopes são os escopos exigidos pelo script; o login pede só esses, mais os
+    que o token salvo já tinha (o arquivo é compartilhado: um script não tira
+    do outro as permissões que ele já recebeu)
+    """
+    scopes = scopes or [READONLY_SCOPE]
+    creds = None
+    granted: List[str] = []
+    
+    # Carrega token salvo se existir
+    if os.path.exists(token_file):
+        try:
+            creds = SharedCredentials.from_authorized_user_file(token_file)
+        except Exception as e:
+            print(f"⚠️  Token existente inválido: {e}")
+            print(f"💡 Se você mudou de credenciais, delete o arquivo {token_file} e tente novamente")
+    
+    if creds and not creds.has_scopes(scopes):
+        print("⚠️  O token salvo não tem as permissões necessárias; autenticando novamente")
+        granted = list(creds.scopes or [])
+        creds = None
+    
+    if creds:
+        creds.token_file = token_file
+        if creds._due():
+            print("🔄 Renovando token de acesso...")
+            creds.refresh(Request())
+        return creds
+    
+    if not os.path.exists(credentials_file):
+        print(f"❌ Arquivo de credenciais não encontrado: {credentials_file}")
+        print("\n📋 Como obter credenciais:")
+        print("   1. Acesse: https://console.cloud.google.com/")
+        print("   2. Crie um projeto (ou selecione existente)")
+        print("   3. Ative a YouTube Data API v3")
+        print("   4. Crie credenciais OAuth 2.0 (Desktop app)")
+        print("   5. Baixe o JSON e salve como 'client_secret.json'")
+        sys.exit(1)
+    
+    print("🔐 Iniciando autenticação OAuth...")
+    login_scopes = list(scopes) + [scope for scope in granted if scope not in scopes]
+    flow = InstalledAppFlow.from_client_secrets_file(credentials_file, login_scopes)
+    flow_creds = flow.run_local_server(port=8080)
+    
+    # Salva token para uso futuro
+    with _token_lock(token_file):
+        _save_token(flow_creds, token_file)
+    print("✅ Token salvo com sucesso!")
+    
+    creds = SharedCredentials.from_authorized_user_info(json.loads(flow_creds.to_json()))
+    creds.token_file = token_file
+    return creds
+
+
+def discovery_document(discovery_file: str = DISCOVERY_FILE) -> str:
+    """
+    Documento de discovery da API (JSON)
+    Usa o cache local enquanto tiver menos de 7 dias; depois tenta baixar de novo.
+    Sem rede, usa o cache vencido ou o documento embutido no googleapiclient
+    """
+    global _discovery
+    
+    with _discovery_lock:
+        if _discovery is not None:
+            return _discovery
+        
+        cached = None
+        if os.path.exists(discovery_file):
+            with open(discovery_file, 'r', encoding='utf-8') as f:
+                cached = f.read()
+            if os.path.getmtime(discovery_file) + DISCOVERY_TTL > datetime.now().timestamp():
+                _discovery = cached
+                return _discovery
+        
+        try:
+            with urllib.request.urlopen(DISCOVERY_URL, timeout=10) as response:
+                document = response.read().decode('utf-8')
+            json.loads(document)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Não foi possível atualizar o discovery da API ({e}); usando cópia local")
+            if cached is None:
+                from googleapiclient.discovery_cache import get_static_doc
+                cached = get_static_doc('youtube', 'v3')
+            document = cached
+        
+        # Grava também a cópia local usada no fallback: a próxima tentativa de download fica para daqui a 7 dias
+        with atomic_write(discovery_file) as f:
+            f.write(document)
+        _discovery = document
+        
+        return _discovery
+
+
+class YouTubeClients:
+    """Um cliente da API e uma conexão keep-alive por thread, com as mesmas credenciais"""
+    
+    def __init__(self, credentials, client_factory: Optional[Callable] = None):
+        self.credentials = credentials
+        # Substitui a criação do cliente (ex: fake_youtube_server em benchmarks)
+        self.client_factory = client_factory
+        self._local = threading.local()
+    
+    def http(self) -> AuthorizedHttp:
+        """Conexão HTTP autenticada da thread atual (também usada para consultar sessões de upload)"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=build_http())
+        return http
+    
+    def client(self):
+        """Cliente da API da thread atual"""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            if self.client_factory:
+                client = self.client_factory()
+            else:
+                client = build_from_document(discovery_document(), http=self.http())
+            self._local.client = client
+        return client
+
+
+def connect(credentials_file: str = CREDENTIALS_FILE, scopes: Optional[List[str]] = None,
+            client_factory: Optional[Callable] = None) -> YouTubeClients:
+    """Autentica (ou usa client_factory, sem OAuth) e retorna os clientes por thread"""
+    if client_factory:
+        return YouTubeClients(AnonymousCredentials(), client_factory)
+    
+    clients = YouTubeClients(authenticate(credentials_file, scopes))
+    print("✅ Autenticado com sucesso!\n")
+    return clients
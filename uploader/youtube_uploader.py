@@ -14,99 +14,143 @@ Uso:
 """
 
 import argparse
-import json
 import os
 import sys
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 try:
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-    from googleapiclient.discovery import build
     from googleapiclient.http import MediaFileUpload
     from googleapiclient.errors import HttpError
+    from youtube_client import (
+        connect, CREDENTIALS_FILE, UPLOAD_SCOPE, READONLY_SCOPE,
+        INSERT_FIELDS, DURATION_FIELDS
+    )
 except ImportError:
     print("❌ Erro: Bibliotecas do Google API não encontradas.")
     print("   Instale com: pip install google-api-python-client google-auth-oauthlib")
     sys.exit(1)
 
+from video_index import VideoIndex, DEFAULT_INDEX_FILE
+from upload_sessions import query_session
+from state_store import UploadStateStore, DEFAULT_STATE_FILE
+from metadata_store import MetadataStore
+from catalog import Lesson
+from quota_ledger import QuotaLedger, UNIT_COSTS, DEFAULT_DAILY_QUOTA
+from bandwidth import BandwidthShaper
+from fingerprint import FingerprintStore, DEFAULT_FINGERPRINTS_FILE
+from media_probe import MediaProbeCache, DEFAULT_PROBE_CACHE_FILE, is_broken, describe
+from telemetry import Telemetry
+from video_cache import VideoCache, DEFAULT_VIDEO_CACHE_FILE, conditional, not_modified
+from channel_mirror import open_mirror, DEFAULT_MIRROR_FILE
+from video_snippet import (
+    build_title, build_description, build_tags, lesson_language, build_snippet, snippet_hash
+)
+from retry_policy import RetryPolicy, DEFAULT_MAX_RETRIES, classify_error
+from upload_planner import UploadPlanner, ORDER_POLICIES, KEEP_ORDER_POLICIES
+from upload_scheduler import RollingWindowScheduler, DEFAULT_HISTORY_FILE, DEFAULT_CHANNEL_LIMIT
+from chunk_sizer import (
+    AdaptiveChunkSizer, MB, DEFAULT_CHUNK_SIZE, DEFAULT_MIN_CHUNK_SIZE,
+    DEFAULT_MAX_CHUNK_SIZE, DEFAULT_TARGET_CHUNK_SECONDS, round_chunk_size, set_chunk_size
+)
+
 
 # Escopos necessários para upload de vídeos e leitura de informações
-SCOPES = [
-    'https://www.googleapis.com/auth/youtube.upload',
-    'https://www.googleapis.com/auth/youtube.readonly'
-]
-TOKEN_FILE = 'youtube_token.json'
-CREDENTIALS_FILE = 'client_secret.json'
+SCOPES = [UPLOAD_SCOPE, READONLY_SCOPE]
 DEFAULT_METADATA_FILE = 'course-metadata.json'
+STATE_FILE = DEFAULT_STATE_FILE
+# Arquivos JSON antigos, importados uma única vez para o STATE_FILE
 PROGRESS_FILE = 'upload_progress.json'
+SESSIONS_FILE = 'upload_sessions.json'
+INDEX_FILE = DEFAULT_INDEX_FILE
+HISTORY_FILE = DEFAULT_HISTORY_FILE
+FINGERPRINTS_FILE = DEFAULT_FINGERPRINTS_FILE
+PROBE_CACHE_FILE = DEFAULT_PROBE_CACHE_FILE
+VIDEO_CACHE_FILE = DEFAULT_VIDEO_CACHE_FILE
+MIRROR_FILE = DEFAULT_MIRROR_FILE
 
 
 class YouTubeUploader:
     """Gerencia upload de vídeos para o YouTube"""
     
-    def __init__(self, videos_dir: str, credentials_file: str = CREDENTIALS_FILE, metadata_file: str = DEFAULT_METADATA_FILE):
+    def __init__(self, videos_dir: str, credentials_file: str = CREDENTIALS_FILE, metadata_file: str = DEFAULT_METADATA_FILE,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, adaptive_chunks: bool = False,
+                 min_chunk_size: int = DEFAULT_MIN_CHUNK_SIZE, max_chunk_size: int = DEFAULT_MAX_CHUNK_SIZE,
+                 target_chunk_seconds: float = DEFAULT_TARGET_CHUNK_SECONDS,
+                 channel_limit: int = DEFAULT_CHANNEL_LIMIT, daily_quota: int = DEFAULT_DAILY_QUOTA,
+                 bandwidth_windows: Optional[List[str]] = None, dedupe: bool = False,
+                 probe: bool = True, client_factory: Optional[Callable] = None,
+                 events_file: Optional[str] = None, metrics_file: Optional[str] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, order: str = 'course', keep_order: str = 'none',
+                 pack_hours: Optional[float] = None, link_mbps: Optional[float] = None):
         self.videos_dir = Path(videos_dir)
         self.credentials_file = credentials_file
         self.metadata_file = metadata_file
+        # Tamanho dos chunks do upload (inicial, se adaptive_chunks estiver ativo)
+        self.chunk_size = round_chunk_size(chunk_size)
+        self.adaptive_chunks = adaptive_chunks
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.target_chunk_seconds = target_chunk_seconds
+        # Cria o cliente da API sem OAuth (ex: fake_youtube_server em benchmarks)
+        self.client_factory = client_factory
         self.youtube = None
+        self.clients = None
         self.metadata = None
-        self.progress = self._load_progress()
-        
-    def _load_progress(self) -> Dict:
-        """Carrega progresso de uploads anteriores"""
-        if os.path.exists(PROGRESS_FILE):
-            with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {'uploaded': [], 'failed': []}
-    
-    def _save_progress(self):
-        """Salva progresso atual"""
-        with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.progress, f, indent=2, ensure_ascii=False)
+        self.metadata_store = None
+        self.video_index = None
+        self.index_file = INDEX_FILE
+        # Progresso, falhas e sessões de upload (SQLite); o curso é definido em load_metadata
+        self.state = UploadStateStore(STATE_FILE)
+        # Importa o upload_progress.json/upload_sessions.json antigos (só com um curso: não dizem de qual curso são)
+        self.import_legacy_state = True
+        # Horários dos uploads para calcular as vagas da janela rolante de 24h
+        self.scheduler = RollingWindowScheduler(HISTORY_FILE, channel_limit)
+        # Quota diária da API compartilhada com os outros scripts
+        self.quota = QuotaLedger('youtube_uploader', daily_quota)
+        # Eventos JSONL e métricas Prometheus (--events-file / --metrics-file)
+        self.telemetry = Telemetry('youtube_uploader', events_file, metrics_file)
+        # Erros transitórios (5xx, rede, SSL) no meio do upload: backoff e retomada na mesma sessão
+        self.retry_policy = RetryPolicy(max_retries)
+        # Com order='pack', escolhe as aulas que mais cabem na janela em vez da ordem do curso
+        self.order = order
+        self.planner = UploadPlanner(keep_order, pack_hours, link_mbps) if order == 'pack' else None
+        # Limite de banda por janela de horário, compartilhado entre os workers
+        self.shaper = BandwidthShaper.from_specs(bandwidth_windows)
+        # Fingerprints de conteúdo para reaproveitar vídeos já enviados (--dedupe)
+        self.fingerprints = FingerprintStore(FINGERPRINTS_FILE) if dedupe else None
+        # Probe local dos MP4 (duração/integridade sem gastar quota); desligado com --no-probe
+        self.probe_cache = MediaProbeCache(PROBE_CACHE_FILE) if probe else None
+        # Respostas do videos.list (ETag + TTL), compartilhadas com fetch_durations.py
+        self.video_cache = VideoCache(VIDEO_CACHE_FILE)
+        # Espelho local do canal (channel_mirror.py --sync), se existir
+        self.mirror = open_mirror(MIRROR_FILE)
+        # lesson_id → duração local em segundos (do probe)
+        self.local_durations: Dict[str, int] = {}
+        # Estado de cada worker do pool (uploads já feitos, para o delay)
+        self._local = threading.local()
+        # Sinaliza para todos os workers que não devem iniciar novos uploads
+        self._stop_event = threading.Event()
+        # Sinaliza interrupção (Ctrl-C): uploads em andamento são abortados
+        self._abort_event = threading.Event()
     
     def authenticate(self):
         """Autentica com a API do YouTube"""
-        creds = None
-        
-        # Carrega token salvo se existir
-        if os.path.exists(TOKEN_FILE):
-            try:
-                creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
-            except Exception as e:
-                print(f"⚠️  Token existente inválido: {e}")
-        
-        # Se não há credenciais válidas, faz login
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                print("🔄 Renovando token de acesso...")
-                creds.refresh(Request())
-            else:
-                if not os.path.exists(self.credentials_file):
-                    print(f"❌ Arquivo de credenciais não encontrado: {self.credentials_file}")
-                    print("\n📋 Como obter credenciais:")
-                    print("   1. Acesse: https://console.cloud.google.com/")
-                    print("   2. Crie um projeto (ou selecione existente)")
-                    print("   3. Ative a YouTube Data API v3")
-                    print("   4. Crie credenciais OAuth 2.0 (Desktop app)")
-                    print("   5. Baixe o JSON e salve como 'client_secret.json'")
-                    sys.exit(1)
-                
-                print("🔐 Iniciando autenticação OAuth...")
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_file, SCOPES)
-                creds = flow.run_local_server(port=8080)
-            
-            # Salva token para uso futuro
-            with open(TOKEN_FILE, 'w') as token:
-                token.write(creds.to_json())
-            print("✅ Token salvo com sucesso!")
-        
-        self.youtube = build('youtube', 'v3', credentials=creds)
-        print("✅ Autenticado com sucesso!\n")
+        self.clients = connect(self.credentials_file, SCOPES, self.client_factory)
+        self.youtube = self.clients.client()
+    
+    def _client(self):
+        """Retorna o cliente da thread atual (cada worker tem o seu, com conexão keep-alive)"""
+        return self.clients.client()
+    
+    def _init_worker(self):
+        """Inicializa um worker do pool com seu próprio cliente da API"""
+        self.clients.client()
+        self._local.uploads = 0
     
     def load_metadata(self):
         """Carrega metadados do curso"""
@@ -114,67 +158,161 @@ class YouTubeUploader:
             print(f"❌ Arquivo de metadados não encontrado: {self.metadata_file}")
             sys.exit(1)
         
-        with open(self.metadata_file, 'r', encoding='utf-8') as f:
-            self.metadata = json.load(f)
+        # Índice por ID + journal: cada upload grava uma linha, não o JSON inteiro
+        self.metadata_store = MetadataStore(self.metadata_file)
+        self.metadata = self.metadata_store.data
+        
+        # Estado dos uploads deste curso; importa o progresso JSON antigo na primeira vez
+        self.state.course_id = self.metadata['course'].get('id') or Path(self.metadata_file).stem
+        if self.import_legacy_state:
+            self.state.import_json(PROGRESS_FILE, SESSIONS_FILE)
         
         total_videos = self.metadata['course']['totalVideos']
         print(f"📚 Curso: {self.metadata['course']['title']}")
         print(f"📹 Total de vídeos: {total_videos}")
-        print(f"✅ Já enviados: {len(self.progress['uploaded'])}")
-        print(f"❌ Falhas anteriores: {len(self.progress['failed'])}\n")
+        print(f"✅ Já enviados: {self.state.uploaded_count()}")
+        print(f"❌ Falhas anteriores: {self.state.failed_count()}\n")
     
-    def get_pending_lessons(self, max_uploads: Optional[int] = None) -> List[Dict]:
-        """Retorna lista de aulas pendentes de upload"""
+    def for_course(self, metadata_file: str) -> 'YouTubeUploader':
+        """
+        Uploader de outro curso (modo multi-curso) que compartilha com este o cliente
+        da API, a quota, as vagas do canal, a banda, a telemetria e o banco de estado
+        """
+        course = YouTubeUploader.__new__(YouTubeUploader)
+        course.__dict__.update(self.__dict__)
+        course.metadata_file = metadata_file
+        course.metadata = None
+        course.metadata_store = None
+        course.video_index = None
+        course.local_durations = {}
+        course.state = self.state.for_course()
+        course.import_legacy_state = False
+        return course
+    
+    def get_pending_lessons(self, max_uploads: Optional[int] = None, reuse_duplicates: bool = False) -> List[Lesson]:
+        """
+        Retorna lista de aulas pendentes de upload
+        Com reuse_duplicates (e --dedupe), aulas cujo vídeo tem o mesmo conteúdo
+        de um vídeo já enviado recebem a URL existente em vez de entrar na fila
+        """
         pending = []
-        uploaded_ids = set(self.progress['uploaded'])
-        
-        for module in self.metadata['course']['modules']:
-            for section in module['sections']:
-                for lesson in section['lessons']:
-                    lesson_id = lesson['id']
-                    
-                    # Pula se já foi enviado ou se já tem youtubeUrl
-                    if lesson_id in uploaded_ids or lesson.get('youtubeUrl'):
-                        continue
-                    
-                    # Adiciona contexto completo
-                    lesson_data = {
-                        **lesson,
-                        'module_title': module['title'],
-                        'module_folder': module['folderName'],
-                        'section_title': section['title'],
-                        'module_order': module['order'],
-                        'section_order': section['order']
-                    }
-                    pending.append(lesson_data)
-                    
-                    if max_uploads and len(pending) >= max_uploads:
-                        return pending
+        uploaded_ids = self.state.uploaded_ids()
+        
+        # Aulas sem youtubeUrl (índice do catálogo); o contexto do módulo e da seção vem do pai
+        for lesson in self.metadata_store.catalog.pending_uploads():
+            # Pula se já foi enviado
+            if lesson.id in uploaded_ids:
+                continue
+            
+            if reuse_duplicates and self.fingerprints and self._reuse_duplicate(lesson):
+                continue
+            
+            pending.append(lesson)
+            
+            if max_uploads and len(pending) >= max_uploads:
+                return pending
         
         return pending
     
-    def build_video_path(self, lesson: Dict) -> Path:
-        """Constrói o caminho completo do arquivo de vídeo"""
-        # Tenta encontrar o vídeo no diretório base ou em subpastas
-        filename = lesson['fileName']
+    def _reuse_duplicate(self, lesson: Dict) -> bool:
+        """
+        Se o arquivo da aula tem o mesmo conteúdo de um vídeo já enviado,
+        grava a URL existente nos metadados. Retorna True se reaproveitou
+        """
+        video_path = self.build_video_path(lesson)
+        if not video_path:
+            return False
         
-        # Primeiro tenta no diretório raiz
-        video_path = self.videos_dir / filename
-        if video_path.exists():
-            return video_path
+        try:
+            match = self.fingerprints.lookup(self.fingerprints.fingerprint(video_path))
+        except OSError as e:
+            print(f"⚠️  Não foi possível calcular o fingerprint de {video_path.name}: {e}")
+            return False
         
-        # Tenta na pasta do módulo
-        module_folder = lesson.get('module_folder', '')
-        if module_folder:
-            video_path = self.videos_dir / module_folder / filename
-            if video_path.exists():
-                return video_path
+        if not match:
+            return False
         
-        # Busca recursivamente
-        for path in self.videos_dir.rglob(filename):
-            return path
+        print(f"♻️  {lesson['id']}: mesmo conteúdo de {match['lessonId']}, reaproveitando {match['youtubeUrl']}")
+        self.update_metadata_file(lesson['id'], match['youtubeUrl'], match.get('duration'))
+        return True
+    
+    def _seed_fingerprints(self):
+        """Registra os fingerprints dos vídeos locais de aulas que já têm youtubeUrl"""
+        registered = len(self.fingerprints.videos)
         
-        return None
+        for lesson in self.metadata_store.catalog.published():
+            video_path = self.build_video_path(lesson)
+            if not video_path:
+                continue
+            
+            try:
+                fingerprint = self.fingerprints.fingerprint(video_path)
+            except OSError:
+                continue
+            self.fingerprints.register(fingerprint, lesson['youtubeUrl'], lesson.id, lesson.get('duration'))
+        
+        self.fingerprints.save()
+        added = len(self.fingerprints.videos) - registered
+        if added:
+            print(f"🔑 Fingerprints de vídeos já enviados registrados: {added}\n")
+    
+    def build_video_path(self, lesson: Dict) -> Optional[Path]:
+        """Localiza o arquivo de vídeo da aula usando o índice de arquivos"""
+        if self.video_index is None:
+            self.video_index = VideoIndex.load(str(self.videos_dir), self.index_file)
+        
+        return self.video_index.find(lesson['fileName'], lesson.get('module_folder', ''))
+    
+    def _report_missing_files(self, pending: List[Dict]) -> List[Dict]:
+        """
+        Verifica de uma só vez quais aulas pendentes não têm arquivo local
+        Registra as falhas e retorna apenas as aulas que podem ser enviadas
+        """
+        if self.video_index is None:
+            self.video_index = VideoIndex.load(str(self.videos_dir), self.index_file)
+        
+        missing = self.video_index.missing(pending)
+        if not missing:
+            return pending
+        
+        print(f"⚠️  Arquivos não encontrados: {len(missing)}")
+        for lesson in missing:
+            print(f"   • {lesson['id']}: {lesson['fileName']}")
+            self.state.mark_failed(lesson['id'], 'file_not_found', lesson['fileName'])
+        print()
+        
+        missing_ids = {lesson['id'] for lesson in missing}
+        return [lesson for lesson in pending if lesson['id'] not in missing_ids]
+    
+    def _report_broken_files(self, pending: List[Dict]) -> List[Dict]:
+        """
+        Analisa os vídeos pendentes localmente (pool de processos, com cache)
+        Registra como corrupt_file os truncados/sem moov, guarda as durações
+        locais e retorna apenas as aulas que podem ser enviadas
+        """
+        paths = {lesson['id']: self.build_video_path(lesson) for lesson in pending}
+        results = self.probe_cache.probe_many(set(paths.values()))
+        self.probe_cache.save()
+        
+        broken = []
+        for lesson in pending:
+            result = results[paths[lesson['id']]]
+            if is_broken(result):
+                broken.append(lesson)
+            elif result.get('duration'):
+                self.local_durations[lesson['id']] = int(round(result['duration']))
+        
+        if not broken:
+            return pending
+        
+        print(f"⚠️  Arquivos corrompidos ou incompletos: {len(broken)}")
+        for lesson in broken:
+            print(f"   • {lesson['id']}: {lesson['fileName']} ({describe(results[paths[lesson['id']]])})")
+            self.state.mark_failed(lesson['id'], 'corrupt_file', lesson['fileName'])
+        print()
+        
+        broken_ids = {lesson['id'] for lesson in broken}
+        return [lesson for lesson in pending if lesson['id'] not in broken_ids]
     
     def upload_video(self, lesson: Dict, video_path: Path) -> Optional[str]:
         """
@@ -182,27 +320,9 @@ class YouTubeUploader:
         Retorna a URL do vídeo ou None em caso de erro
         """
         try:
-            # Prepara metadados do vídeo
-            title = self._build_title(lesson)
-            description = self._build_description(lesson)
-            tags = self._build_tags(lesson)
-            language = self._get_language(lesson)
-            
-            # Limita título a 100 caracteres (limite do YouTube)
-            if len(title) > 100:
-                title = title[:97] + "..."
-            
-            snippet = {
-                'title': title,
-                'description': description,
-                'tags': tags,
-                'categoryId': '27'  # Education
-            }
-            
-            # Adiciona idioma se disponível
-            if language:
-                snippet['defaultLanguage'] = language
-                snippet['defaultAudioLanguage'] = language
+            # Prepara metadados do vídeo (video_snippet.py, o mesmo do reconcile_metadata.py)
+            snippet = build_snippet(self.metadata['course'], lesson)
+            title = snippet['title']
             
             body = {
                 'snippet': snippet,
@@ -212,10 +332,17 @@ class YouTubeUploader:
                 }
             }
             
+            sizer = None
+            if self.adaptive_chunks:
+                sizer = AdaptiveChunkSizer(
+                    self.chunk_size, self.min_chunk_size,
+                    self.max_chunk_size, self.target_chunk_seconds
+                )
+            
             # Prepara arquivo para upload
             media = MediaFileUpload(
                 str(video_path),
-                chunksize=10 * 1024 * 1024,  # 10MB chunks
+                chunksize=sizer.size if sizer else self.chunk_size,
                 resumable=True,
                 mimetype='video/*'
             )
@@ -224,36 +351,115 @@ class YouTubeUploader:
             print(f"   Arquivo: {video_path.name} ({self._format_size(video_path.stat().st_size)})")
             
             # Inicia upload
-            request = self.youtube.videos().insert(
+            request = self._client().videos().insert(
                 part='snippet,status',
+                fields=INSERT_FIELDS,
                 body=body,
                 media_body=media
             )
             
-            response = None
+            # Continua uma sessão interrompida em execução anterior, se houver
+            response = self._resume_session(lesson, video_path, request)
+            if response is None and request.resumable_uri is None:
+                # Nova sessão: o videos().insert é cobrado ao abrir a sessão
+                self.quota.charge('videos.insert')
             last_progress = 0
+            upload_start = time.monotonic()
+            attempt = 0
             
             while response is None:
-                status, response = request.next_chunk()
+                if self._abort_event.is_set():
+                    print(f"⚠️  Upload interrompido: {lesson['id']} (será retomado na próxima execução)")
+                    return None
+                
+                session_started = request.resumable_uri is not None
+                offset_before = request.resumable_progress
+                window_label = self.shaper.current_label()
+                window_start = time.monotonic()
+                
+                if self.shaper.enabled:
+                    # Chunks curtos na janela com limite + espera pelo token bucket
+                    base_size = sizer.size if sizer else self.chunk_size
+                    max_size = self.shaper.max_chunk_size()
+                    set_chunk_size(media, round_chunk_size(min(base_size, max_size)) if max_size else base_size)
+                    next_bytes = min(media.chunksize(), media.size() - offset_before)
+                    if not self.shaper.acquire(next_bytes, self._abort_event):
+                        continue
+                
+                chunk_start = time.monotonic()
+                try:
+                    if session_started:
+                        status, response = request.next_chunk()
+                    else:
+                        # O primeiro next_chunk() abre a sessão: é a chamada videos.insert
+                        with self.telemetry.timed('videos.insert'):
+                            status, response = request.next_chunk()
+                except Exception as e:
+                    # Depois de uma falha o próximo next_chunk() pergunta ao servidor até onde
+                    # o chunk chegou (PUT vazio com Content-Range: bytes */tamanho) antes de reenviar
+                    if not self._backoff(lesson, e, attempt + 1):
+                        raise
+                    attempt += 1
+                    continue
+                attempt = 0
+                chunk_seconds = time.monotonic() - chunk_start
+                
+                sent = (media.size() if response is not None else request.resumable_progress) - offset_before
+                self.shaper.record(window_label, sent, window_start, time.monotonic())
+                self.telemetry.chunk_sent(lesson['id'], sent, chunk_seconds, offset_before)
+                
+                # Ajusta o tamanho do próximo chunk pela vazão medida; o primeiro
+                # next_chunk() também abre a sessão e por isso não é medido
+                if sizer and session_started:
+                    new_size = sizer.observe(sent, chunk_seconds)
+                    if new_size and set_chunk_size(media, new_size):
+                        print(f"   📶 Chunk: {self._format_size(new_size)} "
+                              f"({sizer.history[-1][1]:.2f} MB/s) ({lesson['id']})")
+                
+                # Salva a sessão e o último byte confirmado para sobreviver a reinícios
+                if response is None and request.resumable_uri:
+                    self.state.update_session(lesson['id'], video_path, request.resumable_uri, request.resumable_progress)
+                
                 if status:
                     progress = int(status.progress() * 100)
                     if progress != last_progress and progress % 10 == 0:
-                        print(f"   Progresso: {progress}%")
+                        print(f"   Progresso: {progress}% ({lesson['id']})")
                         last_progress = progress
             
+            self.state.remove_session(lesson['id'])
+            self.telemetry.upload_completed(lesson['id'], media.size(), time.monotonic() - upload_start)
+            
             video_id = response['id']
             video_url = f"https://www.youtube-nocookie.com/watch?v={video_id}"
             
             print(f"✅ Upload concluído!")
+            if sizer and sizer.history:
+                print(f"   Vazão média: {sizer.average_throughput:.2f} MB/s "
+                      f"(último chunk: {self._format_size(sizer.size)})")
             print(f"   URL: {video_url}\n")
             
             return video_url
-            
+        
         except HttpError as e:
             print(f"❌ Erro HTTP ao fazer upload: {e}")
             
+            # Quota diária da API esgotada: nenhum script consegue mais chamar a API hoje
+            if 'quotaExceeded' in str(e):
+                self.telemetry.quota_error('quotaExceeded', 'videos.insert')
+                self.quota.exhaust()
+                if not self._stop_event.is_set():
+                    self._stop_event.set()
+                    print("\n🛑 Quota diária da API esgotada (reset à meia-noite do Pacífico). Parando execução.\n")
+                return 'QUOTA_EXCEEDED'
+            
             # Verifica se é erro de limite de upload diário
             if 'uploadLimitExceeded' in str(e):
+                self.telemetry.quota_error('uploadLimitExceeded', 'videos.insert')
+                # Outros workers podem atingir o limite ao mesmo tempo: avisa uma vez só
+                already_stopped = self._stop_event.is_set()
+                self._stop_event.set()
+                if already_stopped:
+                    return 'UPLOAD_LIMIT_EXCEEDED'
                 print("\n" + "="*70)
                 print("⚠️  LIMITE DIÁRIO DE UPLOADS ATINGIDO")
                 print("="*70)
@@ -280,85 +486,72 @@ class YouTubeUploader:
             print(f"❌ Erro inesperado: {e}")
             return None
     
-    def _build_title(self, lesson: Dict) -> str:
-        """Constrói título do vídeo no formato: SIGLA | MÓDULO | 000 | NOME AULA"""
-        MAX_LENGTH = 100
+    def _backoff(self, lesson: Dict, error: Exception, attempt: int) -> bool:
+        """
+        Decide se um erro do upload merece nova tentativa e aguarda o backoff
+        Retorna False se o erro é fatal ou as tentativas acabaram
+        """
+        reason = self.retry_policy.should_retry(error, attempt - 1)
+        if not reason:
+            if classify_error(error):
+                print(f"❌ Tentativas esgotadas ({self.retry_policy.max_retries}) para {lesson['id']}")
+            return False
         
-        # Extrai sigla do curso (usa campo 'acronym' ou gera do ID)
-        course_id = self.metadata['course'].get('acronym', self.metadata['course']['id'].upper())
+        wait = self.retry_policy.delay(attempt)
+        self.telemetry.retry(reason, attempt, wait, lessonId=lesson['id'])
+        print(f"🔁 Erro transitório ({reason}) em {lesson['id']}: "
+              f"nova tentativa {attempt}/{self.retry_policy.max_retries} em {wait:.1f}s")
+        # Ctrl-C durante a espera: o laço do upload trata a interrupção
+        self._abort_event.wait(wait)
+        return True
+    
+    def _resume_session(self, lesson: Dict, video_path: Path, request) -> Optional[Dict]:
+        """
+        Retoma a sessão de upload salva da aula, se existir
+        Posiciona o request no último byte confirmado pelo servidor ou,
+        se o upload já havia terminado, retorna a resposta com o vídeo
+        """
+        session = self.state.get_session(lesson['id'], video_path)
+        if not session:
+            return None
         
-        module_title = lesson.get('module_title', '')
-        section_order = str(lesson.get('section_order', 0)).zfill(3)  # 001, 002, etc.
-        lesson_title = lesson['title']
+        try:
+            with self.telemetry.timed('upload.status', units=0):
+                state, value = query_session(self.clients.http(), session['uri'], video_path.stat().st_size)
+        except Exception as e:
+            print(f"⚠️  Não foi possível consultar a sessão anterior: {e}")
+            return None
         
-        # Formato: SIGLA | MÓDULO | 000 | NOME AULA
-        title = f"{course_id} | {module_title} | {section_order} | {lesson_title}"
+        if state == 'complete':
+            print(f"♻️  Upload já havia sido concluído na execução anterior")
+            return value
         
-        # Se ultrapassar 100 caracteres, trunca o nome da aula
-        if len(title) > MAX_LENGTH:
-            # Partes fixas do título
-            prefix = f"{course_id} | {module_title} | {section_order} | "
-            
-            # Espaço disponível para o nome da aula
-            available_space = MAX_LENGTH - len(prefix)
-            
-            # Trunca o nome da aula
-            if available_space > 0:
-                lesson_title = lesson_title[:available_space]
-            
-            # Reconstrói o título
-            title = f"{prefix}{lesson_title}"
+        if state == 'expired':
+            print(f"⚠️  Sessão de upload anterior expirou, recomeçando do início")
+            self.state.remove_session(lesson['id'])
+            return None
         
-        return title
+        request.resumable_uri = session['uri']
+        request.resumable_progress = value
+        self.telemetry.retry('resume_session', lessonId=lesson['id'], offset=value)
+        print(f"♻️  Retomando upload a partir de {self._format_size(value)}")
+        return None
+    
+    def _build_title(self, lesson: Dict) -> str:
+        """Constrói título do vídeo no formato: SIGLA | MÓDULO | 000 | NOME AULA"""
+        return build_title(self.metadata['course'], lesson)
     
     def _build_description(self, lesson: Dict) -> str:
         """Constrói descrição do vídeo"""
-        course_title = self.metadata['course']['title']
-        module_title = lesson.get('module_title', '')
-        section_title = lesson.get('section_title', '')
-        
-        description = f"{course_title}\n\n"
-        description += f"Módulo {lesson.get('module_order', '')}: {module_title}\n"
-        description += f"Seção {lesson.get('section_order', '')}: {section_title}\n"
-        description += f"Aula {lesson.get('order', '')}: {lesson['title']}\n\n"
-        
-        if lesson.get('type') == 'live':
-            description += "🔴 Gravação de aula ao vivo\n\n"
-        
-        description += "Este vídeo faz parte de um curso privado de gestão de fazendas leiteiras."
-        
-        return description
+        return build_description(self.metadata['course'], lesson)
     
     def _build_tags(self, lesson: Dict) -> List[str]:
         """Constrói tags do vídeo"""
-        tags = [
-            'gestão rural',
-            'pecuária leiteira',
-            'gado de leite',
-            'fazenda',
-            'agronegócio'
-        ]
-        
-        if lesson.get('type') == 'live':
-            tags.append('aula ao vivo')
-        
-        return tags
+        return build_tags(lesson)
     
     def _get_language(self, lesson: Dict) -> Optional[str]:
-        """
-        Obtém o idioma do vídeo
-        Prioridade: lesson.language > course.language
-        Retorna código ISO 639-1 (ex: 'pt-BR', 'en', 'es')
-        """
-        # Primeiro tenta obter do lesson
-        if lesson.get('language'):
-            return lesson['language']
-        
-        # Se não tiver no lesson, usa o do course
-        if self.metadata and self.metadata.get('course', {}).get('language'):
-            return self.metadata['course']['language']
-        
-        return None
+        """Idioma do vídeo (lesson.language > course.language)"""
+        return lesson_language(self.metadata['course'], lesson) if self.metadata else lesson.get('language')
     
     def _format_size(self, size_bytes: int) -> str:
         """Formata tamanho de arquivo"""
@@ -387,19 +580,40 @@ class YouTubeUploader:
     
     def _get_video_duration(self, video_id: str) -> Optional[int]:
         """
-        Busca a duração do vídeo via YouTube API
+        Busca a duração do vídeo via YouTube API (ou do espelho do canal / cache, dentro do TTL)
         Retorna duração em segundos ou None em caso de erro
         """
+        if self.mirror:
+            duration_seconds = self.mirror.processed_duration(video_id)
+            if duration_seconds:
+                return duration_seconds
+        
+        cached = self.video_cache.get(video_id, 'contentDetails')
+        if cached is not None:
+            return self._parse_duration(cached['contentDetails']['duration'])
+        
         try:
-            request = self.youtube.videos().list(
+            request = conditional(self._client().videos().list(
                 part='contentDetails',
-                id=video_id
-            )
-            response = request.execute()
+                id=video_id,
+                fields=DURATION_FIELDS
+            ), self.video_cache.etag(video_id, 'contentDetails'))
+            self.quota.charge('videos.list')
+            try:
+                response = self.telemetry.execute('videos.list', request)
+            except HttpError as e:
+                # 304: a duração em cache continua valendo
+                if not_modified(e):
+                    cached = self.video_cache.renew(video_id, 'contentDetails')
+                    return self._parse_duration(cached['contentDetails']['duration'])
+                raise
             
             if 'items' in response and len(response['items']) > 0:
                 duration_iso = response['items'][0]['contentDetails']['duration']
                 duration_seconds = self._parse_duration(duration_iso)
+                # Vídeo ainda em processamento (duração 0) não entra no cache
+                if duration_seconds:
+                    self.video_cache.store(video_id, 'contentDetails', response['items'][0], response.get('etag'))
                 return duration_seconds
             
             return None
@@ -421,40 +635,105 @@ class YouTubeUploader:
             return f"{secs}s"
     
     def update_metadata_file(self, lesson_id: str, youtube_url: str, duration_seconds: Optional[int] = None):
-        """Atualiza o arquivo JSON com a URL do YouTube e duração"""
-        updated = False
-        
-        for module in self.metadata['course']['modules']:
-            for section in module['sections']:
-                for lesson in section['lessons']:
-                    if lesson['id'] == lesson_id:
-                        lesson['youtubeUrl'] = youtube_url
-                        if duration_seconds is not None:
-                            lesson['duration'] = duration_seconds
-                        updated = True
-                        break
-                if updated:
-                    break
-            if updated:
-                break
-        
-        if updated:
-            # Salva JSON atualizado
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2, ensure_ascii=False)
-            
+        """Registra a URL do YouTube e a duração da aula no journal de metadados"""
+        fields = {'youtubeUrl': youtube_url}
+        if duration_seconds is not None:
+            fields['duration'] = duration_seconds
+        
+        if self.metadata_store.update_lesson(lesson_id, **fields):
             if duration_seconds:
                 print(f"💾 Metadados atualizados (URL + duração: {self._format_duration(duration_seconds)})\n")
             else:
                 print(f"💾 Metadados atualizados (URL)\n")
     
-    def run(self, max_uploads: Optional[int] = None, delay: int = 5):
+    def _upload_lesson(self, lesson: Dict, position: int, total: int, delay: int) -> Dict:
+        """
+        Executa o upload de uma aula dentro de um worker do pool
+        Não altera o progresso nem os metadados: apenas devolve o resultado
+        para o writer, que grava tudo em ordem fixa
+        """
+        if self._stop_event.is_set() or self._abort_event.is_set():
+            return {'status': 'skipped'}
+        
+        # Aguarda entre uploads do mesmo worker (evita rate limiting)
+        if getattr(self._local, 'uploads', 0) > 0 and delay > 0:
+            print(f"⏳ Aguardando {delay} segundos antes do próximo upload...\n")
+            if self._stop_event.wait(delay):
+                return {'status': 'skipped'}
+        self._local.uploads = getattr(self._local, 'uploads', 0) + 1
+        
+        print(f"[{position}/{total}] Processando: {lesson['id']}")
+        
+        # Localiza arquivo de vídeo
+        video_path = self.build_video_path(lesson)
+        if not video_path:
+            print(f"⚠️  Arquivo não encontrado: {lesson['fileName']}\n")
+            return {'status': 'file_not_found'}
+        
+        # Faz upload
+        youtube_url = self.upload_video(lesson, video_path)
+        
+        if youtube_url == 'UPLOAD_LIMIT_EXCEEDED':
+            return {'status': 'upload_limit_exceeded'}
+        if youtube_url == 'QUOTA_EXCEEDED':
+            return {'status': 'quota_exceeded'}
+        if not youtube_url:
+            return {'status': 'upload_error'}
+        
+        # Usa a duração lida localmente pelo probe; sem ela, consulta a API
+        duration_seconds = self.local_durations.get(lesson['id'])
+        if not duration_seconds:
+            video_id = youtube_url.split('v=')[-1]
+            print(f"⏱️  Buscando duração do vídeo...")
+            duration_seconds = self._get_video_duration(video_id)
+        if duration_seconds:
+            print(f"✅ Duração: {self._format_duration(duration_seconds)}")
+        
+        return {'status': 'uploaded', 'url': youtube_url, 'duration': duration_seconds}
+    
+    def _record_result(self, lesson: Dict, result: Dict) -> bool:
+        """
+        Registra o resultado de um upload (executado apenas pelo writer)
+        Retorna True se o upload foi bem-sucedido
+        """
+        if result['status'] == 'uploaded':
+            # Atualiza JSON com URL e duração
+            self.update_metadata_file(lesson['id'], result['url'], result['duration'])
+            self.state.mark_uploaded(lesson['id'], result['url'], result['duration'])
+            self.scheduler.record()
+            # Snippet enviado: o reconcile_metadata.py só atualiza o vídeo se ele mudar
+            video_id = result['url'].split('v=')[-1]
+            snippet = build_snippet(self.metadata['course'], lesson)
+            self.state.mark_applied(lesson['id'], video_id, snippet_hash(snippet))
+            # Entra no espelho como em processamento; o próximo sync traz duração e status
+            if self.mirror:
+                self.mirror.record_upload(video_id, snippet['title'])
+            
+            if self.fingerprints:
+                video_path = self.build_video_path(lesson)
+                if video_path:
+                    self.fingerprints.register(
+                        self.fingerprints.fingerprint(video_path), result['url'], lesson['id'], result['duration']
+                    )
+            return True
+        
+        if result['status'] == 'upload_limit_exceeded':
+            limit = self.scheduler.learn_limit()
+            if limit:
+                print(f"📏 Limite do canal aprendido: {limit} uploads em 24h\n")
+        
+        # Registra falha com a razão específica
+        self.state.mark_failed(lesson['id'], result['status'], lesson['fileName'])
+        return False
+    
+    def run(self, max_uploads: Optional[int] = None, delay: int = 5, workers: int = 1):
         """
         Executa o processo de upload
         
         Args:
             max_uploads: Número máximo de vídeos para enviar (None = todos)
-            delay: Segundos de espera entre uploads
+            delay: Segundos de espera entre uploads de um mesmo worker
+            workers: Número de uploads simultâneos
         """
         print("=" * 70)
         print("🎬 YouTube Video Uploader - Lecture Platform")
@@ -466,100 +745,245 @@ class YouTubeUploader:
         # Carrega metadados
         self.load_metadata()
         
+        self._upload_batch(max_uploads, delay, workers)
+        self._close_metadata()
+        self.state.close()
+        if self.mirror:
+            self.mirror.close()
+        self.telemetry.close()
+    
+    def run_daemon(self, delay: int = 5, workers: int = 1, poll_interval: int = 3600):
+        """
+        Executa continuamente, enviando vídeos assim que há vaga na janela
+        rolante de 24h do canal
+        
+        Args:
+            delay: Segundos de espera entre uploads de um mesmo worker
+            workers: Número de uploads simultâneos
+            poll_interval: Segundos de espera quando não há vídeos pendentes
+        """
+        print("=" * 70)
+        print("🎬 YouTube Video Uploader - Lecture Platform (daemon)")
+        print("=" * 70 + "\n")
+        
+        self.authenticate()
+        
+        while True:
+            now = time.time()
+            slots = self.scheduler.available(now)
+            
+            if slots <= 0:
+                wake_at = self.scheduler.next_slot(now)
+                print(f"😴 Sem vagas na janela de 24h ({self.scheduler.used(now)}/{self.scheduler.limit}). "
+                      f"Próxima vaga: {time.strftime('%d/%m %H:%M:%S', time.localtime(wake_at))}\n")
+                time.sleep(max(1, wake_at - now))
+                continue
+            
+            print(f"🟢 Vagas disponíveis: {slots}\n")
+            
+            # Relê os metadados a cada ciclo (novas aulas, edições manuais)
+            self.load_metadata()
+            uploaded = self._upload_batch(slots, delay, workers)
+            self._close_metadata()
+            
+            # Sem uploads neste ciclo (nada pendente ou só falhas): evita repetir em seguida.
+            # Se o limite foi atingido, o próximo ciclo dorme até a vaga liberar
+            if not uploaded and self.scheduler.available() > 0:
+                print(f"😴 Nenhum upload neste ciclo. Verificando novamente em {poll_interval} segundos\n")
+                time.sleep(poll_interval)
+    
+    def _pack_pending(self, pending: List[Dict], max_uploads: Optional[int], affordable: int) -> List[Dict]:
+        """Escolhe as aulas da janela pelo tamanho e tempo estimado de envio (--order pack)"""
+        sizes = {}
+        for lesson in pending:
+            video_path = self.build_video_path(lesson)
+            sizes[lesson['id']] = video_path.stat().st_size if video_path else 0
+        
+        # Vagas: --max-uploads e quota do dia, como na ordem do curso
+        # (no daemon, max_uploads já são as vagas do canal na janela de 24h)
+        slots = affordable
+        if max_uploads:
+            slots = min(slots, max_uploads)
+        
+        # Sem --pack-hours/--link-mbps, usa a janela de banda atual (limite e tempo até o fim)
+        hours, link_mbps = self.planner.hours, self.planner.link_mbps
+        window = self.shaper.current_window()
+        if window and window.mbps:
+            link_mbps = link_mbps or window.mbps
+            hours = hours or window.seconds_until_end(datetime.now()) / 3600
+        
+        chosen, deferred = self.planner.plan(pending, sizes, slots, hours, link_mbps)
+        chosen_bytes = sum(sizes[lesson['id']] for lesson in chosen)
+        
+        print(f"🧮 Plano da janela: {len(chosen)} de {len(pending)} aulas ({self._format_size(chosen_bytes)})")
+        if hours and link_mbps:
+            estimate = chosen_bytes * 8 / (link_mbps * 1_000_000)
+            print(f"   Estimativa: {self._format_duration(int(estimate))} de "
+                  f"{self._format_duration(int(hours * 3600))} a {link_mbps:g} Mbit/s")
+        if deferred:
+            print(f"   Adiadas: {len(deferred)} (maior: {self._format_size(max(sizes[lesson['id']] for lesson in deferred))})")
+        print()
+        
+        return chosen
+    
+    def _upload_batch(self, max_uploads: Optional[int], delay: int, workers: int) -> int:
+        """
+        Envia um lote de aulas pendentes e imprime o resumo
+        Retorna o número de uploads bem-sucedidos
+        """
+        self._stop_event.clear()
+        self._abort_event.clear()
+        retries_before = self.telemetry.retry_totals()
+        
+        # Com --order pack, todas as pendentes: o planner escolhe depois
+        pending, fail_count = self._prepare_pending(None if self.planner else max_uploads)
+        if not pending:
+            return 0
+        
+        cost = self._upload_cost(pending)
+        if self.planner:
+            pending = self._pack_pending(pending, max_uploads, self.quota.affordable(cost))
+        allowed = self.quota.plan(len(pending), cost)
+        if allowed <= 0:
+            return 0
+        pending = pending[:allowed]
+        
+        success_count, failures = self._run_jobs([(self, lesson) for lesson in pending], delay, workers)
+        self._print_summary(success_count, fail_count + failures, retries_before)
+        
+        return success_count
+    
+    def _prepare_pending(self, max_uploads: Optional[int]) -> Tuple[List[Dict], int]:
+        """
+        Lista as aulas pendentes e descarta as sem arquivo local ou com arquivo corrompido
+        Retorna (aulas que podem ser enviadas, falhas registradas)
+        """
+        # Com --dedupe, conteúdo já enviado é reaproveitado em vez de reenviado
+        if self.fingerprints:
+            self._seed_fingerprints()
+        
         # Obtém lista de vídeos pendentes
-        pending = self.get_pending_lessons(max_uploads)
+        pending = self.get_pending_lessons(max_uploads, reuse_duplicates=True)
+        if self.fingerprints:
+            self.fingerprints.save()
         
         if not pending:
             print("✅ Todos os vídeos já foram enviados!")
-            return
+            return [], 0
         
         print(f"📋 Vídeos pendentes: {len(pending)}")
         if max_uploads:
             print(f"🎯 Limite desta execução: {max_uploads} vídeos")
         print()
         
-        # Processa cada vídeo
+        # Resolve todos os arquivos antes de iniciar qualquer upload
+        total_pending = len(pending)
+        pending = self._report_missing_files(pending)
+        
+        if not pending:
+            print("❌ Nenhum arquivo de vídeo encontrado para as aulas pendentes")
+            return [], total_pending
+        
+        # Descarta arquivos truncados antes de ocuparem uma vaga de upload
+        if self.probe_cache:
+            pending = self._report_broken_files(pending)
+            if not pending:
+                print("❌ Nenhum arquivo de vídeo válido para as aulas pendentes")
+                return [], total_pending
+        
+        return pending, total_pending - len(pending)
+    
+    def _upload_cost(self, pending: List[Dict]) -> int:
+        """Cada upload custa o insert + a consulta de duração (dispensada se o probe leu a duração)"""
+        cost = UNIT_COSTS['videos.insert']
+        if any(lesson['id'] not in self.local_durations for lesson in pending):
+            cost += UNIT_COSTS['videos.list']
+        return cost
+    
+    def _run_jobs(self, jobs: List[Tuple['YouTubeUploader', Dict]], delay: int, workers: int) -> Tuple[int, int]:
+        """
+        Executa os uploads (uploader do curso, aula) em um pool de workers
+        Retorna (sucessos, falhas)
+        """
+        workers = max(1, min(workers, len(jobs)))
+        if workers > 1:
+            print(f"🧵 Uploads simultâneos: {workers}\n")
+        
+        # Processa os vídeos em um pool de workers; o resultado de cada um
+        # é gravado pela thread principal na ordem original das aulas
         success_count = 0
         fail_count = 0
         
-        for i, lesson in enumerate(pending, 1):
-            print(f"[{i}/{len(pending)}] Processando: {lesson['id']}")
-            
-            # Localiza arquivo de vídeo
-            video_path = self.build_video_path(lesson)
-            
-            if not video_path:
-                print(f"⚠️  Arquivo não encontrado: {lesson['fileName']}")
-                self.progress['failed'].append({
-                    'id': lesson['id'],
-                    'reason': 'file_not_found',
-                    'filename': lesson['fileName']
-                })
-                fail_count += 1
-                print()
-                continue
-            
-            # Faz upload
-            youtube_url = self.upload_video(lesson, video_path)
+        pool = ThreadPoolExecutor(max_workers=workers, initializer=self._init_worker)
+        try:
+            futures = [
+                pool.submit(uploader._upload_lesson, lesson, i, len(jobs), delay)
+                for i, (uploader, lesson) in enumerate(jobs, 1)
+            ]
             
-            # Verifica se atingiu limite diário
-            if youtube_url == 'UPLOAD_LIMIT_EXCEEDED':
-                # Registra falha com razão específica
-                self.progress['failed'].append({
-                    'id': lesson['id'],
-                    'reason': 'upload_limit_exceeded',
-                    'filename': lesson['fileName']
-                })
-                fail_count += 1
-                # Salva progresso antes de parar
-                self._save_progress()
-                # Para a execução imediatamente
-                break
-            elif youtube_url:
-                # Extrai video_id da URL
-                video_id = youtube_url.split('v=')[-1]
-                
-                # Busca duração do vídeo
-                print(f"⏱️  Buscando duração do vídeo...")
-                duration_seconds = self._get_video_duration(video_id)
-                
-                if duration_seconds:
-                    print(f"✅ Duração: {self._format_duration(duration_seconds)}")
+            for (uploader, lesson), future in zip(jobs, futures):
+                result = future.result()
+                if result['status'] == 'skipped':
+                    continue
                 
-                # Atualiza JSON com URL e duração
-                self.update_metadata_file(lesson['id'], youtube_url, duration_seconds)
+                if uploader._record_result(lesson, result):
+                    success_count += 1
+                else:
+                    fail_count += 1
                 
-                # Registra sucesso
-                self.progress['uploaded'].append(lesson['id'])
-                success_count += 1
-            else:
-                # Registra falha
-                self.progress['failed'].append({
-                    'id': lesson['id'],
-                    'reason': 'upload_error',
-                    'filename': lesson['fileName']
-                })
-                fail_count += 1
-            
-            # Salva progresso
-            self._save_progress()
-            
-            # Aguarda antes do próximo upload (evita rate limiting)
-            if i < len(pending):
-                print(f"⏳ Aguardando {delay} segundos antes do próximo upload...\n")
-                time.sleep(delay)
+                # Limite diário atingido: não inicia mais nenhum upload
+                if result['status'] in ('upload_limit_exceeded', 'quota_exceeded'):
+                    for remaining in futures:
+                        remaining.cancel()
+        except KeyboardInterrupt:
+            # Aborta os uploads em andamento e descarta os que não começaram
+            self._abort_event.set()
+            self._stop_event.set()
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            # Incorpora o journal ao JSON (rename atômico)
+            self._close_metadata()
+            if self.fingerprints:
+                self.fingerprints.save()
+            self.video_cache.save()
+            self.telemetry.write_metrics()
         
-        # Resumo final
+        return success_count, fail_count
+    
+    def _close_metadata(self):
+        """Incorpora o journal de metadados ao JSON do curso"""
+        self.metadata_store.close()
+    
+    def _uploaded_total(self) -> int:
+        return self.state.uploaded_count()
+    
+    def _pending_total(self) -> int:
+        return len(self.get_pending_lessons())
+    
+    def _print_summary(self, success_count: int, fail_count: int, retries_before: Tuple[Dict[str, int], float]):
+        """Imprime o resumo da execução"""
         print("=" * 70)
         print("📊 RESUMO DA EXECUÇÃO")
         print("=" * 70)
         print(f"✅ Sucessos: {success_count}")
         print(f"❌ Falhas: {fail_count}")
-        print(f"📈 Total enviado até agora: {len(self.progress['uploaded'])}")
-        print(f"📉 Pendentes: {len(self.get_pending_lessons())}")
+        print(f"📈 Total enviado até agora: {self._uploaded_total()}")
+        print(f"📉 Pendentes: {self._pending_total()}")
+        if self.shaper.enabled:
+            print("📶 Vazão efetiva por janela:")
+            for label, sent_bytes, seconds, mbps in self.shaper.report():
+                print(f"   • {label}: {self._format_size(sent_bytes)} em {int(seconds)}s = {mbps:.2f} Mbit/s")
+        retries, retry_seconds = self.telemetry.retry_totals()
+        retries = {reason: count - retries_before[0].get(reason, 0) for reason, count in retries.items()}
+        retries = {reason: count for reason, count in retries.items() if count}
+        if retries:
+            print(f"🔁 Novas tentativas: {sum(retries.values())} "
+                  f"({retry_seconds - retries_before[1]:.1f}s aguardando)")
+            for reason, count in sorted(retries.items()):
+                print(f"   • {reason}: {count}")
         print("=" * 70)
 
-
 def main():
     parser = argparse.ArgumentParser(
         description='Upload de vídeos para YouTube com metadados do curso',
@@ -575,8 +999,31 @@ Exemplos de uso:
   # Com delay customizado entre uploads
   python youtube_uploader.py --videos-dir /path/to/videos --max-uploads 10 --delay 10
   
+  # Com 4 uploads simultâneos
+  python youtube_uploader.py --videos-dir /path/to/videos --max-uploads 20 --workers 4
+  
+  # Limita a 5 Mbit/s em horário comercial (sem limite à noite)
+  python youtube_uploader.py --videos-dir /path/to/videos --bandwidth-window 07:00-19:00=5
+  
+  # Modo daemon: envia continuamente respeitando a janela rolante de 24h
+  python youtube_uploader.py --videos-dir /path/to/videos --daemon --channel-limit 15
+  
+  # Com chunks adaptativos (ajustados pela vazão do link)
+  python youtube_uploader.py --videos-dir /path/to/videos --adaptive-chunks --target-chunk-seconds 5
+  
   # Com arquivo de metadados customizado
   python youtube_uploader.py --videos-dir /path/to/videos --metadata-file outro-curso.json
+  
+  # Janela noturna de 6h em um link de 20 Mbit/s: o máximo de aulas que cabem, módulo a módulo
+  python youtube_uploader.py --videos-dir /path/to/videos --order pack --pack-hours 6 --link-mbps 20 \
+      --keep-order module
+  
+  # Todos os cursos de um diretório em uma fila única (curso python-basico com peso 2)
+  python youtube_uploader.py --videos-dir /path/to/videos --courses cursos/ --course-weight python-basico=2
+  
+  # Com eventos JSONL e métricas para o node_exporter
+  python youtube_uploader.py --videos-dir /path/to/videos --events-file uploads.jsonl \
+      --metrics-file /var/lib/node_exporter/textfile/youtube_uploader.prom
 
 Requisitos:
   1. Instalar dependências: pip install google-api-python-client google-auth-oauthlib
@@ -605,6 +1052,141 @@ Requisitos:
         help='Segundos de espera entre uploads (padrão: 5)'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Número de uploads simultâneos (padrão: 1)'
+    )
+    
+    parser.add_argument(
+        '--chunk-size',
+        type=float,
+        default=DEFAULT_CHUNK_SIZE / MB,
+        help=f'Tamanho dos chunks do upload em MB (padrão: {DEFAULT_CHUNK_SIZE // MB})'
+    )
+    
+    parser.add_argument(
+        '--adaptive-chunks',
+        action='store_true',
+        help='Ajusta o tamanho dos chunks conforme a vazão medida do link'
+    )
+    
+    parser.add_argument(
+        '--min-chunk-size',
+        type=float,
+        default=DEFAULT_MIN_CHUNK_SIZE / MB,
+        help=f'Tamanho mínimo dos chunks adaptativos em MB (padrão: {DEFAULT_MIN_CHUNK_SIZE // MB})'
+    )
+    
+    parser.add_argument(
+        '--max-chunk-size',
+        type=float,
+        default=DEFAULT_MAX_CHUNK_SIZE / MB,
+        help=f'Tamanho máximo dos chunks adaptativos em MB (padrão: {DEFAULT_MAX_CHUNK_SIZE // MB})'
+    )
+    
+    parser.add_argument(
+        '--target-chunk-seconds',
+        type=float,
+        default=DEFAULT_TARGET_CHUNK_SECONDS,
+        help=f'Duração alvo de cada chunk adaptativo em segundos (padrão: {DEFAULT_TARGET_CHUNK_SECONDS:g})'
+    )
+    
+    parser.add_argument(
+        '--bandwidth-window',
+        action='append',
+        metavar='HH:MM-HH:MM=MBPS',
+        help='Limite de banda (Mbit/s) em uma janela de horário; 0 pausa os uploads na janela. '
+             'Pode ser repetido (ex: --bandwidth-window 07:00-19:00=5)'
+    )
+    
+    parser.add_argument(
+        '--dedupe',
+        action='store_true',
+        help='Reaproveita a URL de vídeos já enviados com o mesmo conteúdo (fingerprint do arquivo)'
+    )
+    
+    parser.add_argument(
+        '--no-probe',
+        action='store_true',
+        help='Não analisa os MP4 localmente (duração e integridade) antes do upload'
+    )
+    
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Executa continuamente, enviando assim que houver vaga na janela rolante de 24h'
+    )
+    
+    parser.add_argument(
+        '--channel-limit',
+        type=int,
+        default=DEFAULT_CHANNEL_LIMIT,
+        help=f'Uploads permitidos pelo canal em 24h; ajustado ao atingir o limite (padrão: {DEFAULT_CHANNEL_LIMIT})'
+    )
+    
+    parser.add_argument(
+        '--poll-interval',
+        type=int,
+        default=3600,
+        help='No modo daemon, segundos de espera quando não há vídeos pendentes (padrão: 3600)'
+    )
+    
+    parser.add_argument(
+        '--daily-quota',
+        type=int,
+        default=DEFAULT_DAILY_QUOTA,
+        help=f'Quota diária da API do projeto, compartilhada entre os scripts (padrão: {DEFAULT_DAILY_QUOTA})'
+    )
+    
+    parser.add_argument(
+        '--order',
+        choices=ORDER_POLICIES,
+        default='course',
+        help='Ordem dos uploads: course (ordem do curso) ou pack (o máximo de aulas que cabem na janela, menores primeiro)'
+    )
+    
+    parser.add_argument(
+        '--keep-order',
+        choices=KEEP_ORDER_POLICIES,
+        default='none',
+        help='Com --order pack, termina cada módulo (ou seção) antes de começar o próximo (padrão: none)'
+    )
+    
+    parser.add_argument(
+        '--pack-hours',
+        type=float,
+        default=None,
+        help='Com --order pack, horas disponíveis para enviar (padrão: até o fim da janela de banda atual)'
+    )
+    
+    parser.add_argument(
+        '--link-mbps',
+        type=float,
+        default=None,
+        help='Com --order pack, velocidade estimada do link em Mbit/s (padrão: limite da janela de banda atual)'
+    )
+    
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f'Novas tentativas por chunk em erros transitórios (5xx, rede, SSL), com backoff exponencial (padrão: {DEFAULT_MAX_RETRIES})'
+    )
+    
+    parser.add_argument(
+        '--events-file',
+        default=None,
+        help='Grava eventos estruturados (JSONL): chunks, uploads, chamadas à API, retries e erros de quota'
+    )
+    
+    parser.add_argument(
+        '--metrics-file',
+        default=None,
+        help='Grava um snapshot de métricas no formato textfile do Prometheus (ex: .../node_exporter/youtube_uploader.prom)'
+    )
+    
     parser.add_argument(
         '--credentials',
         default=CREDENTIALS_FILE,
@@ -617,6 +1199,21 @@ Requisitos:
         help=f'Arquivo JSON com metadados do curso (padrão: {DEFAULT_METADATA_FILE})'
     )
     
+    parser.add_argument(
+        '--courses',
+        nargs='+',
+        default=None,
+        help='Modo multi-curso: diretórios, globs ou arquivos de metadados; as aulas de todos entram em uma fila única'
+    )
+    
+    parser.add_argument(
+        '--course-weight',
+        action='append',
+        default=None,
+        metavar='ID=PESO',
+        help='Com --courses, peso do curso na fila (repetível; padrão 1). Ex: python-basico=2'
+    )
+    
     args = parser.parse_args()
     
     # Valida diretório de vídeos
@@ -624,10 +1221,47 @@ Requisitos:
         print(f"❌ Diretório não encontrado: {args.videos_dir}")
         sys.exit(1)
     
+    if args.courses and args.order == 'pack':
+        parser.error('--order pack não é suportado com --courses')
+    
     # Executa uploader
     try:
-        uploader = YouTubeUploader(args.videos_dir, args.credentials, args.metadata_file)
-        uploader.run(max_uploads=args.max_uploads, delay=args.delay)
+        options = dict(
+            chunk_size=int(args.chunk_size * MB),
+            adaptive_chunks=args.adaptive_chunks,
+            min_chunk_size=int(args.min_chunk_size * MB),
+            max_chunk_size=int(args.max_chunk_size * MB),
+            target_chunk_seconds=args.target_chunk_seconds,
+            channel_limit=args.channel_limit,
+            daily_quota=args.daily_quota,
+            bandwidth_windows=args.bandwidth_window,
+            dedupe=args.dedupe,
+            probe=not args.no_probe,
+            events_file=args.events_file,
+            metrics_file=args.metrics_file,
+            max_retries=args.max_retries,
+            order=args.order,
+            keep_order=args.keep_order,
+            pack_hours=args.pack_hours,
+            link_mbps=args.link_mbps
+        )
+        if args.courses:
+            from course_batch import CourseBatchUploader, resolve_metadata_files, parse_weights
+            metadata_files = resolve_metadata_files(args.courses)
+            if not metadata_files:
+                print(f"❌ Nenhum arquivo de metadados de curso encontrado em: {' '.join(args.courses)}")
+                sys.exit(1)
+            print(f"📚 Cursos: {len(metadata_files)}\n")
+            uploader = CourseBatchUploader(
+                args.videos_dir, metadata_files, parse_weights(args.course_weight),
+                credentials_file=args.credentials, **options
+            )
+        else:
+            uploader = YouTubeUploader(args.videos_dir, args.credentials, args.metadata_file, **options)
+        if args.daemon:
+            uploader.run_daemon(delay=args.delay, workers=args.workers, poll_interval=args.poll_interval)
+        else:
+            uploader.run(max_uploads=args.max_uploads, delay=args.delay, workers=args.workers)
     except KeyboardInterrupt:
         print("\n\n⚠️  Upload interrompido pelo usuário.")
         print("   O progresso foi salvo e pode ser retomado posteriormente.")